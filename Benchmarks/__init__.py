@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : __init__.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+# EOF
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : bench.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+"""
+Benchmarks each stage of SubLime and end-to-end runs on a synthetic
+library, against a local stand-in for the OpenSubtitles API.
+
+Run from the project directory:
+
+    PYTHONPATH=Sources python -m Benchmarks.bench --videos 2000 \\
+        --baseline Benchmarks/results/baseline.json
+
+Results are written as JSON into Benchmarks/results and compared with
+a baseline: the exit status is 1 if a stage got slower than the
+threshold. Stages run with a warm page cache, best of --repeat runs.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+
+import babelfish
+
+import sublime
+
+from sublime.core import Subtitle
+from sublime.core import VideoFactory
+from sublime.store import SubtitleStore
+from sublime.fileio import VideoFile
+from sublime.metrics import METRICS
+from sublime.pipeline import SubtitlesJob
+from sublime.providers.opensubtitles import OpenSubtitlesServer
+
+from Benchmarks.library import make_library
+from Benchmarks.provider import LocalProvider
+
+# Directory of results
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Languages of benchmarked runs
+LANGUAGES = [babelfish.Language('eng'), babelfish.Language('fra')]
+
+
+def best_time(function, repeat):
+    """ Returns the best duration of function calls
+    and the result of the last one. """
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return best, result
+
+
+def list_subtitles(directory):
+    """ Returns the set of subtitle files in a directory. """
+    return {
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory) for name in files
+        if os.path.splitext(name)[1] in Subtitle.EXTENSIONS
+    }
+
+
+def remove_subtitles(directory, sidecars):
+    """ Removes subtitles written by a previous run, so that each run
+    writes new files instead of replacing them (replacing a file costs
+    a flush on some filesystems). """
+    for filepath in list_subtitles(directory) - sidecars:
+        os.remove(filepath)
+
+
+def make_provider(local_provider, store=None):
+    """ Returns an OpenSubtitlesServer connected to the local provider. """
+    provider = OpenSubtitlesServer()
+    provider.xmlrpc_uri = local_provider.uri
+    provider.store = store
+    provider.connect()
+
+    return provider
+
+
+def run_job(
+        local_provider, directory, sidecars, store=None, batch_size=None):
+    """ Runs SubtitlesJob on a directory and returns its metrics. """
+    remove_subtitles(directory, sidecars)
+    provider = make_provider(local_provider, store)
+    METRICS.reset()
+
+    try:
+        SubtitlesJob(
+            [provider], LANGUAGES, force=True,
+            batch_size=batch_size).run(directories=[directory])
+    finally:
+        provider.disconnect()
+
+    return METRICS.report()
+
+
+def benchmark(directory, local_provider, repeat=3, batch_size=None):
+    """ Benchmarks stages and end-to-end runs on a library,
+    returns a dictionary of results. """
+    stages = {}
+    sidecars = list_subtitles(directory)
+
+    def record(name, duration, items):
+        stages[name] = {
+            'seconds': duration,
+            'items': items,
+            'items_per_second': items / duration if duration else None,
+        }
+
+    duration, filenames = best_time(
+        lambda: list(SubtitlesJob.scan(directories=[directory])), repeat)
+    record('scan', duration, len(filenames))
+
+    duration, videos = best_time(
+        lambda: [video for video in map(
+            VideoFactory.make_from_filename, filenames) if video], repeat)
+    record('classify', duration, len(filenames))
+
+    duration, _ = best_time(
+        lambda: [video.has_subtitle(language)
+                 for video in videos for language in LANGUAGES], repeat)
+    record('check', duration, len(videos))
+
+    hasher = OpenSubtitlesServer()
+    duration, _ = best_time(
+        lambda: [hasher.hashcode(video.filename) for video in videos],
+        repeat)
+    record('hash', duration, len(videos))
+
+    duration, metrics = best_time(
+        lambda: run_job(
+            local_provider, directory, sidecars, None, batch_size),
+        repeat)
+    record('end_to_end', duration, len(filenames))
+
+    # Second runs find all subtitles in the local store
+    store_dir = tempfile.mkdtemp(prefix='sublime-bench-store-')
+    try:
+        store = SubtitleStore(store_dir)
+        run_job(local_provider, directory, sidecars, store, batch_size)
+        duration, store_metrics = best_time(
+            lambda: run_job(
+                local_provider, directory, sidecars, store, batch_size),
+            repeat)
+        record('end_to_end_store', duration, len(filenames))
+    finally:
+        shutil.rmtree(store_dir)
+
+    remove_subtitles(directory, sidecars)
+
+    return {
+        'stages': stages,
+        'metrics': metrics,
+        'store_metrics': store_metrics,
+    }
+
+
+def compare(results, baseline, threshold):
+    """ Prints durations of stages against a baseline
+    and returns names of stages slower than threshold. """
+    regressions = []
+
+    print("{:<18} {:>10} {:>10} {:>8}".format(
+        "stage", "baseline", "current", "ratio"))
+    for name, stage in sorted(results['stages'].items()):
+        previous = baseline['stages'].get(name)
+        if not previous:
+            print("{:<18} {:>10} {:>10.3f}".format(
+                name, "-", stage['seconds']))
+            continue
+
+        ratio = stage['seconds'] / previous['seconds']
+        print("{:<18} {:>10.3f} {:>10.3f} {:>8.2f}".format(
+            name, previous['seconds'], stage['seconds'], ratio))
+
+        if ratio > 1 + threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main(argv=None):
+    """ Generates a library, runs benchmarks and stores results. """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks SubLime on a synthetic library.",
+        prog='bench')
+    parser.add_argument(
+        '--videos', type=int, default=1000,
+        help='Number of videos of the generated library.')
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Seed of the generated library.')
+    parser.add_argument(
+        '--directory', action='store',
+        help='Generates the library in this directory and keeps it.')
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='Seconds waited by the local provider for each call.')
+    parser.add_argument(
+        '--batch-size', type=int, default=SubtitlesJob.DEFAULT_BATCH_SIZE,
+        help='Number of videos searched and downloaded together.')
+    parser.add_argument(
+        '--no-io-hints', action='store_false', dest='io_hints',
+        help='Reads video files without O_NOATIME and readahead hints.')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='Number of runs of each benchmark (best one is kept).')
+    parser.add_argument(
+        '--name', action='store', default=time.strftime('%Y%m%d-%H%M%S'),
+        help='Name of the results file.')
+    parser.add_argument(
+        '--baseline', action='store',
+        help='Results file to compare with.')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Slowdown ratio over baseline reported as a regression.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    VideoFile.IO_HINTS = args.io_hints
+    os.environ.setdefault('SUBLIME_HOME', os.getcwd())
+
+    directory = args.directory or tempfile.mkdtemp(prefix='sublime-bench-')
+    os.makedirs(directory, exist_ok=True)
+
+    try:
+        counts = make_library(directory, args.videos, args.seed)
+
+        with LocalProvider(args.latency) as local_provider:
+            results = benchmark(
+                directory, local_provider, args.repeat, args.batch_size)
+            results['calls'] = local_provider.calls
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory)
+
+    results.update({
+        'name': args.name,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'version': sublime.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'library': dict(counts, seed=args.seed),
+        'latency': args.latency,
+        'batch_size': args.batch_size,
+        'io_hints': args.io_hints,
+    })
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_filepath = os.path.join(RESULTS_DIR, args.name + '.json')
+    with open(results_filepath, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+    print("Results written into {}".format(results_filepath))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(
+                results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print("Regressions: {}".format(", ".join(regressions)))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# EOF
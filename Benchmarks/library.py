@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : library.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import csv
+import random
+
+from sublime import util
+from sublime.core import Video
+from sublime.file import FileMagicError
+
+# Words used to make release names
+TITLE_WORDS = (
+    "Dark", "Knight", "Lost", "City", "Star", "Night", "Return", "King",
+    "Last", "Empire", "Secret", "Garden", "Iron", "Storm", "Silent", "River",
+    "Red", "Planet", "Shadow", "Ghost", "Blue", "Moon", "Wild", "Heart",
+)
+SHOW_NAMES = (
+    "The Office", "Breaking Bad", "Doctor Who", "Game of Thrones",
+    "The Wire", "Lost", "Fringe", "Sherlock", "Dexter", "House",
+)
+QUALITIES = ("720p", "1080p", "2160p", "DVDRip", "WEBRip")
+SOURCES = ("BluRay", "HDTV", "WEB-DL", "DVD")
+CODECS = ("x264", "x265", "XviD", "HEVC")
+GROUPS = ("SPARKS", "DIMENSION", "LOL", "FGT", "NTb", "AMIABLE")
+
+# Languages of subtitle tracks embedded in MKV videos
+TRACK_LANGUAGES = ("eng", "fre", "ger", "spa", "ita")
+
+# Other files found in video libraries
+NOISE_EXTENSIONS = (".nfo", ".jpg", ".txt", ".sfv")
+
+# Size of blocks read to compute hash codes
+HASH_BLOCK_SIZE = 64 * 1024
+
+# MKV header recognized by FileMagic
+EBML_HEADER = bytes.fromhex(
+    "1A45DFA3" "93" "4282" "88") + b"matroska" + bytes.fromhex(
+    "4287" "81" "04" "4285" "81" "02")
+
+
+def load_video_signatures():
+    """ Returns a list of (extension, header) of video file signatures
+    of file_signatures.csv which are recognized by FileMagic. """
+    file_magic = Video.get_file_magic()
+    signatures = []
+
+    signatures_filepath = os.path.join(
+        util.get_exe_dir(), "Config", "file_signatures.csv")
+    with open(signatures_filepath, "r", encoding='utf-8') as sign_file:
+        reader = csv.reader(sign_file, delimiter=',', quoting=csv.QUOTE_ALL)
+        for line in reader:
+            extension = line[0].strip()
+            header = bytes.fromhex(line[1].strip())
+
+            if extension == '.mkv':
+                header = EBML_HEADER
+
+            # Some magic numbers are prefixes of others
+            try:
+                if file_magic.get_video_signature(
+                        'video' + extension, header):
+                    signatures.append((extension, header))
+            except FileMagicError:
+                pass
+
+    return signatures
+
+
+def ebml_element(element_id, data):
+    """ Encodes an EBML element with an 8 bytes size. """
+    return element_id + b'\x01' + len(data).to_bytes(7, 'big') + data
+
+
+def ebml_uint(value):
+    """ Encodes an EBML unsigned integer. """
+    return value.to_bytes(max(1, (value.bit_length() + 7) // 8), 'big')
+
+
+def make_mkv_header(languages):
+    """ Returns the beginning of a MKV file with subtitle tracks
+    of given languages, without the Segment size. """
+    track_entries = b''.join(
+        ebml_element(b'\xae', (
+            ebml_element(b'\xd7', ebml_uint(number)) +
+            ebml_element(b'\x83', ebml_uint(0x11)) +
+            ebml_element(b'\x86', b'S_TEXT/UTF8') +
+            ebml_element(b'\x22\xb5\x9c', language.encode('ascii'))))
+        for number, language in enumerate(languages, 1))
+    tracks = ebml_element(b'\x16\x54\xae\x6b', track_entries)
+
+    # Position of Tracks relative to the Segment data
+    seek = ebml_element(
+        b'\x4d\xbb',
+        ebml_element(b'\x53\xab', b'\x16\x54\xae\x6b') +
+        ebml_element(b'\x53\xac', ebml_uint(0)))
+    seek_head_size = len(ebml_element(b'\x11\x4d\x9b\x74', seek))
+    seek = ebml_element(
+        b'\x4d\xbb',
+        ebml_element(b'\x53\xab', b'\x16\x54\xae\x6b') +
+        ebml_element(b'\x53\xac', ebml_uint(seek_head_size)))
+    seek_head = ebml_element(b'\x11\x4d\x9b\x74', seek)
+
+    return EBML_HEADER, seek_head + tracks
+
+
+def write_sparse_video(filepath, header, size, rand, mkv_languages=None):
+    """ Writes a sparse video file of given size starting with header.
+    Its first and last blocks get random bytes, so that each video
+    has its own hash code. """
+    if mkv_languages is not None:
+        ebml_header, segment_data = make_mkv_header(mkv_languages)
+        segment_size = size - len(ebml_header) - 12
+        header = (
+            ebml_header + b'\x18\x53\x80\x67' + b'\x01' +
+            segment_size.to_bytes(7, 'big') + segment_data)
+
+    with open(filepath, 'wb') as video_file:
+        video_file.write(header)
+        video_file.seek(HASH_BLOCK_SIZE // 2)
+        video_file.write(rand.getrandbits(256).to_bytes(32, 'big'))
+        video_file.seek(size - HASH_BLOCK_SIZE // 2)
+        video_file.write(rand.getrandbits(256).to_bytes(32, 'big'))
+        video_file.truncate(size)
+
+
+def release_name(rand, episode=None):
+    """ Returns a release name which guessit understands. """
+    quality = "{}.{}.{}-{}".format(
+        rand.choice(QUALITIES), rand.choice(SOURCES),
+        rand.choice(CODECS), rand.choice(GROUPS))
+
+    if episode:
+        show, season, number = episode
+        return "{}.S{:02d}E{:02d}.{}".format(
+            show.replace(" ", "."), season, number, quality)
+
+    title = ".".join(rand.sample(TITLE_WORDS, rand.randint(1, 3)))
+    return "{}.{}.{}".format(title, rand.randint(1950, 2025), quality)
+
+
+def make_library(
+        directory, videos=1000, seed=0, episode_ratio=0.5,
+        srt_ratio=0.3, mkv_ratio=0.2, link_ratio=0.02, noise_ratio=0.5,
+        min_size=100 * 1024 * 1024, max_size=4 * 1024 * 1024 * 1024):
+    """ Generates a synthetic video library in directory and returns
+    the number of files of each kind.
+
+    Videos are sparse files, so a large library takes little disk space.
+    They have magic headers of every video signature, MKV videos have
+    embedded subtitle tracks, some videos already have an english
+    subtitle and some are hard links to other videos. The same seed
+    always generates the same library. """
+    rand = random.Random(seed)
+    signatures = load_video_signatures()
+    mkv_header = next(
+        header for extension, header in signatures if extension == '.mkv')
+    others = [signature for signature in signatures
+              if signature[1] != mkv_header]
+
+    counts = {'videos': 0, 'mkv': 0, 'srt': 0, 'links': 0, 'noise': 0}
+    video_filepaths = []
+    episodes = {}
+
+    for _ in range(videos):
+        if video_filepaths and rand.random() < link_ratio:
+            # Same video in another place
+            source = rand.choice(video_filepaths)
+            video_dir = os.path.join(directory, 'Links')
+            os.makedirs(video_dir, exist_ok=True)
+            filepath = os.path.join(
+                video_dir, "{}-{}".format(
+                    counts['links'], os.path.basename(source)))
+            os.link(source, filepath)
+            counts['links'] += 1
+            continue
+
+        if rand.random() < episode_ratio:
+            show = rand.choice(SHOW_NAMES)
+            season = rand.randint(1, 8)
+            number = episodes.setdefault((show, season), 0) + 1
+            episodes[(show, season)] = number
+            name = release_name(rand, (show, season, number))
+            video_dir = os.path.join(
+                directory, 'Series', show, "Season {}".format(season))
+        else:
+            name = release_name(rand)
+            video_dir = os.path.join(directory, 'Movies', name)
+
+        os.makedirs(video_dir, exist_ok=True)
+        size = rand.randint(min_size, max_size)
+
+        if rand.random() < mkv_ratio:
+            extension, header = '.mkv', None
+            languages = rand.sample(TRACK_LANGUAGES, rand.randint(0, 3))
+            counts['mkv'] += 1
+        else:
+            extension, header = rand.choice(others)
+            languages = None
+
+        filepath = os.path.join(video_dir, name + extension)
+        write_sparse_video(filepath, header, size, rand, languages)
+        video_filepaths.append(filepath)
+        counts['videos'] += 1
+
+        if rand.random() < srt_ratio:
+            with open(os.path.join(video_dir, name + '.en.srt'), 'w') as srt:
+                srt.write("1\n00:00:01,000 --> 00:00:02,000\nHello\n")
+            counts['srt'] += 1
+
+        if rand.random() < noise_ratio:
+            noise_extension = rand.choice(NOISE_EXTENSIONS)
+            with open(os.path.join(
+                    video_dir, name + noise_extension), 'wb') as noise:
+                noise.write(rand.getrandbits(8192).to_bytes(1024, 'big'))
+            counts['noise'] += 1
+
+    return counts
+
+
+# EOF
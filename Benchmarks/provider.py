@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : provider.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import gzip
+import time
+import base64
+import zlib
+import threading
+import xmlrpc.server
+
+from babelfish import Language
+
+# Subtitle served for every video
+SUBTITLE_DATA = "".join(
+    "{}\n00:00:{:02d},000 --> 00:00:{:02d},500\nLine {}\n\n".format(
+        number, number % 60, number % 60, number)
+    for number in range(1, 500)).encode('utf-8')
+
+
+# -----------------------------------------------------------------------------
+#
+# RequestHandler class
+#
+# -----------------------------------------------------------------------------
+class RequestHandler(xmlrpc.server.SimpleXMLRPCRequestHandler):
+
+    """ Serves the XML-RPC API on the OpenSubtitles path. """
+
+    rpc_paths = ('/xml-rpc',)
+
+
+# -----------------------------------------------------------------------------
+#
+# LocalProvider class
+#
+# -----------------------------------------------------------------------------
+class LocalProvider(object):
+
+    """ Local stand-in for the OpenSubtitles XML-RPC API.
+
+    Every searched video has a subtitle for each wanted language, except
+    a fraction of them given by miss_ratio. Videos are described as
+    episodes, whose names suit both movies and episodes. Each call waits
+    latency seconds to simulate a remote server. """
+
+    def __init__(self, latency=0.0, miss_ratio=0.1, host='127.0.0.1'):
+        """ Initializes instance. """
+        self.latency = latency
+        self.miss_ratio = miss_ratio
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._encoded_data = base64.b64encode(
+            gzip.compress(SUBTITLE_DATA)).decode('ascii')
+
+        self._server = xmlrpc.server.SimpleXMLRPCServer(
+            (host, 0), requestHandler=RequestHandler,
+            logRequests=False, allow_none=True)
+        self._server.register_instance(self)
+        self._thread = None
+
+    @property
+    def uri(self):
+        """ URI of the XML-RPC API. """
+        host, port = self._server.server_address
+
+        return "http://{}:{}/xml-rpc".format(host, port)
+
+    def start(self):
+        """ Serves requests in a thread. """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="local-provider")
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        """ Stops serving requests. """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _dispatch(self, method, params):
+        """ Counts and delays calls. """
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        return getattr(self, method)(*params)
+
+    def LogIn(self, username, password, language, user_agent):
+        return {'status': '200 OK', 'token': 'local'}
+
+    def LogOut(self, token):
+        return {'status': '200 OK'}
+
+    def SearchSubtitles(self, token, queries):
+        data = []
+
+        for query in queries:
+            hash_code = query['moviehash']
+            if zlib.crc32(hash_code.encode('ascii')) % 1000 < \
+                    self.miss_ratio * 1000:
+                continue
+
+            for language_code in query['sublanguageid'].split(','):
+                language = Language.fromopensubtitles(language_code)
+                data.append({
+                    'MovieHash': hash_code,
+                    'SubLanguageID': language_code,
+                    'IDSubtitleFile': "{}-{}".format(
+                        hash_code, language.alpha3),
+                    'SubRating': '7.5',
+                    'SubFormat': 'srt',
+                    'SubDownloadsCnt': '100',
+                    'MovieName': '"Local Show" Episode {}'.format(
+                        hash_code),
+                    'MovieKind': 'episode',
+                    'SeriesSeason': '1',
+                    'SeriesEpisode': '1',
+                })
+
+        return {'status': '200 OK', 'data': data}
+
+    def DownloadSubtitles(self, token, subtitles_id):
+        return {
+            'status': '200 OK',
+            'data': [
+                {'idsubtitlefile': subtitle_id, 'data': self._encoded_data}
+                for subtitle_id in subtitles_id
+            ]
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+
+# EOF
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from sublime import cli
-
 __title__ = 'SubLime'
 __version__ = '0.1.0'
 __author__ = 'sham'
@@ -11,4 +9,6 @@ __license__ = 'BSD License'
 
 def main():
     """Entry point for the application script"""
+    from sublime import cli
+
     cli.run()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : batching.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import time
+import logging
+import threading
+import contextlib
+import collections
+
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.batching")
+
+
+# -----------------------------------------------------------------------------
+#
+# AdaptiveBatchSizer class
+#
+# -----------------------------------------------------------------------------
+class AdaptiveBatchSizer(object):
+
+    """ Number of items sent by request, tuned from the requests sent.
+
+    Size is halved after a request which failed, took longer than
+    target_latency or received more than max_payload bytes, and grows
+    by step after a full request which took less than half of both.
+    It always stays between minimum and maximum. The last size is
+    recorded in metrics as <name>_batch_size, with counters of batches
+    and items sent. Latencies of the last successful requests are kept
+    to give their percentiles. """
+
+    DEFAULT_TARGET_LATENCY = 5.0
+    DEFAULT_MAX_PAYLOAD = 4 * 1024 * 1024
+
+    # Number of latencies kept, and needed before giving percentiles
+    LATENCY_WINDOW = 100
+    MIN_LATENCIES = 20
+
+    def __init__(
+            self, name, minimum, initial, maximum,
+            target_latency=DEFAULT_TARGET_LATENCY,
+            max_payload=DEFAULT_MAX_PAYLOAD, step=None):
+        """ Initializes instance. """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                "Invalid batch sizes: expected 1 <= {} <= {} <= {}.".format(
+                    minimum, initial, maximum))
+
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.max_payload = max_payload
+        self.step = step or max(1, initial // 10)
+        self.size = initial
+        self._latencies = collections.deque(maxlen=self.LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def batches(self, items):
+        """ Yields successive batches of items, each one sized when
+        it is taken, after requests of the previous ones. """
+        items = list(items)
+        start = 0
+
+        while start < len(items):
+            size = self.size
+            yield items[start:start + size]
+            start += size
+
+    @contextlib.contextmanager
+    def measure(self, count, transport=None):
+        """ Context manager measuring a request of count items. Bytes
+        received are counted by transport, if it is a StreamingTransport. """
+        received = getattr(transport, 'bytes_received', 0)
+        start = time.perf_counter()
+
+        try:
+            yield
+        except Exception:
+            self.record(count, time.perf_counter() - start, 0, error=True)
+            raise
+
+        received = getattr(transport, 'bytes_received', 0) - received
+        self.record(count, time.perf_counter() - start, received)
+
+    def record(self, count, latency, payload, error=False):
+        """ Adapts size to a request of count items. """
+        with self._lock:
+            size = self.size
+            if not error:
+                self._latencies.append(latency)
+
+            if error or latency > self.target_latency or \
+                    payload > self.max_payload:
+                size = max(self.minimum, size // 2)
+            elif count >= size and latency < self.target_latency / 2 and \
+                    payload < self.max_payload / 2:
+                size = min(self.maximum, size + self.step)
+
+            if size != self.size:
+                LOG.debug(
+                    "%s batch size: %s -> %s (%s items, %.2f s, %s bytes%s)",
+                    self.name, self.size, size, count, latency, payload,
+                    ", failed" if error else "")
+                self.size = size
+
+        METRICS.incr('{}_batches'.format(self.name))
+        METRICS.incr('{}_batch_items'.format(self.name), count)
+        METRICS.record('{}_batch_size'.format(self.name), size)
+
+    def percentile(self, fraction):
+        """ Returns the latency under which a fraction of the last
+        requests were answered, or None if too few were measured. """
+        with self._lock:
+            if len(self._latencies) < self.MIN_LATENCIES:
+                return None
+            latencies = sorted(self._latencies)
+
+        index = min(len(latencies) - 1, int(fraction * len(latencies)))
+
+        return latencies[index]
+
+    def __repr__(self):
+        return "<AdaptiveBatchSizer('{}', '{}')>".format(self.name, self.size)
+
+
+# EOF
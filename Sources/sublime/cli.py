@@ -13,16 +13,23 @@
 
 import sys
 import os
+import logging
 import argparse
 
-import babelfish
-
 import sublime
 
 from sublime import util
-from sublime.server import SubtitleProvider
+from sublime.client import DaemonClient
+from sublime.client import default_socket_path
+from sublime.client import SOCKET_ENVIRONMENT_VARIABLE
 from sublime.core import Episode
-from sublime.core import VideoFactory
+from sublime.fileio import VideoFile
+from sublime.hedging import DeadlineExceeded
+from sublime.pipeline import Pipeline
+from sublime.pipeline import SubtitlesJob
+from sublime.store import SubtitleStore
+from sublime.walk import ParallelWalker
+from sublime.metrics import METRICS
 
 # Gets execution directory
 exe_dir = util.get_exe_dir()
@@ -30,72 +37,277 @@ exe_dir = util.get_exe_dir()
 # Sets environment variable for the application
 os.environ['SUBLIME_HOME'] = exe_dir
 
-# Gets a logger
-LOG = util.init_logging()
+# Logger (logging system is initialized when SubLime runs)
+LOG = logging.getLogger("sublime.cli")
 
 # Default languages downloaded
 DEFAULT_LANGUAGES = ['eng', 'fra']
 
+# Default directory of the local subtitle store
+DEFAULT_CACHE_DIR = os.path.join(util.get_cache_dir(), 'subtitles')
 
 def execute(args):
     """ Executes SubLime with given arguments. """
-    videos = []
+    selected_languages = _selected_languages(args)
 
-    if args.selected_languages:
-        languages = args.selected_languages
-    else:
-        languages = DEFAULT_LANGUAGES
+    VideoFile.IO_HINTS = args.io_hints
 
-    selected_languages = [
-        babelfish.Language(selected_lang)
-        for selected_lang in languages
-    ]
+    store = _make_store(args)
+    providers = _get_providers(args)
+
+    # Persistent progress, to resume an interrupted run
+    jobs = None
+    if args.job_db:
+        from sublime.jobs import JobQueue
+        jobs = JobQueue(args.job_db)
+
+    job = SubtitlesJob(
+        providers, selected_languages, args.force,
+        args.rename, args.rename_pattern, args.underscore,
+        args.workers, args.batch_size, args.queue_size, args.scan_workers,
+        jobs, args.shard, _make_deadline(args))
+
+    # Videos are streamed from scan to subtitles by batches
+    try:
+        _run_connected(
+            providers, store, job.run, args.video_files, args.directories)
+    finally:
+        if jobs is not None:
+            LOG.info("Videos by stage in job queue: %s", jobs.counts())
+            jobs.close()
+
+
+def execute_plan(args):
+    """ Executes the local part of a run and writes its plan. """
+    from sublime.plan import PlanWriter
+    from sublime.server import SubtitleProvider
+
+    selected_languages = _selected_languages(args)
+
+    VideoFile.IO_HINTS = args.io_hints
+
+    # Providers are not connected: they only select hash algorithms
+    job = SubtitlesJob(
+        SubtitleProvider.get_providers(args.providers),
+        selected_languages, args.force,
+        workers=args.workers, queue_size=args.queue_size,
+        scan_workers=args.scan_workers, shard=args.shard)
+
+    with PlanWriter(
+            args.plan, selected_languages, job.hashing.names) as writer:
+        job.write_plan(writer, args.video_files, args.directories)
+
+    LOG.info("%s videos need subtitles in plan %s.", writer.count, args.plan)
+
+
+def execute_apply(args):
+    """ Executes the network part of a run from its plan. """
+    from sublime.plan import PlanReader
+
+    store = _make_store(args)
+    providers = _get_providers(args)
+
+    with PlanReader(args.plan) as reader:
+        job = SubtitlesJob(
+            providers, reader.languages,
+            rename=args.rename, rename_pattern=args.rename_pattern,
+            underscore=args.underscore,
+            batch_size=args.batch_size, queue_size=args.queue_size,
+            deadline=_make_deadline(args))
+
+        missing = set(job.hashing.names) - set(reader.hash_algorithms)
+        if missing:
+            LOG.warning(
+                "Plan %s has no %s hash codes: they will be computed.",
+                args.plan, ", ".join(sorted(missing)))
+
+        _run_connected(providers, store, job.apply_plan, reader)
+
+
+def _run_connected(providers, store, function, *args):
+    """ Calls function while providers are connected. """
+    connected_providers = []
+    try:
+        for sub_server in providers:
+            sub_server.store = store
+            sub_server.connect()
+            connected_providers.append(sub_server)
+
+        function(*args)
+    finally:
+        for sub_server in connected_providers:
+            sub_server.disconnect()
+
+
+def forward(args):
+    """ Sends the job to the SubLime daemon instead of executing it if
+    asked to (--daemon or --socket), returns False if it wasn't sent. """
+    if not args.daemon and not args.socket:
+        return False
+
+    # Providers, store, tuning and diagnostics are those of the daemon
+    local_options = _local_options(args)
+    if local_options:
+        LOG.warning(
+            "The daemon can't apply options %s: running locally.",
+            ", ".join(local_options))
+        return False
+
+    socket_path = (
+        args.socket or os.environ.get(SOCKET_ENVIRONMENT_VARIABLE) or
+        default_socket_path())
+
+    client = DaemonClient(socket_path)
+    response = client.run(
+        args.video_files, args.directories,
+        languages=args.selected_languages or DEFAULT_LANGUAGES,
+        force=args.force, rename=args.rename,
+        rename_pattern=args.rename_pattern, underscore=args.underscore,
+        job_db=args.job_db and os.path.abspath(args.job_db),
+        shard=args.shard and str(args.shard), deadline=args.deadline)
+
+    LOG.info(
+        "SubLime daemon processed %s videos in %.2f seconds.",
+        response['videos'], response['seconds'])
+
+    return True
+
+
+def _local_options(args):
+    """ Returns options given to a run which are shared by all commands
+    (providers, store, tuning, diagnostics) and differ from defaults. """
+    parser = argparse.ArgumentParser()
+    _add_common_arguments(parser)
+    defaults = parser.parse_args([])
+
+    # First option of each destination (--cache-dir for --no-cache)
+    options = {}
+    for action in parser._actions:
+        if action.dest in vars(defaults):
+            options.setdefault(action.dest, action.option_strings[0])
+
+    return [
+        option for dest, option in options.items()
+        if getattr(args, dest) != getattr(defaults, dest)]
+
+
+def execute_or_forward(args):
+    """ Sends the job to a running daemon, or executes it. """
+    if not forward(args):
+        execute(args)
+
+
+def serve(argv):
+    """ Runs SubLime as a daemon serving jobs on a Unix domain socket. """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Runs SubLime as a daemon which keeps providers connected "
+            "and runs jobs sent by 'sublime --socket' on a socket."
+        ),
+        prog='sublime serve')
+    parser.add_argument(
+        '--socket', action='store',
+        default=(
+            os.environ.get(SOCKET_ENVIRONMENT_VARIABLE) or
+            default_socket_path()),
+        help='Unix domain socket on which jobs are received.',
+        dest='socket', metavar="FILE")
+    _add_common_arguments(parser)
+
+    _run_command(parser, argv, execute_serve)
+
+
+def execute_serve(args):
+    """ Serves jobs until the daemon is stopped. """
+    import signal
+
+    from sublime.daemon import Daemon
+
+    VideoFile.IO_HINTS = args.io_hints
+
+    # Stops properly (socket removed, providers disconnected) on SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())
+
+    daemon = Daemon(
+        _get_providers(args), args.socket, _make_store(args),
+        args.workers, args.batch_size, args.queue_size, args.scan_workers)
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        LOG.info("SubLime daemon stopped.")
+
+
+def plan(argv):
+    """ Runs the local part of SubLime: scans, classifies and hashes
+    videos, then writes those which need subtitles into a plan. """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Does all the work on video files (scan, existing subtitles, "
+            "hash codes) and writes a plan of the subtitles to search, "
+            "to run later with 'sublime apply'. Videos are written with "
+            "their absolute paths."
+        ),
+        prog='sublime plan')
+    parser.add_argument(
+        '-o', '--output', action='store', required=True,
+        help='Plan file to write (compressed if its name ends with .gz).',
+        dest='plan', metavar="PLAN")
+    _add_selection_arguments(parser)
+    parser.add_argument(
+        '--shard', action='store', type=_shard,
+        help='Only plans shard i of N of the videos, split by hash code '
+             '(i from 1 to N).',
+        dest='shard', metavar="i/N")
+    _add_common_arguments(parser)
+
+    _run_command(parser, argv, execute_plan)
+
+
+def apply(argv):
+    """ Runs the network part of SubLime: searches and downloads
+    subtitles of the videos of a plan. """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Searches and downloads subtitles of the videos of a plan "
+            "written by 'sublime plan', without reading video files. "
+            "Subtitles are written next to the absolute paths of videos "
+            "in the plan: their library must be mounted at the same "
+            "location as when the plan was written."
+        ),
+        prog='sublime apply')
+    parser.add_argument(
+        'plan', action='store',
+        help='Plan file written by sublime plan.', metavar="PLAN")
+    _add_rename_arguments(parser)
+    parser.add_argument(
+        '--deadline', action='store', type=float,
+        help='Stops sending requests to providers after a number '
+             'of seconds.',
+        dest='deadline', metavar="SECONDS")
+    _add_common_arguments(parser)
+
+    _run_command(parser, argv, execute_apply)
 
-    LOG.debug("Languages selected: {}".format(selected_languages))
-
-    # List of filenames directly given by user
-    if args.video_files:
-        videos = [
-            VideoFactory.make_from_filename(video_filename)
-            for video_filename in args.video_files
-        ]
-    # Or list of filenames by walking through directories
-    elif args.directories:
-        for movie_dir in args.directories:
-            for root, _, files in os.walk(movie_dir):
-                for name in files:
-                    video_filename = os.path.join(root, name)
-                    video = VideoFactory.make_from_filename(video_filename)
-                    if video:
-                        videos.append(video)
-
-    # Informs user that there is already existing subtitles
-    for video in videos:
-        for selected_lang in selected_languages:
-            if video.has_subtitle(selected_lang):
-                video_type = video.__class__.__name__
-                video_name = os.path.basename(video.filename)
-                if not args.force:
-                    LOG.warning(
-                        "{} named {} already has a subtitle "
-                        "for {} and nothing will happen for it! "
-                        "Use option '-f --force' to replace.".format(
-                            video_type, video_name, selected_lang.name))
-                else:
-                    LOG.info(
-                        'Replacing {} subtitle for {} named {}.'.format(
-                            selected_lang.name, video_type, video_name))
-                    video.languages_to_download.append(selected_lang)
-            else:
-                video.languages_to_download.append(selected_lang)
-
-    # Search subtitles for videos
-    for sub_server in SubtitleProvider.get_providers():
-        sub_server.connect()
-        sub_server.download_subtitles(
-            videos, selected_languages,
-            args.rename, args.rename_pattern, args.underscore)
-        sub_server.disconnect()
+
+def _run_command(parser, argv, command):
+    """ Parses arguments and executes a command with them. """
+    args = parser.parse_args(argv)
+    util.init_logging(args.log_profile)
+
+    try:
+        with _make_profiler(args):
+            command(args)
+    except DeadlineExceeded as error:
+        LOG.error(error)
+        sys.exit(2)
+    except Exception as error:
+        LOG.exception(error)
+        sys.exit(2)
+    finally:
+        if args.metrics_out:
+            METRICS.dump(args.metrics_out)
+
+    sys.exit()
 
 
 def _file_exists(video_file):
@@ -123,25 +335,89 @@ def _directory_exists(video_directory):
     return video_directory
 
 
-def run():
-    """ Main command-line execution loop. """
-    # Languages
-    language_codes = babelfish.language.LANGUAGES
+def _language_code(language_code):
+    """ Checks if given language code exists. """
+    from babelfish.language import LANGUAGES
 
-    # create the arguments parser
-    parser = argparse.ArgumentParser(
-        description=(
-            "SubLime is a command-line program for searching "
-            "and downloading the right subtitles for movies."
-        ),
-        prog='sublime')
+    if language_code not in LANGUAGES:
+        raise argparse.ArgumentTypeError(
+            "The language code {} doesn't exist.".format(language_code))
 
-    sublime_version = '%(prog)s ' + sublime.__version__
+    return language_code
 
-    parser.add_argument(
-        '--version', action='version',
-        version=sublime_version)
 
+def _shard(shard):
+    """ Checks if given shard is valid. """
+    from sublime.jobs import Shard
+
+    try:
+        return Shard.parse(shard)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def _make_profiler(args):
+    """ Makes a Profiler from command-line arguments. """
+    from sublime.profiling import Profiler
+
+    return Profiler(
+        args.profile, args.profile_mem,
+        args.profile_sample, args.profile_interval)
+
+
+def _get_providers(args):
+    """ Gets providers selected by command-line arguments. """
+    from sublime.server import SubtitleProvider
+
+    providers = SubtitleProvider.get_providers(args.providers)
+    # Providers keep their own timeout (REQUEST_TIMEOUT) by default
+    if args.timeout is not None:
+        for provider in providers:
+            provider.timeout = args.timeout
+
+    return providers
+
+
+def _make_deadline(args):
+    """ Makes the Deadline of the run from command-line arguments. """
+    from sublime.hedging import Deadline
+
+    if not args.deadline:
+        return None
+
+    return Deadline(args.deadline)
+
+
+def _selected_languages(args):
+    """ Gets languages selected by command-line arguments. """
+    import babelfish
+
+    if args.selected_languages:
+        languages = args.selected_languages
+    else:
+        languages = DEFAULT_LANGUAGES
+
+    selected_languages = [
+        babelfish.Language(selected_lang)
+        for selected_lang in languages
+    ]
+
+    LOG.debug("Languages selected: %s", selected_languages)
+
+    return selected_languages
+
+
+def _make_store(args):
+    """ Makes the local store of already downloaded subtitles
+    from command-line arguments. """
+    if not args.cache_dir:
+        return None
+
+    return SubtitleStore(args.cache_dir, args.cache_size * 1024 * 1024)
+
+
+def _add_selection_arguments(parser):
+    """ Adds arguments selecting videos and the subtitles they need. """
     # Arguments to select video which need subtitles
     files_group = parser.add_mutually_exclusive_group(required=True)
     files_group.add_argument(
@@ -157,12 +433,16 @@ def run():
     parser.add_argument(
         '-l', '--language', action='append',
         help='Sets languages to filter.',
-        dest='selected_languages',
-        choices=language_codes, metavar="LANGUAGE CODE")
+        dest='selected_languages', type=_language_code,
+        metavar="LANGUAGE CODE")
     parser.add_argument(
         '-f', '--force', action='store_true',
         default=False, help='Replaces existing subtitles.',
         dest='force')
+
+
+def _add_rename_arguments(parser):
+    """ Adds arguments renaming videos with what providers found. """
     parser.add_argument(
         '-r', '--rename', action='store_true',
         default=False,
@@ -179,15 +459,156 @@ def run():
         help='When renaming video replaces blanks with underscores.',
         dest='underscore')
 
-    # Parse the arguments line
-    try:
-        args = parser.parse_args()
-        execute(args)
-    except Exception as error:
-        LOG.exception(error)
-        sys.exit(2)
 
-    sys.exit()
+def _add_common_arguments(parser):
+    """ Adds arguments tuning jobs, providers and diagnostics,
+    shared by all commands. """
+    parser.add_argument(
+        '--workers', action='store', type=int,
+        default=SubtitlesJob.DEFAULT_WORKERS,
+        help='Number of threads opening and hashing video files.',
+        dest='workers', metavar="NUMBER")
+    parser.add_argument(
+        '--scan-workers', action='store', type=int,
+        default=ParallelWalker.DEFAULT_WORKERS,
+        help='Number of threads walking through directories.',
+        dest='scan_workers', metavar="NUMBER")
+    parser.add_argument(
+        '--batch-size', action='store', type=int,
+        default=SubtitlesJob.DEFAULT_BATCH_SIZE,
+        help='Number of videos searched and downloaded together '
+             '(size of search requests of providers by default).',
+        dest='batch_size', metavar="SIZE")
+    parser.add_argument(
+        '--queue-size', action='store', type=int,
+        default=Pipeline.DEFAULT_QUEUE_SIZE,
+        help='Maximum number of videos waiting between two stages.',
+        dest='queue_size', metavar="SIZE")
+    parser.add_argument(
+        '--timeout', action='store', type=float, default=None,
+        help='Seconds allowed to each request sent to providers '
+             '(timeout of each provider by default).',
+        dest='timeout', metavar="SECONDS")
+    parser.add_argument(
+        '--no-io-hints', action='store_false',
+        default=True,
+        help='Reads video files without O_NOATIME and readahead hints.',
+        dest='io_hints')
+
+    parser.add_argument(
+        '--metrics-out', action='store',
+        help='Writes timers and counters of the run as JSON into a file.',
+        dest='metrics_out', metavar="FILE")
+    parser.add_argument(
+        '--profile', action='store',
+        help='Profiles the run with cProfile and writes stats into a file.',
+        dest='profile', metavar="FILE")
+    parser.add_argument(
+        '--profile-mem', action='store_true',
+        default=False,
+        help='Logs memory usage and top allocators at each stage.',
+        dest='profile_mem')
+    parser.add_argument(
+        '--profile-sample', action='store',
+        help='Samples stacks and writes them in collapsed format '
+             'for flame graphs into a file.',
+        dest='profile_sample', metavar="FILE")
+    parser.add_argument(
+        '--profile-interval', action='store', type=float,
+        default=0.005,
+        help='Interval in seconds between two stack samples.',
+        dest='profile_interval', metavar="SECONDS")
+    parser.add_argument(
+        '--log-profile', action='store',
+        choices=sorted(util.LOG_PROFILES), default=None,
+        help='Selects logging configuration (production is quieter).',
+        dest='log_profile')
+    parser.add_argument(
+        '--provider', action='append',
+        help='Selects providers by their code (all providers by default).',
+        dest='providers', metavar="PROVIDER CODE")
+    parser.add_argument(
+        '--cache-dir', action='store',
+        default=DEFAULT_CACHE_DIR,
+        help='Directory of the local store of downloaded subtitles.',
+        dest='cache_dir', metavar="DIRECTORY")
+    parser.add_argument(
+        '--cache-size', action='store', type=int,
+        default=SubtitleStore.DEFAULT_MAX_SIZE // (1024 * 1024),
+        help='Maximum size of the local subtitle store in MiB.',
+        dest='cache_size', metavar="SIZE")
+    parser.add_argument(
+        '--no-cache', action='store_const', const=None,
+        help='Disables the local subtitle store.',
+        dest='cache_dir')
+
+
+def _make_parser():
+    """ Makes the parser of arguments of the main command. """
+    # create the arguments parser
+    parser = argparse.ArgumentParser(
+        description=(
+            "SubLime is a command-line program for searching "
+            "and downloading the right subtitles for movies."
+        ),
+        epilog=(
+            "Run 'sublime serve' to start a daemon which keeps providers "
+            "connected between runs sent with --daemon, 'sublime plan' "
+            "and 'sublime apply' to run the work on files and the network "
+            "work separately."
+        ),
+        prog='sublime')
+
+    sublime_version = '%(prog)s ' + sublime.__version__
+
+    parser.add_argument(
+        '--version', action='version',
+        version=sublime_version)
+
+    _add_selection_arguments(parser)
+    _add_rename_arguments(parser)
+
+    parser.add_argument(
+        '--job-db', action='store',
+        help='Records progress of the run into a database, '
+             'so that it resumes where a previous run stopped.',
+        dest='job_db', metavar="FILE")
+    parser.add_argument(
+        '--shard', action='store', type=_shard,
+        help='Only processes shard i of N of the videos, split by hash code '
+             '(i from 1 to N).',
+        dest='shard', metavar="i/N")
+    parser.add_argument(
+        '--deadline', action='store', type=float,
+        help='Stops sending requests to providers after a number '
+             'of seconds.',
+        dest='deadline', metavar="SECONDS")
+
+    _add_common_arguments(parser)
+    parser.add_argument(
+        '--daemon', action='store_true',
+        default=False,
+        help='Sends the job to the SubLime daemon started by '
+             "'sublime serve', which uses its own providers, store and "
+             'tuning options.',
+        dest='daemon')
+    parser.add_argument(
+        '--socket', action='store',
+        help='Sends the job to the SubLime daemon listening on a socket '
+             '(default: ${} or {}).'.format(
+                 SOCKET_ENVIRONMENT_VARIABLE, default_socket_path()),
+        dest='socket', metavar="FILE")
+
+    return parser
+
+
+def run():
+    """ Main command-line execution loop. """
+    commands = {'serve': serve, 'plan': plan, 'apply': apply}
+    if sys.argv[1:2] and sys.argv[1] in commands:
+        return commands[sys.argv[1]](sys.argv[2:])
+
+    _run_command(_make_parser(), sys.argv[1:], execute_or_forward)
 
 
 # EOF
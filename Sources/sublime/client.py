@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : client.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import json
+import socket
+
+# Environment variable giving the socket of a running daemon
+SOCKET_ENVIRONMENT_VARIABLE = "SUBLIME_SOCKET"
+
+
+def default_socket_path():
+    """ Returns default path of the daemon socket
+    (one daemon by user). """
+    directory = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    user_id = os.getuid() if hasattr(os, 'getuid') else 0
+
+    return os.path.join(directory, "sublime-{}.sock".format(user_id))
+
+
+# -----------------------------------------------------------------------------
+#
+# DaemonClient class
+#
+# -----------------------------------------------------------------------------
+class DaemonClient(object):
+
+    """ Thin client of a SubLime daemon.
+
+    Requests and responses are JSON objects, one by line, on a Unix
+    domain socket. A request has a command (run, ping, stats, shutdown)
+    and its parameters, a response has a status (ok or error). """
+
+    def __init__(self, socket_path=None, timeout=None):
+        """ Initializes instance. """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def request(self, command, **params):
+        """ Sends a request to the daemon and returns its response,
+        raises a DaemonError if the daemon returned an error. """
+        params['command'] = command
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+
+            with sock.makefile('rwb') as stream:
+                stream.write(json.dumps(params).encode('utf-8') + b'\n')
+                stream.flush()
+                line = stream.readline()
+
+        if not line:
+            raise DaemonError(
+                "The daemon closed the connection without response.")
+
+        response = json.loads(line.decode('utf-8'))
+        if response.get('status') != 'ok':
+            raise DaemonError(response.get('message', "Unknown error"))
+
+        return response
+
+    def run(self, video_files=None, directories=None, **options):
+        """ Asks the daemon for subtitles of video files
+        and of video files found in directories. """
+        return self.request(
+            'run',
+            video_files=[os.path.abspath(path) for path in video_files or []],
+            directories=[os.path.abspath(path) for path in directories or []],
+            **options)
+
+    def ping(self):
+        """ Checks that the daemon is running. """
+        return self.request('ping')
+
+    def stats(self):
+        """ Returns timers and counters of the daemon, which add up
+        all its jobs (not only those of this client). """
+        return self.request('stats')['metrics']
+
+    def shutdown(self):
+        """ Stops the daemon. """
+        return self.request('shutdown')
+
+    def __repr__(self):
+        return "<DaemonClient('{}')>".format(self.socket_path)
+
+
+# -----------------------------------------------------------------------------
+#
+# Exceptions
+#
+# -----------------------------------------------------------------------------
+class DaemonError(Exception):
+
+    """ Exception raised when the daemon returns an error. """
+
+
+# EOF
@@ -14,22 +14,109 @@
 import logging
 import os
 import shutil
-import guessit
-import enzyme
 import glob
 import uuid
-
-from babelfish import Language
-from babelfish import Error as BabelfishError
-from babelfish.exceptions import LanguageConvertError
+import tempfile
+import itertools
+import threading
 
 from sublime.file import FileMagic
+from sublime.fileio import VideoFile
+from sublime.metrics import METRICS
+from sublime.util import set_file_mode
 from sublime.file import FileMagicError
+from sublime.languages import file_code
+from sublime.languages import from_name
+from sublime.languages import from_alpha3b
 
 # Logger
 LOG = logging.getLogger("sublime.core")
 
 
+# -----------------------------------------------------------------------------
+#
+# LanguageSet class
+#
+# -----------------------------------------------------------------------------
+class LanguageSet(object):
+
+    """ Set of languages of a video stored as a bitset in the video.
+
+    Each language gets a bit the first time it is used. A LanguageSet
+    is a view which reads and writes bits of its video, it behaves like
+    the list of languages it replaces (ordered by bit). """
+
+    __slots__ = ('_video',)
+
+    # Registry of languages shared by all bitsets
+    LANGUAGES = []
+    BITS = {}
+    _LOCK = threading.Lock()
+
+    def __init__(self, video):
+        """ Initializes instance. """
+        self._video = video
+
+    @staticmethod
+    def bit(language):
+        """ Gets the bit of a language. """
+        bit = LanguageSet.BITS.get(language)
+
+        if bit is None:
+            with LanguageSet._LOCK:
+                bit = LanguageSet.BITS.setdefault(
+                    language, 1 << len(LanguageSet.LANGUAGES))
+                if bit == 1 << len(LanguageSet.LANGUAGES):
+                    LanguageSet.LANGUAGES.append(language)
+
+        return bit
+
+    @staticmethod
+    def to_bits(languages):
+        """ Gets the bitset of languages. """
+        bits = 0
+        for language in languages:
+            bits |= LanguageSet.bit(language)
+
+        return bits
+
+    @staticmethod
+    def from_bits(bits):
+        """ Gets the list of languages of a bitset. """
+        return [
+            language for index, language in enumerate(LanguageSet.LANGUAGES)
+            if bits >> index & 1
+        ]
+
+    def append(self, language):
+        self._video._languages |= LanguageSet.bit(language)
+
+    def extend(self, languages):
+        self._video._languages |= LanguageSet.to_bits(languages)
+
+    def remove(self, language):
+        bit = LanguageSet.bit(language)
+        if not self._video._languages & bit:
+            raise ValueError("{} is not in languages".format(language))
+        self._video._languages &= ~bit
+
+    def __contains__(self, language):
+        bit = LanguageSet.BITS.get(language)
+        return bit is not None and bool(self._video._languages & bit)
+
+    def __iter__(self):
+        return iter(LanguageSet.from_bits(self._video._languages))
+
+    def __len__(self):
+        return bin(self._video._languages).count("1")
+
+    def __eq__(self, other):
+        return self._video._languages == LanguageSet.to_bits(other)
+
+    def __repr__(self):
+        return repr(LanguageSet.from_bits(self._video._languages))
+
+
 # -----------------------------------------------------------------------------
 #
 # Video class
@@ -39,6 +126,13 @@ class Video(object):
 
     """ Video class. """
 
+    __slots__ = (
+        'id', 'filename', 'size', 'signature', 'inode', 'hashes',
+        'embedded_languages', '_languages')
+
+    # Unique ids of videos
+    _ids = itertools.count(1)
+
     # List of video extensions
     EXTENSIONS = (
         '.3g2', '.3gp', '.3gp2', '.3gpp', '.60d', '.ajp', '.asf',
@@ -56,19 +150,31 @@ class Video(object):
 
     UNDERSCORE = True
 
-    # FileMagic to determine file type
-    FILE_MAGIC = FileMagic(EXTENSIONS)
-
-    def __init__(self, video_filepath):
+    def __init__(self, video_filepath, size=None):
         """ Initializes instance. """
-        self.id = uuid.uuid4()
+        self.id = next(Video._ids)
         self.filename = os.path.abspath(video_filepath)
-        self.size = str(os.path.getsize(self.filename))
+        if size is None:
+            size = os.path.getsize(self.filename)
+        self.size = size
         self.signature = None
-        self.languages_to_download = []
+        self.inode = None
+        self.hashes = None
+        self.embedded_languages = None
+        self._languages = 0
 
-    def rename(self):
-        """ Rename movie to a cleaner name. """
+    @property
+    def languages_to_download(self):
+        """ Languages of subtitles to download for this video. """
+        return LanguageSet(self)
+
+    @languages_to_download.setter
+    def languages_to_download(self, languages):
+        self._languages = LanguageSet.to_bits(languages)
+
+    def rename(self, pattern=None, underscore=None):
+        """ Rename movie to a cleaner name, with a pattern and replacing
+        blanks with underscores or not (class defaults if not given). """
         raise NotImplementedError("Please Implement this method")
 
     def _move(self, new_name):
@@ -78,11 +184,17 @@ class Video(object):
 
         new_filename = os.path.join(dir_name, new_name + extension)
 
+        # Another file (an identical video...) may have this name already
+        if new_filename != self.filename and os.path.exists(new_filename):
+            LOG.error(
+                "Cannot rename the file %s: %s already exists.",
+                self.filename, new_filename)
+            return
+
         try:
             shutil.move(self.filename, new_filename)
         except Exception as error:
-            LOG.error(
-                "Cannot rename the file {}: {}".format(self.filename, error))
+            LOG.error("Cannot rename the file %s: %s", self.filename, error)
         else:
             self.filename = new_filename
 
@@ -93,38 +205,20 @@ class Video(object):
 
         # Look for embedded subtitle in mkv video
         if Video.is_mkv(self.signature):
-            with open(self.filename, 'rb') as file_handler:
-                mkv_video = enzyme.MKV(file_handler)
-
-            for sub in mkv_video.subtitle_tracks:
-                try:
-                    if sub.language and \
-                            Language.fromalpha3b(sub.language) == language:
-                        has_subtitle = True
-                        break
-                    elif sub.name and \
-                            Language.fromname(sub.name) == language:
-                        has_subtitle = True
-                        break
-                except BabelfishError:
-                    LOG.error(
-                        "Embedded subtitle track"
-                        "language {} is not a valid language"
-                        .format(sub.language))
+            if self.embedded_languages is None:
+                with VideoFile(self.filename) as video_file:
+                    self.probe_embedded_languages(video_file)
+
+            has_subtitle = bool(
+                self.embedded_languages & LanguageSet.bit(language))
 
         # Look for external subtitle
         dir_name = os.path.dirname(self.filename)
         base_name, _ = os.path.splitext(os.path.basename(self.filename))
 
-        # Select the most appropriate language code (alpha2)
-        language_code = language.alpha3
-        try:
-            language_code = language.alpha2
-        except LanguageConvertError:
-            pass
-
         search_subtitle = os.path.join(
-            dir_name, "{}.{}.*".format(base_name, language_code))
+            dir_name, "{}.{}.*".format(
+                base_name, file_code(language)))
         existing_subtitles = [
             sub_file for sub_file in glob.glob(search_subtitle)
             if os.path.splitext(sub_file)[1] in Subtitle.EXTENSIONS
@@ -135,22 +229,56 @@ class Video(object):
 
         return has_subtitle
 
+    def probe_embedded_languages(self, video_file):
+        """ Reads languages of subtitle tracks embedded in a mkv video
+        from an opened VideoFile. """
+        import enzyme
+
+        self.embedded_languages = 0
+
+        with METRICS.timer('mkv_probe'):
+            mkv_video = enzyme.MKV(video_file.open())
+
+        for sub in mkv_video.subtitle_tracks:
+            if sub.language:
+                language = from_alpha3b(sub.language)
+                if language is not None:
+                    self.embedded_languages |= LanguageSet.bit(language)
+                else:
+                    LOG.error(
+                        "Embedded subtitle track "
+                        "language %s is not a valid language", sub.language)
+
+            if sub.name:
+                language = from_name(sub.name)
+                if language is not None:
+                    self.embedded_languages |= LanguageSet.bit(language)
+
+    @staticmethod
+    def get_file_magic():
+        """ Gets FileMagic to determine file type,
+        loading file signatures the first time. """
+        return FileMagic(Video.EXTENSIONS)
+
     @staticmethod
     def get_video_signature(video_filepath):
         """ Gets video file signature
             if a file given by its filepath is a video. """
-        return Video.FILE_MAGIC.get_video_signature(video_filepath)
+        return Video.get_file_magic().get_video_signature(video_filepath)
 
     @staticmethod
     def is_mkv(file_signature):
         """ Determines if a file signature is a MKV. """
-        return Video.FILE_MAGIC.is_mkv(file_signature)
+        return Video.get_file_magic().is_mkv(file_signature)
 
     def __eq__(self, other):
         return self.id == other.id
 
+    def __hash__(self):
+        return hash(self.id)
+
     def __repr__(self):
-        return "<Video('{}', '{}', '{}', '{}')>".format(
+        return "<Video('{}', '{}', '{}')>".format(
             self.filename, self.id, self.size)
 
 
@@ -163,17 +291,19 @@ class Movie(Video):
 
     """ Movie class. """
 
-    def __init__(self, video_filepath):
+    __slots__ = ('name',)
+
+    def __init__(self, video_filepath, size=None):
         """ Initializes instance. """
-        Video.__init__(self, video_filepath)
+        Video.__init__(self, video_filepath, size)
 
         self.name = "UNKNOWN MOVIE"
 
-    def rename(self):
+    def rename(self, pattern=None, underscore=None):
         """ Rename movie to a cleaner name. """
         new_name = "{}".format(self.name)
 
-        if Video.UNDERSCORE:
+        if Video.UNDERSCORE if underscore is None else underscore:
             new_name = new_name.replace(" ", "_")
 
         Video._move(self, new_name)
@@ -193,27 +323,29 @@ class Episode(Video):
 
     """ Episode class. """
 
+    __slots__ = ('name', 'season', 'episode', 'episode_name')
+
     RENAME_PATTERN = "{serie_name} S{season:02d}E{episode:02d} {episode_name}"
 
-    def __init__(self, video_filepath):
+    def __init__(self, video_filepath, size=None):
         """ Initializes instance. """
-        Video.__init__(self, video_filepath)
+        Video.__init__(self, video_filepath, size)
 
         self.name = "UNKNOWN SERIE"
         self.season = 0
         self.episode = 0
         self.episode_name = "UNKNOWN EPISODE"
 
-    def rename(self):
+    def rename(self, pattern=None, underscore=None):
         """ Rename movie to a cleaner name. """
-        new_name = Episode.RENAME_PATTERN.format(
+        new_name = (pattern or Episode.RENAME_PATTERN).format(
             serie_name=self.name,
             season=self.season,
             episode=self.episode,
             episode_name=self.episode_name
         )
 
-        if Video.UNDERSCORE:
+        if Video.UNDERSCORE if underscore is None else underscore:
             new_name = new_name.replace(" ", "_")
 
         Video._move(self, new_name)
@@ -225,6 +357,10 @@ class Episode(Video):
             self.name, self.season, self.episode, self.episode_name)
 
 
+# Types of videos, from the least to the most precise
+VIDEO_TYPES = (Video, Movie, Episode)
+
+
 # -----------------------------------------------------------------------------
 #
 # NamePattern class as Context Manager
@@ -232,7 +368,10 @@ class Episode(Video):
 # -----------------------------------------------------------------------------
 class NamePattern(object):
 
-    """ Pattern context manager used for renaming video files. """
+    """ Pattern context manager used for renaming video files.
+
+    It changes the defaults of the whole process: concurrent jobs give
+    their pattern to Video.rename instead. """
 
     def __init__(self, pattern=None, underscore=True):
         self.default_pattern = Episode.RENAME_PATTERN
@@ -262,33 +401,73 @@ class VideoFactory(object):
     """ VideoFactory class which creates Video instances. """
 
     @staticmethod
-    def make_from_filename(video_filepath):
+    def make_from_filename(video_filepath, hashing=None):
         """ Returns a Movie or an Episode instance if it is possible,
-        else returns a Video instance or None. """
+        else returns a Video instance or None.
+
+        The file is opened and stat'ed once: its header, embedded subtitle
+        tracks and hash codes (computed by hashing, a HashingService)
+        are all read from it. """
         video = None
 
-        if os.path.exists(video_filepath):
-            try:
-                video_signature = Video.get_video_signature(video_filepath)
+        # Files which are not videos are never opened
+        if not Video.get_file_magic().is_video_extension(video_filepath):
+            return video
 
-                if video_signature:
+        try:
+            video_file = VideoFile(video_filepath)
+        except OSError as error:
+            LOG.error("Cannot open %s: %s", video_filepath, error)
+            return video
+
+        with video_file:
+            video = VideoFactory.make_from_file(video_file)
+
+            if video and hashing:
+                video.hashes = hashing.compute(video_file)
+
+        return video
+
+    @staticmethod
+    def make_from_file(video_file):
+        """ Returns a Movie or an Episode instance if it is possible,
+        else returns a Video instance or None, from an opened VideoFile. """
+        video = None
+        video_filepath = video_file.filepath
+        file_magic = Video.get_file_magic()
+
+        try:
+            with METRICS.timer('signature'):
+                video_file.will_need((0, file_magic.header_size))
+                video_signature = file_magic.get_video_signature(
+                    video_filepath,
+                    video_file.pread(file_magic.header_size, 0))
+
+            if video_signature:
+                import guessit
+
+                with METRICS.timer('guessit'):
                     guess = guessit.guess_movie_info(
                         video_filepath, info=['filename'])
-                    if guess['type'] == 'movie':
-                        video = Movie(video_filepath)
-                    elif guess['type'] == 'episode':
-                        video = Episode(video_filepath)
-                    else:
-                        video = Video(video_filepath)
-
-                    video.signature = video_signature
-            except FileMagicError:
-                LOG.warning(
-                    "This file was not recognized as a video file: {}".format(
-                        video_filepath))
-        else:
-            LOG.error(
-                "The following doesn't exists: {}".format(video_filepath))
+                METRICS.incr('videos')
+
+                if guess['type'] == 'movie':
+                    video_type = Movie
+                elif guess['type'] == 'episode':
+                    video_type = Episode
+                else:
+                    video_type = Video
+
+                video = video_type(video_filepath, video_file.size)
+                video.signature = video_signature
+                video.inode = video_file.inode
+
+                if Video.is_mkv(video_signature):
+                    video.probe_embedded_languages(video_file)
+        except FileMagicError:
+            LOG.warning(
+                "This file was not recognized as a video file: %s",
+                video_filepath)
 
         return video
 
@@ -297,9 +476,13 @@ class VideoFactory(object):
         """ Transforms a video into a Movie or Episode
         depending on video_type. """
         if not isinstance(video, (Movie, Episode)):
-            new_video = video_type(video.filename)
+            new_video = video_type(video.filename, video.size)
+            new_video.id = video.id
             new_video.signature = video.signature
-            new_video.languages_to_download = video.languages_to_download
+            new_video.inode = video.inode
+            new_video.hashes = video.hashes
+            new_video.embedded_languages = video.embedded_languages
+            new_video._languages = video._languages
         else:
             new_video = video
 
@@ -323,51 +506,167 @@ class Subtitle(object):
         ".ass", ".usf", ".txt"
     )
 
-    def __init__(self, unique_id, language, video, rating=0, extension=None):
+    __slots__ = (
+        'id', 'language', 'video', 'rating', 'extension', 'download_count',
+        '_filepath')
+
+    def __init__(
+            self, unique_id, language, video, rating=0, extension=None,
+            download_count=0):
         """ Initializes instance. """
         self.id = unique_id
         self.language = language
         self.video = video
         self.rating = rating
         self.extension = extension
+        self.download_count = download_count
+        # Filepath and the video filename it was computed from
+        self._filepath = None
 
     @property
     def filepath(self):
-        """ Get filepath of subtitle file we want to write. """
-        dir_name = os.path.dirname(self.video.filename)
-        base_name, _ = os.path.splitext(os.path.basename(self.video.filename))
+        """ Get filepath of subtitle file we want to write.
+        It is computed again only if the video was renamed or changed. """
+        video_filename = self.video.filename
 
-        # Select the most appropriate language code (alpha2)
-        language_code = self.language.alpha3
-        try:
-            language_code = self.language.alpha2
-        except LanguageConvertError:
-            pass
+        if self._filepath is None or self._filepath[0] != video_filename:
+            dir_name, video_name = os.path.split(video_filename)
+            base_name, _ = os.path.splitext(video_name)
 
-        filename = "{}.{}.{}".format(
-            base_name, language_code, self.extension)
+            # Select the most appropriate language code (alpha2)
+            filename = "{}.{}.{}".format(
+                base_name, file_code(self.language),
+                self.extension)
 
-        return os.path.join(dir_name, filename)
+            self._filepath = (
+                video_filename, os.path.join(dir_name, filename))
+
+        return self._filepath[1]
 
     def write(self, data):
-        """ Writes Subtitle on disk. """
-        with open(self.filepath, 'wb') as out_file:
-            out_file.write(data)
+        """ Writes Subtitle on disk.
 
-    def __eq__(self, other):
-        return (self.language == other.language and self.video == other.video)
+        Data can be bytes or an iterable of bytes chunks. Chunks are written
+        into a temporary file of the target directory which is renamed
+        once complete, so a subtitle file is never left truncated. """
+        if isinstance(data, (bytes, bytearray)):
+            data = [data]
+
+        filepath = self.filepath
+        dir_name, base_name = os.path.split(filepath)
+
+        with METRICS.timer('write'):
+            out_file = tempfile.NamedTemporaryFile(
+                dir=dir_name, prefix=".{}.".format(base_name),
+                suffix=".part", delete=False)
+            try:
+                with out_file:
+                    for chunk in data:
+                        out_file.write(chunk)
+                        METRICS.incr('bytes_written', len(chunk))
+                set_file_mode(out_file.name)
+                os.replace(out_file.name, filepath)
+            except BaseException:
+                os.remove(out_file.name)
+                raise
+
+        METRICS.incr('subtitles_written')
+
+        return filepath
+
+    def link_to(self, video):
+        """ Shares this subtitle file with another video. A hard link is
+        used when both are on the same filesystem, else it is copied. """
+        subtitle = Subtitle(
+            self.id, self.language, video,
+            self.rating, self.extension, self.download_count)
+        filepath = subtitle.filepath
+        dir_name, base_name = os.path.split(filepath)
+        tmp_filepath = os.path.join(
+            dir_name, ".{}.{}.part".format(base_name, uuid.uuid4().hex))
+
+        try:
+            os.link(self.filepath, tmp_filepath)
+        except OSError:
+            shutil.copyfile(self.filepath, tmp_filepath)
+
+        try:
+            os.replace(tmp_filepath, filepath)
+        except BaseException:
+            os.remove(tmp_filepath)
+            raise
 
-    def __lt__(self, other):
-        return (self == other and self.rating < other.rating)
+        return subtitle
 
-    def __gt__(self, other):
-        return (self == other and self.rating > other.rating)
+    def __eq__(self, other):
+        return (self.language == other.language and self.video == other.video)
 
     def __repr__(self):
         return "<Subtitle('{}', '{}', '{}', '{}')>".format(
             self.id, self.language.alpha3, self.rating, self.extension)
 
 
+# -----------------------------------------------------------------------------
+#
+# SubtitleSelector class
+#
+# -----------------------------------------------------------------------------
+class SubtitleSelector(object):
+
+    """ SubtitleSelector keeps the best subtitle per video and language.
+
+    Subtitles are compared with a list of scorers: functions which take
+    a subtitle and return a comparable score. The first scorer wins,
+    next ones are only used to break ties. """
+
+    def __init__(self, scorers=None):
+        """ Initializes instance. """
+        if scorers is None:
+            scorers = (SubtitleSelector.rating, SubtitleSelector.downloads)
+
+        self.scorers = tuple(scorers)
+
+    def score(self, subtitle):
+        """ Returns the score of a subtitle. """
+        return tuple(scorer(subtitle) for scorer in self.scorers)
+
+    def select(self, subtitles):
+        """ Returns the best subtitle for each video and language
+        in one pass over subtitles. """
+        best_subtitles = {}
+
+        for subtitle in subtitles:
+            key = (subtitle.video.id, subtitle.language)
+            score = self.score(subtitle)
+            best = best_subtitles.get(key)
+
+            if best is None or score > best[0]:
+                best_subtitles[key] = (score, subtitle)
+
+        return [subtitle for _, subtitle in best_subtitles.values()]
+
+    @staticmethod
+    def rating(subtitle):
+        """ Scores a subtitle with its rating. """
+        return subtitle.rating
+
+    @staticmethod
+    def downloads(subtitle):
+        """ Scores a subtitle with its download count. """
+        return subtitle.download_count
+
+    @staticmethod
+    def format_preference(extensions):
+        """ Returns a scorer which prefers subtitle formats
+        in the order given by extensions. """
+        ranks = {
+            extension: len(extensions) - rank
+            for rank, extension in enumerate(extensions)
+        }
+
+        return lambda subtitle: ranks.get(subtitle.extension, 0)
+
+
 # -----------------------------------------------------------------------------
 #
 # Exceptions
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : daemon.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import socketserver
+
+import sublime
+
+from sublime.core import Video
+from sublime.client import default_socket_path
+from sublime.hedging import Deadline
+from sublime.jobs import JobQueue
+from sublime.jobs import Shard
+from sublime.languages import LanguageTables
+from sublime.metrics import METRICS
+from sublime.pipeline import Pipeline
+from sublime.pipeline import SubtitlesJob
+from sublime.walk import ParallelWalker
+
+# Logger
+LOG = logging.getLogger("sublime.daemon")
+
+
+# -----------------------------------------------------------------------------
+#
+# RequestHandler class
+#
+# -----------------------------------------------------------------------------
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    """ Answers JSON requests of a client, one by line. """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                response = self.server.dispatch(request)
+            except Exception as error:
+                LOG.exception(error)
+                response = {'status': 'error', 'message': str(error)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+# -----------------------------------------------------------------------------
+#
+# Daemon class
+#
+# -----------------------------------------------------------------------------
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    """ Long-running SubLime which runs jobs sent by clients
+    on a Unix domain socket.
+
+    Modules, file signatures and the subtitle store are loaded once,
+    and providers stay connected between jobs: they are only connected
+    again after being idle for longer than a session lasts. Jobs
+    are run concurrently, calls to a provider are serialized. """
+
+    daemon_threads = True
+
+    # Seconds after which an idle provider session is renewed
+    SESSION_TIMEOUT = 10 * 60
+
+    def __init__(
+            self, providers, socket_path=None, store=None,
+            workers=SubtitlesJob.DEFAULT_WORKERS,
+            batch_size=SubtitlesJob.DEFAULT_BATCH_SIZE,
+            queue_size=Pipeline.DEFAULT_QUEUE_SIZE,
+            scan_workers=ParallelWalker.DEFAULT_WORKERS):
+        """ Initializes instance. """
+        self.providers = providers
+        self.socket_path = socket_path or default_socket_path()
+        self.store = store
+        self.job_options = {
+            'workers': workers,
+            'batch_size': batch_size,
+            'queue_size': queue_size,
+            'scan_workers': scan_workers,
+        }
+        self._last_use = None
+        self._connect_lock = threading.Lock()
+
+        self._remove_stale_socket()
+
+        # Only the user running the daemon can use it
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(
+                self, self.socket_path, RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def _remove_stale_socket(self):
+        """ Removes socket file of a daemon which is not running,
+        raises DaemonRunningError if it is. """
+        if not os.path.exists(self.socket_path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)
+            else:
+                raise DaemonRunningError(self.socket_path)
+
+    def warm_up(self):
+        """ Loads what jobs need and connects to providers. """
+        import guessit  # noqa: F401
+        import enzyme  # noqa: F401
+
+        Video.get_file_magic()
+        LanguageTables.get()
+        self._connect()
+
+    def _connect(self):
+        """ Connects providers which are not connected
+        or whose session may have expired. """
+        with self._connect_lock:
+            expired = self._last_use is not None and \
+                time.monotonic() - self._last_use > self.SESSION_TIMEOUT
+
+            for provider in self.providers:
+                provider.store = self.store
+                if expired and provider.connected:
+                    provider.disconnect()
+                if not provider.connected:
+                    provider.connect()
+
+            self._last_use = time.monotonic()
+
+    def serve(self):
+        """ Serves requests until shutdown. """
+        self.warm_up()
+        LOG.info("SubLime daemon listening on %s", self.socket_path)
+
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        for provider in self.providers:
+            if provider.connected:
+                provider.disconnect()
+
+    def dispatch(self, request):
+        """ Returns response to a request. """
+        command = request.get('command')
+        handler = getattr(self, 'do_{}'.format(command), None)
+
+        if handler is None:
+            return {
+                'status': 'error',
+                'message': "Unknown command: {}".format(command)}
+
+        return handler(request)
+
+    def do_ping(self, request):
+        return {'status': 'ok', 'version': sublime.__version__}
+
+    def do_stats(self, request):
+        """ Returns metrics of the daemon process: counters and timers
+        add up all jobs run since it started, concurrent ones included. """
+        return {'status': 'ok', 'metrics': METRICS.report()}
+
+    def do_shutdown(self, request):
+        # Shutdown waits for serve_forever, which runs in another thread
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+        return {'status': 'ok'}
+
+    def do_run(self, request):
+        """ Runs a job on video files and directories of a request. """
+        import babelfish
+
+        languages = [
+            babelfish.Language(language)
+            for language in request.get('languages') or []]
+        if not languages:
+            return {'status': 'error', 'message': "No language given."}
+
+        shard = None
+        if request.get('shard'):
+            shard = Shard.parse(request['shard'])
+
+        deadline = None
+        if request.get('deadline'):
+            deadline = Deadline(request['deadline'])
+
+        jobs = None
+        if request.get('job_db'):
+            jobs = JobQueue(request['job_db'])
+
+        job = SubtitlesJob(
+            self.providers, languages,
+            force=request.get('force', False),
+            rename=request.get('rename', False),
+            rename_pattern=request.get('rename_pattern'),
+            underscore=request.get('underscore', False),
+            jobs=jobs, shard=shard, deadline=deadline,
+            **self.job_options)
+
+        start = time.perf_counter()
+        try:
+            self._connect()
+            job.run(request.get('video_files'), request.get('directories'))
+        finally:
+            if jobs is not None:
+                jobs.close()
+
+        with self._connect_lock:
+            self._last_use = time.monotonic()
+
+        return {
+            'status': 'ok',
+            'videos': job.videos,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def __repr__(self):
+        return "<Daemon('{}')>".format(self.socket_path)
+
+
+# -----------------------------------------------------------------------------
+#
+# Exceptions
+#
+# -----------------------------------------------------------------------------
+class DaemonRunningError(Exception):
+
+    """ Exception raised when a daemon is already running. """
+
+    def __init__(self, socket_path):
+        """ Initializes instance. """
+        Exception.__init__(self)
+        self.socket_path = socket_path
+
+    def __str__(self):
+        return "A SubLime daemon is already running on {}.".format(
+            self.socket_path)
+
+
+# EOF
@@ -16,6 +16,7 @@ import csv
 import logging
 
 from sublime import util
+from sublime.fileio import VideoFile
 
 # Logger
 LOG = logging.getLogger(__name__)
@@ -110,9 +111,22 @@ class FileMagic:
                 int(figure, 16) for figure in "1A 45 DF A3 93 42 82 88".split()
             )
 
-        def get_video_signature(self, filepath):
+        @property
+        def header_size(self):
+            """ Number of bytes of file header needed to find
+            its signature. """
+            return self._max_nb_bytes
+
+        def is_video_extension(self, filepath):
+            """ Determines if a file has a video extension. """
+            _, ext = os.path.splitext(filepath)
+
+            return ext in self._video_extensions
+
+        def get_video_signature(self, filepath, header=None):
             """ Gets video file signature
-            if a file given by its filepath is a video. """
+            if a file given by its filepath is a video.
+            File header is read from the file if it isn't given. """
             recognized = False
             file_signature = None
 
@@ -122,10 +136,11 @@ class FileMagic:
 
                 all_magic_numbers = self._magic_numbers.keys()
 
-                with open(filepath, 'rb') as file_handler:
-                    header = tuple(
-                        int(o) for o in file_handler.read(self._max_nb_bytes)
-                    )
+                if header is None:
+                    with VideoFile(filepath) as video_file:
+                        header = video_file.pread(self._max_nb_bytes, 0)
+
+                header = tuple(header[:self._max_nb_bytes])
 
                 for magic in all_magic_numbers:
                     if header[:len(magic)] == magic:
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : fileio.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import io
+import os
+import stat
+import errno
+import contextlib
+
+from sublime.metrics import METRICS
+
+
+# -----------------------------------------------------------------------------
+#
+# VideoFile class
+#
+# -----------------------------------------------------------------------------
+class VideoFile(object):
+
+    """ Video file opened once and stat'ed once.
+
+    All reads (header, container probe, hash blocks) are served
+    from a single file descriptor with os.pread, so they don't depend
+    on a shared file position.
+
+    With I/O hints, the file is opened without updating its access time
+    when permitted, kernel readahead is disabled (only small blocks
+    of large files are read), wanted ranges are announced before being
+    read and read ranges are dropped from the page cache on close. """
+
+    # Default use of I/O hints, can be disabled to compare throughput
+    IO_HINTS = True
+
+    def __init__(self, filepath, io_hints=None):
+        """ Initializes instance. """
+        self.filepath = filepath
+        self.io_hints = VideoFile.IO_HINTS if io_hints is None else io_hints
+        self.fd = None
+        self._read_ranges = []
+
+        flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+        if self.io_hints and hasattr(os, 'O_NOATIME'):
+            try:
+                self.fd = os.open(filepath, flags | os.O_NOATIME)
+            except PermissionError:
+                # Only owner of the file can open it with O_NOATIME
+                pass
+        if self.fd is None:
+            self.fd = os.open(filepath, flags)
+
+        try:
+            self.stat = os.fstat(self.fd)
+            # Directories can be opened, but not read
+            if stat.S_ISDIR(self.stat.st_mode):
+                raise IsADirectoryError(
+                    errno.EISDIR, os.strerror(errno.EISDIR), filepath)
+        except OSError:
+            os.close(self.fd)
+            # Not closed again when the instance is deleted
+            self.fd = None
+            raise
+
+        self.size = self.stat.st_size
+        self.inode = (self.stat.st_dev, self.stat.st_ino)
+
+        self._advise(0, 0, 'POSIX_FADV_RANDOM')
+
+    def will_need(self, *ranges):
+        """ Announces (offset, length) ranges which are going
+        to be read, so that they are read ahead all together. """
+        for offset, length in ranges:
+            self._advise(offset, length, 'POSIX_FADV_WILLNEED')
+
+    def sequential(self):
+        """ Announces that the whole file is going to be read
+        sequentially. """
+        self._advise(0, 0, 'POSIX_FADV_SEQUENTIAL')
+
+    def pread(self, size, offset):
+        """ Reads size bytes at offset. """
+        data = os.pread(self.fd, size, offset)
+        METRICS.incr('bytes_read', len(data))
+
+        if self.io_hints and data:
+            # Contiguous reads are merged into one range
+            if self._read_ranges and \
+                    sum(self._read_ranges[-1]) == offset:
+                last_offset, last_length = self._read_ranges[-1]
+                self._read_ranges[-1] = (last_offset, last_length + len(data))
+            else:
+                self._read_ranges.append((offset, len(data)))
+
+        return data
+
+    def _advise(self, offset, length, advice):
+        """ Gives an advice about a range of the file to the kernel. """
+        if self.io_hints and hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(
+                    self.fd, offset, length, getattr(os, advice))
+            except OSError:
+                pass
+
+    def open(self):
+        """ Returns a file object reading from this video file,
+        for libraries which need one. """
+        return io.BufferedReader(VideoFileReader(self))
+
+    def close(self):
+        """ Closes file descriptor. """
+        if self.fd is not None:
+            for offset, length in self._read_ranges:
+                self._advise(offset, length, 'POSIX_FADV_DONTNEED')
+            self._read_ranges = []
+
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __del__(self):
+        if getattr(self, 'fd', None) is not None:
+            self.close()
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<VideoFile('{}', '{}')>".format(self.filepath, self.size)
+
+
+# -----------------------------------------------------------------------------
+#
+# VideoFileReader class
+#
+# -----------------------------------------------------------------------------
+class VideoFileReader(io.RawIOBase):
+
+    """ Raw file object on a VideoFile with its own position. """
+
+    def __init__(self, video_file):
+        """ Initializes instance. """
+        io.RawIOBase.__init__(self)
+        self._video_file = video_file
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._video_file.pread(len(buffer), self._position)
+        buffer[:len(data)] = data
+        self._position += len(data)
+
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._video_file.size
+        self._position = max(0, offset)
+
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+# -----------------------------------------------------------------------------
+#
+# Module methods
+#
+# -----------------------------------------------------------------------------
+@contextlib.contextmanager
+def open_video_file(video):
+    """ Context manager giving a VideoFile from a filepath
+    or an already opened VideoFile (which is not closed). """
+    if isinstance(video, VideoFile):
+        yield video
+    else:
+        with VideoFile(video) as video_file:
+            yield video_file
+
+
+# EOF
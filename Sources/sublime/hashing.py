@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : hashing.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import struct
+import hashlib
+import logging
+
+from sublime.core import VideoError
+from sublime.core import VideoSizeError
+from sublime.core import VideoHashCodeError
+from sublime.fileio import open_video_file
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.hashing")
+
+# Size of first and last blocks read by block algorithms
+BLOCK_SIZE = 64 * 1024
+
+# Size of chunks read by stream algorithms
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+# -----------------------------------------------------------------------------
+#
+# HashAlgorithm class
+#
+# -----------------------------------------------------------------------------
+class HashAlgorithm(object):
+
+    """ Hash algorithm identifying a video file.
+
+    Block algorithms only need the first and the last blocks of a file,
+    stream algorithms (STREAM is True) need all of its content. """
+
+    NAME = None
+    STREAM = False
+
+    def digest(self, video_file, head, tail):
+        """ Returns hash code of a video file from its first
+        and last blocks. """
+        raise NotImplementedError("Please Implement this method")
+
+    def new(self):
+        """ Returns a hash object updated with the whole content
+        of a file (stream algorithms only). """
+        raise NotImplementedError("Please Implement this method")
+
+    def __repr__(self):
+        return "<{}('{}')>".format(self.__class__.__name__, self.NAME)
+
+
+# -----------------------------------------------------------------------------
+#
+# OpenSubtitlesHash class
+#
+# -----------------------------------------------------------------------------
+class OpenSubtitlesHash(HashAlgorithm):
+
+    """ Hash used by OpenSubtitles: file size plus the sums of the
+    little-endian 64 bits words of the first and last blocks. """
+
+    NAME = "opensubtitles"
+
+    STRUCT_FORMAT = '<{}q'.format(BLOCK_SIZE // struct.calcsize('q'))
+
+    def digest(self, video_file, head, tail):
+        if video_file.size < BLOCK_SIZE * 2:
+            raise VideoSizeError(video_file.filepath)
+
+        movie_hash = video_file.size
+        movie_hash += sum(struct.unpack(OpenSubtitlesHash.STRUCT_FORMAT, head))
+        movie_hash += sum(struct.unpack(OpenSubtitlesHash.STRUCT_FORMAT, tail))
+        movie_hash = movie_hash & 0xFFFFFFFFFFFFFFFF
+
+        return "%016x" % movie_hash
+
+
+# -----------------------------------------------------------------------------
+#
+# SubDBHash class
+#
+# -----------------------------------------------------------------------------
+class SubDBHash(HashAlgorithm):
+
+    """ Hash used by SubDB: MD5 of the first and last blocks. """
+
+    NAME = "subdb"
+
+    def digest(self, video_file, head, tail):
+        return hashlib.md5(head + tail).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+#
+# FileHash class
+#
+# -----------------------------------------------------------------------------
+class FileHash(HashAlgorithm):
+
+    """ Hash of the whole content of a file with a hashlib algorithm. """
+
+    STREAM = True
+
+    def __init__(self, name):
+        """ Initializes instance. """
+        self.NAME = name
+
+    def new(self):
+        return hashlib.new(self.NAME)
+
+
+# Available algorithms by name
+ALGORITHMS = {
+    algorithm.NAME: algorithm for algorithm in (
+        OpenSubtitlesHash(), SubDBHash(),
+        FileHash('md5'), FileHash('sha1'), FileHash('sha256'))
+}
+
+
+def get_algorithm(name):
+    """ Returns a hash algorithm from its name. """
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise ValueError("Unknown hash algorithm: {}".format(name))
+
+
+def hash_video(video_filepath, name):
+    """ Returns hash code of a video from a filepath or a VideoFile
+    with one algorithm, raises a VideoError if it can't be computed. """
+    filepath = getattr(video_filepath, 'filepath', video_filepath)
+
+    try:
+        with open_video_file(video_filepath) as video_file:
+            digests, errors = HashingService([name])._compute(video_file)
+    except VideoError:
+        raise
+    except Exception as error:
+        raise VideoHashCodeError(filepath, error)
+
+    if name in errors:
+        raise errors[name]
+
+    return digests[name]
+
+
+# -----------------------------------------------------------------------------
+#
+# HashingService class
+#
+# -----------------------------------------------------------------------------
+class HashingService(object):
+
+    """ Computes hash codes of several algorithms with one read of a file:
+    first and last blocks are read once for all block algorithms, and
+    when a stream algorithm is needed the file is read once for all
+    algorithms. """
+
+    def __init__(self, names):
+        """ Initializes instance. """
+        self.algorithms = [get_algorithm(name) for name in sorted(set(names))]
+        self._stream = any(
+            algorithm.STREAM for algorithm in self.algorithms)
+
+    @staticmethod
+    def for_providers(providers):
+        """ Makes a HashingService computing hash codes
+        needed by providers. """
+        return HashingService(
+            provider.HASH_ALGORITHM for provider in providers
+            if getattr(provider, 'HASH_ALGORITHM', None))
+
+    @property
+    def names(self):
+        """ Names of computed algorithms. """
+        return [algorithm.NAME for algorithm in self.algorithms]
+
+    def compute(self, video_file):
+        """ Returns a dictionary of hash codes by algorithm name computed
+        from an opened VideoFile. Hash codes which can't be computed
+        are None and logged. """
+        try:
+            digests, errors = self._compute(video_file)
+        except Exception as error:
+            digests = {}
+            errors = {
+                algorithm.NAME: VideoHashCodeError(video_file.filepath, error)
+                for algorithm in self.algorithms}
+
+        for name, error in errors.items():
+            LOG.warning(error)
+            digests[name] = None
+
+        return digests
+
+    def _compute(self, video_file):
+        """ Returns hash codes and errors by algorithm name. """
+        digests = {}
+        errors = {}
+
+        if not self.algorithms:
+            return digests, errors
+
+        with METRICS.timer('hash'):
+            if self._stream:
+                video_file.sequential()
+                hashers = {
+                    algorithm.NAME: algorithm.new()
+                    for algorithm in self.algorithms if algorithm.STREAM}
+                head, tail = self._read_all(video_file, hashers.values())
+                digests.update(
+                    (name, hasher.hexdigest())
+                    for name, hasher in hashers.items())
+            else:
+                tail_offset = max(0, video_file.size - BLOCK_SIZE)
+                video_file.will_need(
+                    (0, BLOCK_SIZE), (tail_offset, BLOCK_SIZE))
+                head = video_file.pread(BLOCK_SIZE, 0)
+                tail = video_file.pread(BLOCK_SIZE, tail_offset)
+
+            for algorithm in self.algorithms:
+                if algorithm.STREAM:
+                    continue
+
+                try:
+                    digests[algorithm.NAME] = algorithm.digest(
+                        video_file, head, tail)
+                except VideoError as error:
+                    errors[algorithm.NAME] = error
+                except Exception as error:
+                    errors[algorithm.NAME] = VideoHashCodeError(
+                        video_file.filepath, error)
+
+        return digests, errors
+
+    @staticmethod
+    def _read_all(video_file, hashers):
+        """ Updates hashers with the whole content of a file
+        and returns its first and last blocks. """
+        head = b""
+        previous = b""
+        chunk = b""
+        offset = 0
+
+        while offset < video_file.size:
+            previous = chunk
+            chunk = video_file.pread(STREAM_CHUNK_SIZE, offset)
+            if not chunk:
+                break
+
+            for hasher in hashers:
+                hasher.update(chunk)
+
+            if offset == 0:
+                head = chunk[:BLOCK_SIZE]
+            offset += len(chunk)
+
+        if len(chunk) >= BLOCK_SIZE:
+            tail = chunk[-BLOCK_SIZE:]
+        else:
+            tail = (previous + chunk)[-BLOCK_SIZE:]
+
+        return head, tail
+
+    def __repr__(self):
+        return "<HashingService('{}')>".format(", ".join(self.names))
+
+
+# EOF
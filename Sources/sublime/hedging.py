@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : hedging.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import time
+import socket
+import logging
+import threading
+
+# Logger
+LOG = logging.getLogger("sublime.hedging")
+
+
+# -----------------------------------------------------------------------------
+#
+# Deadline class
+#
+# -----------------------------------------------------------------------------
+class Deadline(object):
+
+    """ Point in time after which a run doesn't send any request.
+
+    Requests in progress when it expires fail as soon as their next
+    read times out, so a run never lasts much longer than its deadline. """
+
+    def __init__(self, seconds):
+        """ Initializes instance. """
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        """ Returns seconds left before the deadline. """
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self):
+        """ Is the deadline passed? """
+        return time.monotonic() >= self.expires
+
+    def check(self):
+        """ Raises DeadlineExceeded if the deadline is passed. """
+        if self.expired:
+            raise DeadlineExceeded(self.seconds)
+
+    def __repr__(self):
+        return "<Deadline('{}', '{:.2f}')>".format(
+            self.seconds, self.remaining())
+
+
+# -----------------------------------------------------------------------------
+#
+# Attempt class
+#
+# -----------------------------------------------------------------------------
+class Attempt(object):
+
+    """ Request sent by function(transport, *args) in its own thread.
+
+    A request may be sent again on another transport while an attempt
+    runs (hedged request): the first attempt which succeeds gives the
+    result, the others are cancelled. finished is set by any attempt
+    which ends. Once released, on_release is called with the attempt
+    when it ends: its transport is not used anymore. """
+
+    def __init__(self, function, transport, args, finished,
+                 on_release=None):
+        """ Initializes instance. """
+        self.transport = transport
+        self.done = False
+        self.result = None
+        self.error = None
+        self.latency = None
+        self.payload = 0
+        self.started = time.perf_counter()
+        self.received = getattr(transport, 'bytes_received', 0)
+
+        self._finished = finished
+        self._on_release = on_release
+        self._released = False
+        self._lock = threading.Lock()
+
+        thread = threading.Thread(
+            target=self._run, args=(function, args), name="attempt")
+        thread.daemon = True
+        thread.start()
+
+    def release(self):
+        """ Releases the attempt, which is cancelled if it runs. """
+        with self._lock:
+            self._released = True
+            done = self.done
+
+        if not done:
+            self.transport.cancel()
+        elif self._on_release is not None:
+            self._on_release(self)
+
+    def _run(self, function, args):
+        try:
+            self.result = function(self.transport, *args)
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.latency = time.perf_counter() - self.started
+            self.payload = getattr(
+                self.transport, 'bytes_received', 0) - self.received
+            with self._lock:
+                self.done = True
+                released = self._released
+
+            if released and self._on_release is not None:
+                self._on_release(self)
+            self._finished.set()
+
+    @staticmethod
+    def first(attempts, finished, timeout=None):
+        """ Waits for the first attempt which succeeds and returns it,
+        or the first attempt if all of them failed. Returns None if none
+        succeeded within timeout seconds. """
+        while True:
+            # Cleared first: an attempt ending after the checks sets it
+            finished.clear()
+
+            for attempt in attempts:
+                if attempt.done and attempt.error is None:
+                    return attempt
+
+            if all(attempt.done for attempt in attempts):
+                return attempts[0]
+
+            if not finished.wait(timeout):
+                return None
+
+    def __repr__(self):
+        return "<Attempt('{}', '{}')>".format(self.transport, self.done)
+
+
+# -----------------------------------------------------------------------------
+#
+# Exceptions
+#
+# -----------------------------------------------------------------------------
+class DeadlineExceeded(socket.timeout):
+
+    """ Exception raised when a run goes past its deadline.
+
+    Attributes:
+        seconds -- seconds which were given to the run """
+
+    def __init__(self, seconds):
+        """ Initializes instance. """
+        socket.timeout.__init__(self)
+        self.seconds = seconds
+
+    def __str__(self):
+        return "Deadline of {} seconds exceeded.".format(self.seconds)
+
+
+# EOF
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : jobs.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+# Logger
+LOG = logging.getLogger("sublime.jobs")
+
+
+# -----------------------------------------------------------------------------
+#
+# Shard class
+#
+# -----------------------------------------------------------------------------
+class Shard(object):
+
+    """ Part of a library processed by one node.
+
+    Videos are split by ranges of their hash code, so every node
+    computes the same split without talking to the others, and copies
+    of a video (same hash code) are processed by the same node. Shards
+    are numbered from 1 to count. """
+
+    def __init__(self, number, count):
+        """ Initializes instance. """
+        if count < 1 or not 1 <= number <= count:
+            raise ValueError(
+                "Invalid shard {}/{}: expected 1 <= i <= N.".format(
+                    number, count))
+
+        self.number = number
+        self.count = count
+
+    @staticmethod
+    def parse(text):
+        """ Makes a Shard from its 'i/N' representation. """
+        try:
+            number, count = (int(part) for part in text.split('/'))
+        except ValueError:
+            raise ValueError(
+                "Invalid shard {}: expected i/N.".format(text))
+
+        return Shard(number, count)
+
+    def contains(self, key):
+        """ Is a video identified by a key (its hash code)
+        in this shard? """
+        # Hash codes are rehashed: some of them are not uniform
+        # (OpenSubtitles hash codes of small files start with zeros)
+        value = int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16)
+
+        return (value * self.count) >> 32 == self.number - 1
+
+    def __str__(self):
+        return "{}/{}".format(self.number, self.count)
+
+    def __repr__(self):
+        return "<Shard('{}')>".format(self)
+
+
+# -----------------------------------------------------------------------------
+#
+# JobQueue class
+#
+# -----------------------------------------------------------------------------
+class JobQueue(object):
+
+    """ Persistent progress of jobs on video files (SQLite in WAL mode).
+
+    Each video file goes through stages: hashed once its hash codes are
+    computed, done once all providers answered for its languages. Records
+    are only valid while the size and modification time of the file are
+    unchanged, so a run interrupted by a crash or an outage resumes where
+    it stopped: done videos are skipped and hash codes are not computed
+    again. """
+
+    HASHED = 'hashed'
+    DONE = 'done'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            filepath TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime INTEGER NOT NULL,
+            hashes TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            languages TEXT NOT NULL DEFAULT '',
+            updated REAL NOT NULL
+        )
+    """
+
+    def __init__(self, filepath):
+        """ Initializes instance. """
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+        # Connection is shared by stages, calls are serialized
+        self._connection = sqlite3.connect(
+            filepath, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # WAL is consistent after a crash without a sync by commit
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(self.SCHEMA)
+
+    def _get(self, filepath, stat):
+        """ Returns record of a video file (stage, hashes, languages)
+        or None if there is none or if the file changed since. """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime, stage, hashes, languages "
+                "FROM videos WHERE filepath = ?",
+                (os.path.abspath(filepath),)).fetchone()
+
+        if row is None or row[:2] != (stat.st_size, stat.st_mtime_ns):
+            return None
+
+        return row[2], json.loads(row[3]), set(row[4].split(',')) - {''}
+
+    def is_done(self, filepath, stat, languages):
+        """ Was a video file done for all languages? """
+        record = self._get(filepath, stat)
+
+        return record is not None and record[0] == self.DONE and \
+            {language.alpha3 for language in languages} <= record[2]
+
+    def get_hashes(self, filepath, stat):
+        """ Returns recorded hash codes of a video file,
+        or None if it must be hashed. """
+        record = self._get(filepath, stat)
+
+        return record[1] if record is not None and record[1] else None
+
+    def record_hashes(self, filepath, stat, hashes):
+        """ Records hash codes of a video file, which starts
+        again from the hashed stage. """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO videos "
+                "(filepath, size, mtime, hashes, stage, languages, updated) "
+                "VALUES (?, ?, ?, ?, ?, '', ?) "
+                "ON CONFLICT(filepath) DO UPDATE SET "
+                "size = excluded.size, mtime = excluded.mtime, "
+                "hashes = excluded.hashes, stage = excluded.stage, "
+                "languages = '', updated = excluded.updated",
+                (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns,
+                 json.dumps(hashes, sort_keys=True), self.HASHED,
+                 time.time()))
+
+    def mark_done(self, filepaths, languages):
+        """ Records that video files were done for languages
+        (in addition to languages they were already done for). """
+        alpha3 = {language.alpha3 for language in languages}
+
+        with self._lock, self._connection:
+            for filepath in filepaths:
+                filepath = os.path.abspath(filepath)
+                row = self._connection.execute(
+                    "SELECT stage, languages FROM videos "
+                    "WHERE filepath = ?", (filepath,)).fetchone()
+                if row is None:
+                    continue
+
+                done_languages = set(alpha3)
+                if row[0] == self.DONE:
+                    done_languages.update(row[1].split(','))
+                done_languages.discard('')
+
+                self._connection.execute(
+                    "UPDATE videos SET stage = ?, languages = ?, "
+                    "updated = ? WHERE filepath = ?",
+                    (self.DONE, ",".join(sorted(done_languages)),
+                     time.time(), filepath))
+
+    def counts(self):
+        """ Returns number of video files by stage. """
+        with self._lock:
+            return dict(self._connection.execute(
+                "SELECT stage, COUNT(*) FROM videos GROUP BY stage"))
+
+    def close(self):
+        """ Closes the database. """
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<JobQueue('{}')>".format(self.filepath)
+
+
+# EOF
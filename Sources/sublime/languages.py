@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : languages.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import logging
+import threading
+
+# Logger
+LOG = logging.getLogger("sublime.languages")
+
+
+# -----------------------------------------------------------------------------
+#
+# LanguageTables class
+#
+# -----------------------------------------------------------------------------
+class LanguageTables(object):
+
+    """ Lookup tables between language codes and babelfish Languages.
+
+    Babelfish converts codes through converters and raises an exception
+    when a language has no code, which is slow in loops over search
+    results, subtitles and tracks. Tables are built once, on first use
+    (babelfish is only imported then), and Languages are interned: one
+    instance by language. Unknown codes give None. """
+
+    _LOCK = threading.Lock()
+    _TABLES = None
+
+    def __init__(self):
+        """ Builds tables from babelfish converters. """
+        import babelfish
+
+        converters = babelfish.language_converters
+        self._interned = {}
+
+        opensubtitles = converters['opensubtitles']
+        self.from_opensubtitles = {
+            code: self.intern(babelfish.Language.fromopensubtitles(code))
+            for code in opensubtitles.codes}
+        self.from_alpha3b = {
+            code: self.intern(babelfish.Language(*language))
+            for code, language in converters['alpha3b'].from_symbol.items()}
+        self.from_name = {
+            name: self.intern(babelfish.Language(*language))
+            for name, language in converters['name'].from_symbol.items()}
+
+        self._alpha2 = dict(converters['alpha2'].to_symbol)
+        # Computed once by language used
+        self._opensubtitles_codes = {}
+
+    @staticmethod
+    def get():
+        """ Returns tables, built the first time. """
+        tables = LanguageTables._TABLES
+
+        if tables is None:
+            with LanguageTables._LOCK:
+                if LanguageTables._TABLES is None:
+                    LanguageTables._TABLES = LanguageTables()
+                tables = LanguageTables._TABLES
+
+        return tables
+
+    def intern(self, language):
+        """ Returns the instance of the tables equal to a language. """
+        return self._interned.setdefault(language, language)
+
+    def file_code(self, language):
+        """ Returns code of a language in subtitle filenames:
+        alpha2 if it has one, else alpha3. """
+        return self._alpha2.get(language.alpha3, language.alpha3)
+
+    def opensubtitles_code(self, language):
+        """ Returns OpenSubtitles code of a language. """
+        code = self._opensubtitles_codes.get(language)
+
+        if code is None:
+            code = language.opensubtitles
+            self._opensubtitles_codes[language] = code
+
+        return code
+
+
+def from_opensubtitles(code):
+    """ Returns Language of an OpenSubtitles code, or None. """
+    return LanguageTables.get().from_opensubtitles.get(code)
+
+
+def from_alpha3b(code):
+    """ Returns Language of an ISO 639-2/B code, or None. """
+    return LanguageTables.get().from_alpha3b.get(code)
+
+
+def from_name(name):
+    """ Returns Language of an english name, or None. """
+    return LanguageTables.get().from_name.get(name)
+
+
+def file_code(language):
+    """ Returns code of a language in subtitle filenames. """
+    return LanguageTables.get().file_code(language)
+
+
+def opensubtitles_code(language):
+    """ Returns OpenSubtitles code of a language. """
+    return LanguageTables.get().opensubtitles_code(language)
+
+
+# EOF
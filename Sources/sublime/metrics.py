@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : metrics.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import time
+import json
+import tempfile
+import threading
+import contextlib
+
+from sublime.util import set_file_mode
+
+
+# -----------------------------------------------------------------------------
+#
+# Metrics class
+#
+# -----------------------------------------------------------------------------
+class Metrics(object):
+
+    """ Timers and counters of a SubLime run.
+
+    Timers measure time spent in each stage of the pipeline (some stages
+    are nested: write includes decode), counters accumulate quantities
+    (files, bytes, requests...) and values keep the last value recorded
+    for a name. """
+
+    def __init__(self):
+        """ Initializes instance. """
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reset()
+
+    def add_listener(self, listener):
+        """ Adds a function called with name and duration
+        each time a timer is updated. """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """ Removes a timer listener. """
+        self._listeners.remove(listener)
+
+    def reset(self):
+        """ Forgets all measures. """
+        with self._lock:
+            self.started = time.time()
+            self.timers = {}
+            self.counters = {}
+            self.values = {}
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """ Context manager measuring time spent in a stage. """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, duration):
+        """ Adds a duration to a timer. """
+        with self._lock:
+            timer = self.timers.setdefault(
+                name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timer['count'] += 1
+            timer['total'] += duration
+            timer['max'] = max(timer['max'], duration)
+
+        for listener in self._listeners:
+            listener(name, duration)
+
+    def iter_timed(self, name, iterable):
+        """ Yields items of an iterable and measures
+        time spent producing them. """
+        iterator = iter(iterable)
+
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - start)
+                return
+            self.add_time(name, time.perf_counter() - start)
+
+            yield item
+
+    def incr(self, name, value=1):
+        """ Increments a counter. """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name, value):
+        """ Records the last value of a name. """
+        with self._lock:
+            self.values[name] = value
+
+    def report(self):
+        """ Returns a dictionary with all measures. """
+        with self._lock:
+            return {
+                'started': time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+                'duration': time.time() - self.started,
+                'timers': {
+                    name: dict(timer) for name, timer in self.timers.items()
+                },
+                'counters': dict(self.counters),
+                'values': dict(self.values),
+            }
+
+    def dump(self, filepath):
+        """ Writes report as JSON into a file. """
+        dir_name = os.path.dirname(os.path.abspath(filepath))
+
+        out_file = tempfile.NamedTemporaryFile(
+            mode='w', dir=dir_name, suffix=".part", delete=False,
+            encoding='utf-8')
+        try:
+            with out_file:
+                json.dump(self.report(), out_file, indent=2, sort_keys=True)
+            set_file_mode(out_file.name)
+            os.replace(out_file.name, filepath)
+        except BaseException:
+            os.remove(out_file.name)
+            raise
+
+
+# Metrics of the current run
+METRICS = Metrics()
+
+
+# EOF
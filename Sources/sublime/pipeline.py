@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : pipeline.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import queue
+import logging
+import threading
+
+from sublime.core import VideoFactory
+from sublime.core import Video
+from sublime.fileio import VideoFile
+from sublime.hashing import HashingService
+from sublime.metrics import METRICS
+from sublime.walk import ParallelWalker
+
+# Logger
+LOG = logging.getLogger("sublime.pipeline")
+
+# Marks the end of the items of a queue
+_END = object()
+
+
+# -----------------------------------------------------------------------------
+#
+# Stage class
+#
+# -----------------------------------------------------------------------------
+class Stage(object):
+
+    """ Stage of a Pipeline.
+
+    Function is called by each worker with an item (or a list of items
+    if batch_size is given) and returns an iterable of items for the next
+    stage, or None. A batch is processed as soon as it is full or when
+    no item came during batch_timeout seconds. batch_size may also be
+    a function returning the size of the batch in progress. """
+
+    def __init__(
+            self, name, function, workers=1,
+            batch_size=None, batch_timeout=1.0):
+        """ Initializes instance. """
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+
+    def get_batch_size(self):
+        """ Returns the size of the batch in progress. """
+        if callable(self.batch_size):
+            return self.batch_size()
+
+        return self.batch_size
+
+    def __repr__(self):
+        return "<Stage('{}', '{}')>".format(self.name, self.workers)
+
+
+# -----------------------------------------------------------------------------
+#
+# Pipeline class
+#
+# -----------------------------------------------------------------------------
+class Pipeline(object):
+
+    """ Stages running in threads and connected by bounded queues.
+
+    A stage blocks when the queue of the next stage is full, so a slow
+    stage slows down the previous ones instead of letting items pile up:
+    memory used by the pipeline doesn't depend on the number of items. """
+
+    DEFAULT_QUEUE_SIZE = 64
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        """ Initializes instance. """
+        self.queue_size = queue_size
+        self.stages = []
+        self._error = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, function, **kwargs):
+        """ Adds a stage at the end of the pipeline. """
+        self.stages.append(Stage(name, function, **kwargs))
+
+        return self
+
+    def run(self, items):
+        """ Runs items through all stages and returns when all of them
+        went through, raises the first error raised by a stage. """
+        self._error = None
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        queues.append(None)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], queues[index + 1],
+                          remaining),
+                    name="{}-{}".format(stage.name, number))
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                if self._error is not None:
+                    break
+                queues[0].put(item)
+        except BaseException as error:
+            self._fail(error)
+            raise
+        finally:
+            queues[0].put(_END)
+
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def _work(self, stage, in_queue, out_queue, remaining):
+        """ Worker of a stage. """
+        batch = []
+
+        while True:
+            try:
+                if batch:
+                    item = in_queue.get(timeout=stage.batch_timeout)
+                else:
+                    item = in_queue.get()
+            except queue.Empty:
+                self._process(stage, batch, out_queue)
+                batch = []
+                continue
+
+            if item is _END:
+                # Lets other workers of the stage see the end too
+                in_queue.put(_END)
+                break
+
+            if stage.batch_size:
+                batch.append(item)
+                if len(batch) >= stage.get_batch_size():
+                    self._process(stage, batch, out_queue)
+                    batch = []
+            else:
+                self._process(stage, item, out_queue)
+
+        if batch:
+            self._process(stage, batch, out_queue)
+
+        with self._lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+
+        if last_worker and out_queue is not None:
+            out_queue.put(_END)
+
+    def _process(self, stage, item, out_queue):
+        """ Processes an item (or a batch) and passes results
+        to the next stage. After an error, items are only drained. """
+        if self._error is not None:
+            return
+
+        try:
+            results = stage.function(item)
+            if results is not None and out_queue is not None:
+                for result in results:
+                    out_queue.put(result)
+        except Exception as error:
+            LOG.error("Stage %s failed: %s", stage.name, error)
+            self._fail(error)
+
+    def _fail(self, error):
+        """ Keeps the first error raised in the pipeline. """
+        with self._lock:
+            if self._error is None:
+                self._error = error
+
+    def __repr__(self):
+        return "<Pipeline('{}')>".format(
+            ", ".join(stage.name for stage in self.stages))
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitlesJob class
+#
+# -----------------------------------------------------------------------------
+class SubtitlesJob(object):
+
+    """ Searches and downloads subtitles of video files with a Pipeline:
+    scan, classify, check existing subtitles, hash, then search, download
+    and write subtitles for each batch of videos.
+
+    Video files stay opened from classification to hashing, so each one
+    is opened once; the bounded queues also bound opened files.
+
+    With a JobQueue, progress of each video is recorded so a job resumes
+    where a previous one stopped, and with a Shard only videos of that
+    shard are searched. The local part of a job (up to hashing) and its
+    network part can also run separately, through a plan. With a Deadline,
+    no request is sent to providers once it is passed. """
+
+    DEFAULT_WORKERS = 4
+    # Videos by fetch batch, None follows the size of search requests
+    # of providers so that they can grow up to their maximum
+    DEFAULT_BATCH_SIZE = None
+    # Videos by fetch batch for providers without adaptive requests
+    FETCH_BATCH_SIZE = 50
+
+    def __init__(
+            self, providers, languages, force=False,
+            rename=False, rename_pattern=None, underscore=True,
+            workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+            queue_size=Pipeline.DEFAULT_QUEUE_SIZE,
+            scan_workers=ParallelWalker.DEFAULT_WORKERS,
+            jobs=None, shard=None, deadline=None):
+        """ Initializes instance. """
+        self.providers = providers
+        self.languages = languages
+        self.force = force
+        self.rename = rename
+        self.rename_pattern = rename_pattern
+        self.underscore = underscore
+        self.scan_workers = scan_workers
+        self.jobs = jobs
+        self.shard = shard
+        self.deadline = deadline
+        self.hashing = HashingService.for_providers(providers)
+        # Number of videos sent to providers (fetch has one worker)
+        self.videos = 0
+
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def _make_pipeline(self, local=True, network=True):
+        """ Makes a pipeline with stages working on local files
+        and/or the stage querying providers. """
+        pipeline = Pipeline(self.queue_size)
+
+        if local:
+            pipeline.add_stage(
+                'classify', self.classify, workers=self.workers)
+            pipeline.add_stage('check', self.check_existing)
+            pipeline.add_stage('hash', self.hash, workers=self.workers)
+
+        if network:
+            pipeline.add_stage(
+                'fetch', self.fetch,
+                batch_size=self.batch_size or self.get_fetch_batch_size)
+
+        return pipeline
+
+    def get_fetch_batch_size(self):
+        """ Returns the number of videos of the next fetch batch:
+        the size of the largest search request of providers. """
+        return max(
+            (provider.search_batches.size for provider in self.providers
+             if getattr(provider, 'search_batches', None) is not None),
+            default=self.FETCH_BATCH_SIZE)
+
+    def run(self, video_files=None, directories=None):
+        """ Runs job on video files and video files found
+        in directories. """
+        self._make_pipeline().run(
+            self.scan(video_files, directories, self.scan_workers))
+
+    def write_plan(self, plan_writer, video_files=None, directories=None):
+        """ Runs the local part of the job only, and writes videos
+        which need subtitles into a plan (PlanWriter). """
+        pipeline = self._make_pipeline(network=False)
+        pipeline.add_stage('plan', plan_writer.write)
+
+        pipeline.run(
+            self.scan(video_files, directories, self.scan_workers))
+
+    def apply_plan(self, videos):
+        """ Runs the network part of the job only, on videos
+        read from a plan. """
+        self._make_pipeline(local=False).run(videos)
+
+    @staticmethod
+    def scan(video_files=None, directories=None,
+             workers=ParallelWalker.DEFAULT_WORKERS):
+        """ Yields filenames given by user or found
+        by walking through directories. """
+        for video_filename in video_files or []:
+            yield video_filename
+
+        if directories:
+            for video_filename in ParallelWalker(directories, workers):
+                yield video_filename
+
+    def classify(self, video_filename):
+        """ Makes a video from a filename, with its opened VideoFile. """
+        if not Video.get_file_magic().is_video_extension(video_filename):
+            return None
+
+        try:
+            video_file = VideoFile(video_filename)
+        except OSError as error:
+            LOG.error("Cannot open %s: %s", video_filename, error)
+            return None
+
+        if self.jobs is not None and not self.force and self.jobs.is_done(
+                video_filename, video_file.stat, self.languages):
+            LOG.debug("Already done: %s", video_filename)
+            METRICS.incr('resumed_videos')
+            video_file.close()
+            return None
+
+        try:
+            video = VideoFactory.make_from_file(video_file)
+        except BaseException:
+            video_file.close()
+            raise
+
+        if not video:
+            video_file.close()
+            return None
+
+        return [(video, video_file)]
+
+    def check_existing(self, item):
+        """ Selects languages to download for a video according
+        to its existing subtitles. """
+        video, video_file = item
+
+        try:
+            for language in self.languages:
+                with METRICS.timer('has_subtitle'):
+                    has_subtitle = video.has_subtitle(language)
+
+                if has_subtitle:
+                    video_type = video.__class__.__name__
+                    video_name = os.path.basename(video.filename)
+                    if not self.force:
+                        LOG.warning(
+                            "%s named %s already has a subtitle "
+                            "for %s and nothing will happen for it! "
+                            "Use option '-f --force' to replace.",
+                            video_type, video_name, language.name)
+                        continue
+
+                    LOG.info(
+                        'Replacing %s subtitle for %s named %s.',
+                        language.name, video_type, video_name)
+
+                video.languages_to_download.append(language)
+        except BaseException:
+            video_file.close()
+            raise
+
+        if not video.languages_to_download:
+            video_file.close()
+            return None
+
+        return [item]
+
+    def hash(self, item):
+        """ Computes hash codes of a video and closes its file,
+        drops videos of other shards. """
+        video, video_file = item
+
+        with video_file:
+            hashes = None
+            if self.jobs is not None:
+                hashes = self.jobs.get_hashes(
+                    video.filename, video_file.stat)
+
+            if hashes is None:
+                video.hashes = self.hashing.compute(video_file)
+                if self.jobs is not None:
+                    self.jobs.record_hashes(
+                        video.filename, video_file.stat, video.hashes)
+            else:
+                METRICS.incr('reused_hashes')
+                video.hashes = hashes
+
+        if self.shard is not None and \
+                not self.shard.contains(self.shard_key(video)):
+            METRICS.incr('other_shard_videos')
+            return None
+
+        return [video]
+
+    def shard_key(self, video):
+        """ Returns the key splitting videos between shards: the first
+        hash code, or the name and size of the video without one. """
+        for name in self.hashing.names:
+            if video.hashes.get(name) is not None:
+                return video.hashes[name]
+
+        return "{}:{}".format(os.path.basename(video.filename), video.size)
+
+    def fetch(self, videos):
+        """ Searches, downloads and writes subtitles
+        for a batch of videos. """
+        # Only given to providers when there is one
+        options = {}
+        if self.deadline is not None:
+            self.deadline.check()
+            options['deadline'] = self.deadline
+
+        METRICS.incr('batches')
+        self.videos += len(videos)
+        # Videos may be renamed by providers
+        filepaths = [video.filename for video in videos]
+
+        failed = False
+        for provider in self.providers:
+            response = provider.download_subtitles(
+                videos, self.languages,
+                self.rename, self.rename_pattern, self.underscore,
+                **options)
+            # None when the provider returned an error (quota, outage...)
+            failed = failed or response is None
+
+        if self.jobs is not None:
+            if failed:
+                # Only videos which got all their subtitles are done,
+                # the others are searched again by the next job
+                METRICS.incr('failed_batches')
+                filepaths = [
+                    filepath for filepath, video in zip(filepaths, videos)
+                    if all(video.has_subtitle(language)
+                           for language in video.languages_to_download)]
+            self.jobs.mark_done(filepaths, self.languages)
+
+    def __repr__(self):
+        return "<SubtitlesJob('{}', '{}')>".format(
+            self.providers, self.languages)
+
+
+# EOF
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : plan.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import gzip
+import json
+import logging
+import tempfile
+
+import sublime
+
+from sublime import core
+from sublime.util import set_file_mode
+
+# Logger
+LOG = logging.getLogger("sublime.plan")
+
+# Identifies plan files and the version of their format
+PLAN_FORMAT = "sublime-plan"
+PLAN_VERSION = 1
+
+# Video classes by name
+VIDEO_TYPES = {
+    video_type.__name__: video_type for video_type in core.VIDEO_TYPES}
+
+
+def _type_name(video):
+    """ Gets name of the most precise video type of a video,
+    which may be an instance of a subclass. """
+    for video_type in reversed(core.VIDEO_TYPES):
+        if isinstance(video, video_type):
+            return video_type.__name__
+
+    raise TypeError("{!r} is not a video".format(video))
+
+
+def _open(filepath, mode, compressed=None):
+    """ Opens a plan file as text, compressed (by default) if its name
+    ends with .gz. """
+    if compressed is None:
+        compressed = filepath.endswith(".gz")
+
+    if compressed:
+        return gzip.open(filepath, mode + 't', encoding='utf-8')
+
+    return open(filepath, mode, encoding='utf-8')
+
+
+# -----------------------------------------------------------------------------
+#
+# PlanWriter class
+#
+# -----------------------------------------------------------------------------
+class PlanWriter(object):
+
+    """ Writes videos which need subtitles into a plan file, once
+    all local work on them (classification, existing subtitles and
+    hash codes) is done.
+
+    A plan is a JSON Lines file: a header with languages and hash
+    algorithms, then one line per video, so it is written and read one
+    video at a time. The file only appears once complete. """
+
+    def __init__(self, filepath, languages, hash_algorithms):
+        """ Initializes instance. """
+        self.filepath = filepath
+        self.count = 0
+
+        dir_name = os.path.dirname(os.path.abspath(filepath))
+        handle, self._temp_filepath = tempfile.mkstemp(
+            dir=dir_name, prefix=".{}.".format(os.path.basename(filepath)),
+            suffix=".part")
+        os.close(handle)
+
+        self._file = _open(
+            self._temp_filepath, 'w', filepath.endswith(".gz"))
+        self._write_line({
+            'format': PLAN_FORMAT,
+            'version': PLAN_VERSION,
+            'sublime': sublime.__version__,
+            'languages': [language.alpha3 for language in languages],
+            'hashes': sorted(hash_algorithms),
+        })
+
+    def _write_line(self, data):
+        self._file.write(json.dumps(data, separators=(',', ':')))
+        self._file.write('\n')
+
+    def write(self, video):
+        """ Writes a video into the plan. """
+        self._write_line({
+            # Plans may be applied from another directory
+            'path': os.path.abspath(video.filename),
+            'size': video.size,
+            'type': _type_name(video),
+            'inode': video.inode,
+            'hashes': video.hashes or {},
+            'languages': [
+                language.alpha3 for language in video.languages_to_download],
+        })
+        self.count += 1
+
+    def close(self):
+        """ Completes the plan file. """
+        self._file.close()
+        set_file_mode(self._temp_filepath)
+        os.replace(self._temp_filepath, self.filepath)
+
+    def abort(self):
+        """ Removes the incomplete plan file. """
+        self._file.close()
+        os.remove(self._temp_filepath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __repr__(self):
+        return "<PlanWriter('{}', '{}')>".format(self.filepath, self.count)
+
+
+# -----------------------------------------------------------------------------
+#
+# PlanReader class
+#
+# -----------------------------------------------------------------------------
+class PlanReader(object):
+
+    """ Reads a plan file written by a PlanWriter.
+
+    Iterating over a PlanReader yields its videos one at a time, made
+    from the plan only: video files are not read again. """
+
+    def __init__(self, filepath):
+        """ Initializes instance. """
+        import babelfish
+
+        self.filepath = filepath
+        self._file = _open(filepath, 'r')
+
+        try:
+            header = json.loads(self._file.readline() or 'null')
+            if not isinstance(header, dict) or \
+                    header.get('format') != PLAN_FORMAT:
+                raise PlanError(filepath, "not a SubLime plan")
+            if header.get('version') != PLAN_VERSION:
+                raise PlanError(
+                    filepath,
+                    "unsupported version {}".format(header.get('version')))
+        except (ValueError, PlanError):
+            self._file.close()
+            raise
+
+        self.languages = [
+            babelfish.Language(language) for language in header['languages']]
+        self.hash_algorithms = header['hashes']
+
+    def __iter__(self):
+        import babelfish
+
+        for number, line in enumerate(self._file, 2):
+            try:
+                entry = json.loads(line)
+                video = VIDEO_TYPES[entry['type']](
+                    entry['path'], entry['size'])
+                if entry['inode'] is not None:
+                    video.inode = tuple(entry['inode'])
+                video.hashes = entry['hashes']
+                video.languages_to_download = [
+                    babelfish.Language(language)
+                    for language in entry['languages']]
+            except (ValueError, KeyError, TypeError) as error:
+                raise PlanError(
+                    self.filepath, "line {}: {}".format(number, error))
+
+            yield video
+
+    def close(self):
+        """ Closes the plan file. """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<PlanReader('{}')>".format(self.filepath)
+
+
+# -----------------------------------------------------------------------------
+#
+# Exceptions
+#
+# -----------------------------------------------------------------------------
+class PlanError(Exception):
+
+    """ Exception raised if a plan file is invalid.
+
+    Attributes:
+        filepath -- filepath of the plan
+        message -- reason why it is invalid """
+
+    def __init__(self, filepath, message):
+        """ Initializes instance. """
+        Exception.__init__(self)
+        self.filepath = filepath
+        self.message = message
+
+    def __str__(self):
+        return "Invalid plan {}: {}".format(self.filepath, self.message)
+
+
+# EOF
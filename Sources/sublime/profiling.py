@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : profiling.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import sys
+import logging
+import threading
+import collections
+
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.profiling")
+
+
+# -----------------------------------------------------------------------------
+#
+# MemoryProfiler class
+#
+# -----------------------------------------------------------------------------
+class MemoryProfiler(object):
+
+    """ Takes a tracemalloc snapshot when each pipeline stage
+    completes for the first time, and at the end of the run,
+    and logs top allocators. """
+
+    TOP_ALLOCATORS = 10
+
+    def __init__(self, top_allocators=TOP_ALLOCATORS):
+        """ Initializes instance. """
+        self.top_allocators = top_allocators
+        self._stages = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """ Starts tracing memory allocations. """
+        import tracemalloc
+
+        tracemalloc.start()
+        METRICS.add_listener(self._on_stage)
+
+    def stop(self):
+        """ Stops tracing memory allocations. """
+        import tracemalloc
+
+        METRICS.remove_listener(self._on_stage)
+        self.snapshot("end")
+        tracemalloc.stop()
+
+    def snapshot(self, stage):
+        """ Logs memory usage and top allocators. """
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        METRICS.record('memory_peak', peak)
+
+        statistics = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        )).statistics('lineno')
+
+        LOG.info(
+            "Memory after %s: current %d KiB, peak %d KiB",
+            stage, current // 1024, peak // 1024)
+        for statistic in statistics[:self.top_allocators]:
+            LOG.info("    %s", statistic)
+
+    def _on_stage(self, name, duration):
+        with self._lock:
+            if name in self._stages:
+                return
+            self._stages.add(name)
+
+        self.snapshot(name)
+
+
+# -----------------------------------------------------------------------------
+#
+# ThreadProfiler class
+#
+# -----------------------------------------------------------------------------
+class ThreadProfiler(object):
+
+    """ cProfile profiler of the thread which starts it and of all
+    threads started while it runs.
+
+    Before Python 3.12, a cProfile profile only sees the thread which
+    enabled it: each new thread enables its own profile and all of them
+    are merged into one file. """
+
+    def __init__(self):
+        """ Initializes instance. """
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """ Starts profiling. """
+        self._enable()
+
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start_thread)
+
+    def stop(self, filepath):
+        """ Stops profiling and writes stats of all threads. """
+        import pstats
+
+        threading.setprofile(None)
+        self._profiles[0].disable()
+
+        with self._lock:
+            pstats.Stats(*self._profiles).dump_stats(filepath)
+
+    def _enable(self):
+        """ Enables a new profile in the current thread. """
+        import cProfile
+
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def _start_thread(self, frame, event, arg):
+        # Called once by a new thread: its profile replaces this function
+        self._enable()
+
+
+# -----------------------------------------------------------------------------
+#
+# StackSampler class
+#
+# -----------------------------------------------------------------------------
+class StackSampler(threading.Thread):
+
+    """ Samples stacks of threads at regular interval and writes
+    them in collapsed format ("frame;frame;frame count" lines)
+    used to draw flame graphs.
+
+    All threads are sampled unless thread_id is given, stacks start
+    with the name of their thread so each pipeline stage gets its
+    own flame. """
+
+    DEFAULT_INTERVAL = 0.005
+
+    def __init__(self, filepath, interval=DEFAULT_INTERVAL, thread_id=None):
+        """ Initializes instance. """
+        threading.Thread.__init__(self, name="sublime-sampler", daemon=True)
+
+        self.filepath = filepath
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = collections.Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in frames.items():
+                if thread_id == self.ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append("{} ({}:{})".format(
+                        code.co_name, os.path.basename(code.co_filename),
+                        code.co_firstlineno))
+                    frame = frame.f_back
+
+                if stack:
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """ Stops sampling and writes collapsed stacks. """
+        self._stopped.set()
+        self.join()
+
+        with open(self.filepath, 'w', encoding='utf-8') as out_file:
+            for stack, count in self.stacks.most_common():
+                out_file.write("{} {}\n".format(stack, count))
+
+
+# -----------------------------------------------------------------------------
+#
+# Profiler class
+#
+# -----------------------------------------------------------------------------
+class Profiler(object):
+
+    """ Profiler context manager used around a SubLime run.
+
+    Attributes:
+        profile_filepath -- file where cProfile statistics are written
+        memory -- logs tracemalloc snapshots at each pipeline stage
+        sample_filepath -- file where sampled collapsed stacks are written
+        sample_interval -- interval in seconds between two samples """
+
+    def __init__(
+            self, profile_filepath=None, memory=False,
+            sample_filepath=None,
+            sample_interval=StackSampler.DEFAULT_INTERVAL):
+        """ Initializes instance. """
+        self.profile_filepath = profile_filepath
+        self.memory = memory
+        self.sample_filepath = sample_filepath
+        self.sample_interval = sample_interval
+
+        self._profile = None
+        self._memory_profiler = None
+        self._sampler = None
+
+    def __enter__(self):
+        if self.memory:
+            self._memory_profiler = MemoryProfiler()
+            self._memory_profiler.start()
+
+        if self.sample_filepath:
+            self._sampler = StackSampler(
+                self.sample_filepath, self.sample_interval)
+            self._sampler.start()
+
+        if self.profile_filepath:
+            self._profile = ThreadProfiler()
+            self._profile.start()
+
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if self._profile:
+            self._profile.stop(self.profile_filepath)
+            LOG.info("Profile written into %s", self.profile_filepath)
+
+        if self._sampler:
+            self._sampler.stop()
+            LOG.info("Sampled stacks written into %s", self.sample_filepath)
+
+        if self._memory_profiler:
+            self._memory_profiler.stop()
+
+
+# EOF
@@ -12,22 +12,20 @@
 ##
 
 import logging
-import zlib
-import base64
 import re
-import itertools
-import struct
-import os
+import zlib
+import binascii
 
-from babelfish import Language
+from sublime.languages import from_opensubtitles
+from sublime.languages import opensubtitles_code
+from sublime.util import iter_b64decode
+from sublime.util import iter_decompress
+from sublime.metrics import METRICS
 
 from sublime.core import Subtitle
 from sublime.core import Movie
 from sublime.core import Episode
 from sublime.core import VideoFactory
-from sublime.core import VideoError
-from sublime.core import VideoSizeError
-from sublime.core import VideoHashCodeError
 
 from sublime.server import SubtitleProvider
 from sublime.server import XMLRPCServer
@@ -46,10 +44,23 @@ class OpenSubtitlesServer(SubtitleProvider, XMLRPCServer):
 
     """ """
 
+    CODE = "os"
+    HASH_ALGORITHM = "opensubtitles"
+
     XMLRPC_URI = "http://api.opensubtitles.org/xml-rpc"
     DEFAULT_LANGUAGE = "en"
 
+    # Server accepts at most 20 subtitles by download request
+    DOWNLOAD_BATCH_SIZES = (1, 20, 20)
+
     STATUS_REGEXP = r'(?P<code>\d+) (?P<message>\w+)'
+
+    # Fields of search results used to make subtitles
+    SEARCH_FIELDS = (
+        'MovieHash', 'SubLanguageID', 'IDSubtitleFile', 'SubRating',
+        'SubFormat', 'SubDownloadsCnt', 'MovieName', 'MovieKind',
+        'SeriesSeason', 'SeriesEpisode'
+    )
     SERIES_REGEXP = r'^"(?P<serie_name>.*)" (?P<episode_name>.*)$'
 
     def __init__(self):
@@ -58,14 +69,14 @@ class OpenSubtitlesServer(SubtitleProvider, XMLRPCServer):
             self,
             "OpenSubtitles",
             "http://www.opensubtitles.org",
-            "os"
+            OpenSubtitlesServer.CODE
         )
         XMLRPCServer.__init__(self, OpenSubtitlesServer.XMLRPC_URI)
 
         self._status_regexp = re.compile(OpenSubtitlesServer.STATUS_REGEXP)
         self._series_regexp = re.compile(OpenSubtitlesServer.SERIES_REGEXP)
 
-        LOG.debug("Open Subtitles server ready. {}".format(self.user_agent))
+        LOG.debug("Open Subtitles server ready. %s", self.user_agent)
 
     def _do_connect(self):
         """ Connect to Server. """
@@ -74,7 +85,7 @@ class OpenSubtitlesServer(SubtitleProvider, XMLRPCServer):
             OpenSubtitlesServer.DEFAULT_LANGUAGE,
             self.user_agent)
 
-        LOG.debug("Connect response: {}".format(response))
+        LOG.debug("Connect response: %s", response)
 
         if self.status_ok(response):
             self._session_string = response['token']
@@ -99,105 +110,198 @@ class OpenSubtitlesServer(SubtitleProvider, XMLRPCServer):
     def _do_search_subtitles(self, videos_hashcode, languages):
         """ Search list of subtitles. """
         subtitles_infos = []
-
-        # Search subtitles
-        hashcodes_sizes = [
-            {'moviehash': hash_code, 'moviebytesize': video.size}
-            for hash_code, video in videos_hashcode.items()
-        ]
-        response = self._proxy.SearchSubtitles(
-            self._session_string, hashcodes_sizes)
-
-        if self.status_ok(response):
-            if 'data' in response and response['data']:
-                for data_subtitle in response['data']:
-                    # Retrieve important info
-                    sub_video_hashcode = data_subtitle['MovieHash']
-                    sub_video = videos_hashcode[sub_video_hashcode]
-                    sub_lang = Language.fromopensubtitles(
-                        data_subtitle['SubLanguageID'])
-
-                    if sub_lang in sub_video.languages_to_download \
-                            and sub_lang in languages:
-                        # Subtitle infos
-                        sub_id = data_subtitle['IDSubtitleFile']
-                        sub_rating = float(data_subtitle['SubRating'])
-                        sub_format = data_subtitle['SubFormat']
-
-                        # Video infos
-                        sub_video_name = data_subtitle['MovieName']
-
-                        if data_subtitle['MovieKind'] == "movie":
-                            sub_video = VideoFactory.make_from_type(
-                                sub_video, Movie)
-                        elif data_subtitle['MovieKind'] == "episode":
-                            sub_video = VideoFactory.make_from_type(
-                                sub_video, Episode)
-
-                        videos_hashcode[sub_video_hashcode] = sub_video
-
-                        if isinstance(sub_video, Movie):
-                            sub_video.name = sub_video_name
-                        elif isinstance(sub_video, Episode):
-                            # Retrieves serie name and episode name
-                            match_result = re.match(
-                                self._series_regexp, sub_video_name)
-                            sub_video.name = match_result.group("serie_name")
-                            sub_video.episode_name = match_result.group(
-                                "episode_name")
-
-                            sub_video.season = int(
-                                data_subtitle['SeriesSeason'])
-                            sub_video.episode = int(
-                                data_subtitle['SeriesEpisode'])
-
-                        subtitle = Subtitle(
-                            sub_id, sub_lang, sub_video,
-                            sub_rating, sub_format)
-                        subtitles_infos.append(subtitle)
-            else:
-                raise SubtitleServerError(
-                    self, "There is no result when searching for subtitles.")
-        else:
-            raise SubtitleServerError(self, self.get_status_reason(response))
+        has_result = False
+
+        # Videos needing the same languages are searched together
+        # and only subtitles of these languages are returned by the server
+        languages_groups = {}
+        for hash_code, video in videos_hashcode.items():
+            video_languages = frozenset(
+                language for language in video.languages_to_download
+                if language in languages)
+            if video_languages:
+                languages_groups.setdefault(video_languages, []).append(
+                    (hash_code, video))
+
+        for video_languages, hashcodes_videos in languages_groups.items():
+            sub_language_id = ",".join(
+                sorted(
+                    opensubtitles_code(language)
+                    for language in video_languages))
+
+            # Search subtitles
+            hashcodes_sizes = [
+                {
+                    'sublanguageid': sub_language_id,
+                    'moviehash': hash_code,
+                    'moviebytesize': str(video.size)
+                }
+                for hash_code, video in hashcodes_videos
+            ]
+
+            for batch in self.search_batches.batches(hashcodes_sizes):
+                with self._hedged_request(
+                        self.search_batches, len(batch),
+                        self._search_batch, batch) as response:
+                    # Rows are parsed while the response is read
+                    for data_subtitle in response:
+                        has_result = True
+                        subtitle = self._make_subtitle(
+                            data_subtitle, videos_hashcode, languages)
+                        if subtitle:
+                            subtitles_infos.append(subtitle)
+
+                    if not self.status_ok(response):
+                        raise SubtitleServerError(
+                            self, self.get_status_reason(response))
+
+        if not has_result:
+            # Not an error: these videos have no subtitle yet
+            LOG.info("There is no result when searching for subtitles.")
 
         return subtitles_infos
 
+    def _search_batch(self, transport, batch):
+        """ Searches a batch of hash codes and returns the response once
+        it starts, its rows reduced to the fields used. """
+        return self._stream_call(
+            'SearchSubtitles', [self._session_string, batch],
+            OpenSubtitlesServer.SEARCH_FIELDS, transport)
+
+    def _make_subtitle(self, data_subtitle, videos_hashcode, languages):
+        """ Makes a Subtitle from a search result if it is wanted
+        and updates its video with found information. """
+        subtitle = None
+
+        # Retrieve important info
+        sub_video_hashcode = data_subtitle['MovieHash']
+        sub_video = videos_hashcode[sub_video_hashcode]
+        sub_lang = from_opensubtitles(
+            data_subtitle['SubLanguageID'])
+
+        if sub_lang is not None \
+                and sub_lang in sub_video.languages_to_download \
+                and sub_lang in languages:
+            # Subtitle infos
+            sub_id = data_subtitle['IDSubtitleFile']
+            sub_rating = float(data_subtitle['SubRating'])
+            sub_format = data_subtitle['SubFormat']
+            sub_downloads = int(data_subtitle.get('SubDownloadsCnt', 0))
+
+            # Video infos
+            sub_video_name = data_subtitle['MovieName']
+
+            if data_subtitle['MovieKind'] == "movie":
+                sub_video = VideoFactory.make_from_type(sub_video, Movie)
+            elif data_subtitle['MovieKind'] == "episode":
+                sub_video = VideoFactory.make_from_type(sub_video, Episode)
+
+            videos_hashcode[sub_video_hashcode] = sub_video
+
+            if isinstance(sub_video, Movie):
+                sub_video.name = sub_video_name
+            elif isinstance(sub_video, Episode):
+                # Retrieves serie name and episode name
+                match_result = re.match(self._series_regexp, sub_video_name)
+                sub_video.name = match_result.group("serie_name")
+                sub_video.episode_name = match_result.group("episode_name")
+
+                sub_video.season = int(data_subtitle['SeriesSeason'])
+                sub_video.episode = int(data_subtitle['SeriesEpisode'])
+
+            subtitle = Subtitle(
+                sub_id, sub_lang, sub_video,
+                sub_rating, sub_format, sub_downloads)
+
+        return subtitle
+
     def _do_download_subtitles(self, subtitles):
-        """ Download a list of subtitles. """
+        """ Download a list of subtitles.
+
+        Returns None if a subtitle couldn't be decoded: it is left out
+        and downloaded again by the next run. """
         response = False
         matching_subtitles = {}
 
-        # Clean up list of subtitles by taking highest rating per language
-        subtitles.sort()
-        for _, group in itertools.groupby(subtitles):
-            best_subtitle = max(list(group))
-            matching_subtitles[best_subtitle.id] = best_subtitle
+        for subtitle in subtitles:
+            # Subtitles already in the local store are not downloaded
+            if self.store and self.store.get(self.code, subtitle.id):
+                LOG.debug("Subtitle %s found in store.", subtitle.id)
+                try:
+                    subtitle.write(
+                        self.store.iter_data(self.code, subtitle.id))
+                except zlib.error as error:
+                    LOG.warning(
+                        "Subtitle %s of the store is corrupt: %s",
+                        subtitle.id, error)
+                    self.store.remove(self.code, subtitle.id)
+                else:
+                    response = True
+                    continue
+
+            matching_subtitles.setdefault(subtitle.id, []).append(subtitle)
+
+        if not matching_subtitles:
+            return response
 
         # Download Subtitles
         subtitles_id = list(matching_subtitles.keys())
-        response = self._proxy.DownloadSubtitles(
-            self._session_string, subtitles_id)
+        for batch in self.download_batches.batches(subtitles_id):
+            encoded_files = self._request(
+                self.download_batches, len(batch),
+                self._download_batch, batch)
+
+            for encoded_file in encoded_files:
+                subtitle_id = encoded_file['idsubtitlefile']
+
+                try:
+                    self._write_subtitles(
+                        subtitle_id, encoded_file['data'],
+                        matching_subtitles[subtitle_id])
+                except (zlib.error, binascii.Error) as error:
+                    LOG.error(
+                        "Cannot decode subtitle %s: %s", subtitle_id, error)
+                    METRICS.incr('corrupt_subtitles')
+                    if self.store:
+                        self.store.remove(self.code, subtitle_id)
+                    response = None
+                else:
+                    if response is not None:
+                        response = True
 
-        if self.status_ok(response):
-            if 'data' in response and response['data']:
-                for encoded_file in response['data']:
-                    subtitle_id = encoded_file['idsubtitlefile']
-                    decoded_file = base64.standard_b64decode(
-                        encoded_file['data'])
-                    file_data = zlib.decompress(decoded_file, 47)
-
-                    subtitle = matching_subtitles[subtitle_id]
-                    subtitle.write(file_data)
-                response = True
+        return response
+
+    def _write_subtitles(self, subtitle_id, encoded_data, subtitles):
+        """ Stores a downloaded subtitle and writes it for subtitles,
+        raises zlib.error or binascii.Error if it can't be decoded. """
+        if self.store:
+            self.store.put(
+                self.code, subtitle_id, iter_b64decode(encoded_data))
+
+        for subtitle in subtitles:
+            if self.store:
+                file_data = self.store.iter_data(self.code, subtitle_id)
             else:
-                raise SubtitleServerError(
-                    self, "There is no result when downloading subtitles.")
-        else:
+                file_data = iter_decompress(iter_b64decode(encoded_data))
+
+            file_data = METRICS.iter_timed('decode', file_data)
+
+            subtitle.write(file_data)
+
+    def _download_batch(self, transport, batch):
+        """ Downloads a batch of subtitles and returns their encoded
+        files. """
+        response = self._proxy_on(transport).DownloadSubtitles(
+            self._session_string, batch)
+
+        if not self.status_ok(response):
             raise SubtitleServerError(
                 self, self.get_status_reason(response))
+        if 'data' not in response or not response['data']:
+            raise SubtitleServerError(
+                self, "There is no result when downloading subtitles.")
 
-        return response
+        return response['data']
 
     def status_ok(self, response):
         """ Is status returned by server is OK ? """
@@ -224,43 +328,5 @@ class OpenSubtitlesServer(SubtitleProvider, XMLRPCServer):
 
         return reason
 
-    def hashcode(self, video_filepath):
-        """ Generates Video Hash code. """
-        hash_code = None
-
-        try:
-            struct_format = 'q'  # long long
-            struct_size = struct.calcsize(struct_format)
-
-            with open(video_filepath, "rb") as movie_file:
-
-                filesize = os.path.getsize(video_filepath)
-                movie_hash = filesize
-
-                if filesize < 65536 * 2:
-                    raise VideoError()
-
-                for x in range(65536//struct_size):
-                    buffer = movie_file.read(struct_size)
-                    (l_value,) = struct.unpack(struct_format, buffer)
-                    movie_hash += l_value
-                    movie_hash = movie_hash & 0xFFFFFFFFFFFFFFFF
-
-                movie_file.seek(max(0, filesize - 65536), 0)
-
-                for x in range(65536//struct_size):
-                    buffer = movie_file.read(struct_size)
-                    (l_value,) = struct.unpack(struct_format, buffer)
-                    movie_hash += l_value
-                    movie_hash = movie_hash & 0xFFFFFFFFFFFFFFFF
-
-                hash_code = "%016x" % movie_hash
-        except VideoError as error:
-            raise VideoSizeError(video_filepath)
-        except Exception as error:
-            raise VideoHashCodeError(video_filepath, error)
-
-        return hash_code
-
 
 # EOF
@@ -13,14 +13,30 @@
 
 import os
 import sys
+import copy
+import time
 import logging
+import contextlib
+import threading
+import http.client
 import xmlrpc.client
+import urllib.parse
 import pkgutil
 
 from sublime.util import Metadata
+from sublime.util import iter_entry_points
+from sublime.metrics import METRICS
+from sublime.batching import AdaptiveBatchSizer
+from sublime.hedging import Attempt
+from sublime.hedging import DeadlineExceeded
+from sublime.singleflight import SingleFlight
+from sublime.streaming import StreamedResponse
+from sublime.streaming import StreamingTransport
+from sublime.streaming import SafeStreamingTransport
 from sublime.core import Movie
 from sublime.core import Episode
-from sublime.core import NamePattern as pattern
+from sublime.core import SubtitleSelector
+from sublime.core import VideoError
 
 # Logger
 LOG = logging.getLogger("sublime.server")
@@ -43,8 +59,7 @@ class ProviderMount(type):
         else:
             cls.providers.append(cls)
             LOG.debug(
-                "A new SubtitleServer class has been registered: {}".format(
-                    name))
+                "A new SubtitleServer class has been registered: %s", name)
 
 
 # -----------------------------------------------------------------------------
@@ -61,9 +76,22 @@ class SubtitleProvider(metaclass=ProviderMount):
 
         name -- Name of the provider that will be displayed
         address -- Official address of the provider
-        code -- Unique code for this provider """
+        code -- Unique code for this provider
 
-    _instances = []
+    The unique code must also be given by the CODE class attribute
+    so that providers can be selected without being instantiated. """
+
+    # Entry points group where packages declare providers by code
+    ENTRY_POINT_GROUP = "sublime.providers"
+
+    # Unique code of the provider class
+    CODE = None
+
+    # Name of the hash algorithm identifying videos for the provider
+    HASH_ALGORITHM = None
+
+    _instances = {}
+    _directory_imported = False
 
     def __init__(self, name, address, code):
         """ Initializes instance. """
@@ -72,28 +100,82 @@ class SubtitleProvider(metaclass=ProviderMount):
         self.code = code
 
     @staticmethod
-    def get_providers():
-        """ Returns several SubtitleProvider. """
-        # Import all existing providers
+    def get_providers(codes=None):
+        """ Returns SubtitleProvider instances, all of them
+        or only those whose code is given.
+
+        A provider is instantiated the first time it is asked for. """
+        providers = []
+
+        for provider_class in SubtitleProvider.get_provider_classes(codes):
+            provider = SubtitleProvider._instances.get(provider_class)
+            if provider is None:
+                provider = provider_class()
+                SubtitleProvider._instances[provider_class] = provider
+            providers.append(provider)
+
+        return providers
+
+    @staticmethod
+    def get_provider_classes(codes=None):
+        """ Returns SubtitleProvider classes, all of them
+        or only those whose code is given.
+
+        Providers are declared by entry points named after their code,
+        which are only loaded when needed, or are modules of the providers
+        directory, which are imported if a provider is still missing. """
+        wanted_codes = None if codes is None else set(codes)
+
+        def registered_codes():
+            return set(
+                provider_class.CODE
+                for provider_class in SubtitleProvider.providers)
+
+        for entry_point in iter_entry_points(
+                SubtitleProvider.ENTRY_POINT_GROUP):
+            if entry_point.name in registered_codes():
+                continue
+
+            if wanted_codes is None or entry_point.name in wanted_codes:
+                try:
+                    entry_point.load()
+                except ImportError as error:
+                    LOG.fatal(
+                        "Cannot import %s provider: %s",
+                        entry_point.name, error)
+
+        if wanted_codes is None or wanted_codes - registered_codes():
+            SubtitleProvider._import_providers_directory()
+
+        if wanted_codes is not None:
+            for code in wanted_codes - registered_codes():
+                LOG.error("There is no provider with code %s.", code)
+
+        return [
+            provider_class for provider_class in SubtitleProvider.providers
+            if wanted_codes is None or provider_class.CODE in wanted_codes
+        ]
+
+    @staticmethod
+    def _import_providers_directory():
+        """ Imports all modules of the providers directory once. """
+        if SubtitleProvider._directory_imported:
+            return
+
         path = os.path.join(os.path.dirname(__file__), "providers")
         modules = pkgutil.iter_modules(path=[path])
 
         for _, mod_name, _ in modules:
+            mod_path = "sublime.providers." + mod_name
             # Ensure that module isn't already loaded
-            if mod_name not in sys.modules:
+            if mod_path not in sys.modules:
                 try:
-                    mod_path = "sublime.providers." + mod_name
                     __import__(mod_path, fromlist=[mod_name])
                 except ImportError as error:
-                    LOG.fatal("Cannot import {} provider: {}".format(
-                        mod_name, error))
-
-        if not SubtitleProvider._instances:
-            SubtitleProvider._instances = [
-                provider() for provider in SubtitleProvider.providers
-            ]
+                    LOG.fatal(
+                        "Cannot import %s provider: %s", mod_name, error)
 
-        return SubtitleProvider._instances
+        SubtitleProvider._directory_imported = True
 
     def __eq__(self, other):
         return (self.name == other.name and
@@ -114,6 +196,17 @@ class XMLRPCServer(object):
     USER_AGENT = "{} {}".format(
         Metadata.get("title"), Metadata.get("version"))
 
+    # Bounds (minimum, initial, maximum) of the number of hash codes
+    # by search request and of subtitles by download request
+    SEARCH_BATCH_SIZES = (1, 50, 500)
+    DOWNLOAD_BATCH_SIZES = (1, 20, 100)
+
+    # Seconds allowed to a request
+    REQUEST_TIMEOUT = 60.0
+    # A request slower than this percentile of the latencies of previous
+    # requests is sent again on another connection (None never does it)
+    HEDGE_PERCENTILE = 0.95
+
     def __init__(self, xmlrpc_uri, user_agent=USER_AGENT):
         """ Initializes instance. """
         self.xmlrpc_uri = xmlrpc_uri
@@ -121,26 +214,61 @@ class XMLRPCServer(object):
         self._proxy = None
         self.connected = False
         self.user_agent = user_agent
+        self.selector = SubtitleSelector()
+        self.store = None
+        self.timeout = self.REQUEST_TIMEOUT
+        self.hedge_percentile = self.HEDGE_PERCENTILE
+        # Calls share one connection, jobs of a daemon may run concurrently
+        self._lock = threading.RLock()
+        # Identical searches and downloads of concurrent jobs are sent once
+        self._searches = SingleFlight('searches')
+        self._downloads = SingleFlight('downloads')
+
+        # Deadline of the run of the call in progress
+        self._deadline = None
+        self._transport = self._make_transport()
+        # Other connections, used by hedged requests
+        self._spare_transports = []
+        self._busy_transports = set()
+        self._transports_lock = threading.Lock()
+
+        # Requests are sized from latency, size and errors of previous ones
+        self.search_batches = AdaptiveBatchSizer(
+            'search', *self.SEARCH_BATCH_SIZES)
+        self.download_batches = AdaptiveBatchSizer(
+            'download', *self.DOWNLOAD_BATCH_SIZES)
 
     def connect(self):
         """ Connect to a subtiles server. """
-        LOG.info("Connect to {}...".format(self.name))
-        self._proxy = xmlrpc.client.ServerProxy(self.xmlrpc_uri)
+        LOG.info("Connect to %s...", self.name)
+        self._proxy = xmlrpc.client.ServerProxy(
+            self.xmlrpc_uri, transport=self._transport)
 
         return self._execute(self._do_connect)
 
     def disconnect(self):
         """ Disconnect from a subtitles server. """
-        LOG.info("Disconnect from {}...".format(self.name))
+        LOG.info("Disconnect from %s...", self.name)
 
-        return self._execute(self._do_disconnect)
+        try:
+            return self._execute(self._do_disconnect)
+        finally:
+            with self._transports_lock:
+                spare_transports, self._spare_transports = \
+                    self._spare_transports, []
+            for transport in spare_transports:
+                transport.close()
 
     def download_subtitles(
             self, videos, languages,
             rename=False, rename_pattern=None, underscore=True,
-            mock_hash=None):
-        """ Download a list of subtitles. """
-        LOG.info("Download subtitles from {}...".format(self.name))
+            mock_hash=None, deadline=None):
+        """ Download a list of subtitles, without sending any request
+        after deadline (a Deadline) if one is given.
+
+        Returns True if subtitles were downloaded, False if there was
+        none to download and None if the server returned an error. """
+        LOG.info("Download subtitles from %s...", self.name)
 
         # Use for testing purpose
         if mock_hash is not None:
@@ -149,42 +277,364 @@ class XMLRPCServer(object):
             hashcode = self.hashcode
 
         response = False
+        videos_groups = self._group_videos(videos, hashcode, mock_hash)
         videos_hashcode = {
-            hashcode(video.filename): video for video in videos
+            hash_code: group[0] for hash_code, group in videos_groups.items()
+        }
+
+        # Identical videos are queried once, on behalf of all of them,
+        # with every language wanted by at least one of them
+        wanted_languages = {
+            video.id: list(video.languages_to_download)
+            for group in videos_groups.values() for video in group
         }
+        for group in videos_groups.values():
+            for video in group[1:]:
+                group[0].languages_to_download.extend(
+                    language for language in video.languages_to_download
+                    if language not in group[0].languages_to_download)
 
-        with pattern(rename_pattern, underscore):
+        try:
             # First search if subtitles are available
-            subtitles = self._execute(
-                self._do_search_subtitles,
-                [videos_hashcode, languages])
+            with METRICS.timer('search'):
+                subtitles = self._search_subtitles(
+                    videos_hashcode, languages, deadline)
+
+            if subtitles is None:
+                # Error already logged, videos are left as they are
+                return None
 
             # Rename videos if demanded
             if rename:
-                [video.rename() for video in videos_hashcode.values()
-                    if isinstance(video, (Movie, Episode))]
+                with METRICS.timer('rename'):
+                    for hash_code, group in videos_groups.items():
+                        self._rename_videos(
+                            videos_hashcode[hash_code], group,
+                            rename_pattern, underscore)
 
             # Download subtitles
             if subtitles:
-                response = self._execute(
-                    self._do_download_subtitles, [subtitles])
+                subtitles = self.selector.select(subtitles)
+                shared_subtitles = self._share_subtitles(
+                    subtitles, videos_groups, wanted_languages)
+
+                with METRICS.timer('download'):
+                    response = self._download_subtitles(
+                        subtitles, deadline)
+
+                for subtitle, videos_to_link in shared_subtitles:
+                    if os.path.exists(subtitle.filepath):
+                        for video in videos_to_link:
+                            subtitle.link_to(video)
+        finally:
+            for group in videos_groups.values():
+                group[0].languages_to_download = \
+                    wanted_languages[group[0].id]
+
+        return response
+
+    def _search_subtitles(self, videos_hashcode, languages, deadline=None):
+        """ Searches subtitles of videos, or waits for the same search
+        of a concurrent job and shares its result. Videos found by the
+        search replace those of videos_hashcode. """
+        key = (
+            frozenset(
+                (hash_code, video.filename,
+                 frozenset(video.languages_to_download))
+                for hash_code, video in videos_hashcode.items()),
+            frozenset(languages))
+
+        def search():
+            subtitles = self._execute(
+                self._do_search_subtitles, [videos_hashcode, languages],
+                deadline)
+            return subtitles, dict(videos_hashcode)
+
+        (subtitles, videos), shared = self._searches.do(key, search)
+
+        if shared:
+            # Same files: videos are shared, subtitles are not, as
+            # download_subtitles may assign them to other videos
+            videos_hashcode.update(videos)
+            if subtitles:
+                subtitles = [copy.copy(subtitle) for subtitle in subtitles]
+
+        return subtitles
+
+    def _download_subtitles(self, subtitles, deadline=None):
+        """ Downloads and writes subtitles, or waits for the same
+        download of a concurrent job, which writes the same files. """
+        key = frozenset(
+            (subtitle.id, subtitle.filepath) for subtitle in subtitles)
+
+        response, _ = self._downloads.do(
+            key, self._execute, self._do_download_subtitles, [subtitles],
+            deadline)
 
         return response
 
+    def _group_videos(self, videos, hashcode, mock_hash=None):
+        """ Groups identical video files by hash code.
+
+        Hard links are detected with their inode before computing any
+        hash code, copies are detected with their hash code. Videos
+        without hash code (too small, unreadable...) are left out. """
+        videos_groups = {}
+        inodes_hashcode = {}
+
+        for video in videos:
+            inode = video.inode
+            if inode is None:
+                stat = os.stat(video.filename)
+                inode = (stat.st_dev, stat.st_ino)
+
+            hash_code = inodes_hashcode.get(inode)
+            if hash_code is None and video.hashes and not mock_hash and \
+                    self.HASH_ALGORITHM in video.hashes:
+                # Hash code computed when the file was opened, None
+                # if it couldn't be (already logged)
+                hash_code = video.hashes[self.HASH_ALGORITHM]
+                if hash_code is None:
+                    METRICS.incr('unhashed_videos')
+                    continue
+            if hash_code is None:
+                try:
+                    with METRICS.timer('hash'):
+                        hash_code = hashcode(video.filename)
+                except VideoError as error:
+                    LOG.warning(error)
+                    METRICS.incr('unhashed_videos')
+                    continue
+                METRICS.incr('hashed_files')
+            inodes_hashcode[inode] = hash_code
+
+            videos_groups.setdefault(hash_code, []).append(video)
+
+        return videos_groups
+
+    def _rename_videos(self, found_video, group, pattern, underscore):
+        """ Renames identical videos with what the search found about
+        them (found_video, a Movie or an Episode). """
+        if not isinstance(found_video, (Movie, Episode)):
+            return
+
+        for video in group:
+            if video.id == found_video.id:
+                renamed_video = found_video
+            else:
+                renamed_video = type(found_video)(video.filename, video.size)
+                for attribute in type(found_video).__slots__:
+                    setattr(
+                        renamed_video, attribute,
+                        getattr(found_video, attribute))
+
+            renamed_video.rename(pattern, underscore)
+            video.filename = renamed_video.filename
+
+    def _share_subtitles(self, subtitles, videos_groups, wanted_languages):
+        """ Assigns each subtitle to the first identical video which wants
+        its language and returns the other videos which want it too. """
+        groups = {group[0].id: group for group in videos_groups.values()}
+        shared_subtitles = []
+
+        for subtitle in subtitles:
+            group = groups.get(subtitle.video.id, [subtitle.video])
+            videos_wanting = [
+                video for video in group
+                if subtitle.language in wanted_languages.get(
+                    video.id, [subtitle.language])
+            ]
+
+            # Videos of a group were all renamed like the video found
+            # by the search: any of them can hold the subtitle
+            if videos_wanting:
+                subtitle.video = videos_wanting[0]
+
+            if len(videos_wanting) > 1:
+                shared_subtitles.append((subtitle, videos_wanting[1:]))
+
+        return shared_subtitles
+
     def hashcode(self, video_filepath):
-        """ Generates Video Hash code depending. """
-        raise NotImplementedError("Please Implement this method")
+        """ Generates hash code of a video from a filepath or a VideoFile
+        with the hash algorithm of the provider. """
+        if not getattr(self, 'HASH_ALGORITHM', None):
+            raise NotImplementedError("Please Implement this method")
+
+        from sublime.hashing import hash_video
+
+        return hash_video(video_filepath, self.HASH_ALGORITHM)
+
+    def _stream_call(self, method_name, params, fields=None, transport=None):
+        """ Calls a XMLRPC method and returns a StreamedResponse
+        which yields rows of the response while it is read. """
+        transport = transport or self._transport
+        uri = urllib.parse.urlsplit(self.xmlrpc_uri)
+        handler = uri.path or "/RPC2"
+        if uri.query:
+            handler += "?" + uri.query
+
+        request_body = xmlrpc.client.dumps(
+            tuple(params), method_name, encoding='utf-8'
+        ).encode('utf-8', 'xmlcharrefreplace')
+        stream = transport.stream_request(
+            uri.netloc, handler, request_body)
+
+        return StreamedResponse(
+            stream, fields=fields, on_abort=transport.close)
+
+    def _make_transport(self):
+        """ Makes a transport to the server. """
+        if urllib.parse.urlsplit(self.xmlrpc_uri).scheme == "https":
+            return SafeStreamingTransport()
+
+        return StreamingTransport()
+
+    def _proxy_on(self, transport):
+        """ Returns a XMLRPC proxy sending requests on a transport. """
+        if transport is self._transport and self._proxy is not None:
+            return self._proxy
+
+        return xmlrpc.client.ServerProxy(
+            self.xmlrpc_uri, transport=transport)
+
+    def _acquire_transport(self):
+        """ Returns a transport which no request is using, the main one
+        if possible, with the timeout and deadline of requests. """
+        with self._transports_lock:
+            if self._transport not in self._busy_transports:
+                transport = self._transport
+            elif self._spare_transports:
+                transport = self._spare_transports.pop()
+            else:
+                transport = self._make_transport()
+            self._busy_transports.add(transport)
+
+        transport.timeout = self.timeout
+        transport.deadline = self._deadline
+
+        return transport
+
+    def _release_transport(self, transport):
+        """ Makes a transport available to other requests. """
+        with self._transports_lock:
+            self._busy_transports.discard(transport)
+            if transport is not self._transport:
+                self._spare_transports.append(transport)
+
+    def _request(self, batches, count, function, *args):
+        """ Sends a request of count items, sized by batches (an
+        AdaptiveBatchSizer), with function(transport, *args) and returns
+        its result. The request is sent once. """
+        transport = self._acquire_transport()
+
+        try:
+            with batches.measure(count, transport):
+                return function(transport, *args)
+        finally:
+            self._release_transport(transport)
+
+    @contextlib.contextmanager
+    def _hedged_request(self, batches, count, function, *args):
+        """ Context manager sending a request of count items, sized by
+        batches (an AdaptiveBatchSizer), with function(transport, *args)
+        and giving its result, which may be a StreamedResponse read inside
+        the context. The request must not change anything.
+
+        A request whose result takes longer than most previous requests
+        (hedge_percentile of their latencies) is sent again on another
+        connection: the first result is used and the other request is
+        cancelled, so a few slow answers don't slow down the whole run. """
+        delay = None
+        if self.hedge_percentile is not None:
+            delay = batches.percentile(self.hedge_percentile)
+
+        if delay is None:
+            transport = self._acquire_transport()
+            try:
+                with batches.measure(count, transport):
+                    yield function(transport, *args)
+            finally:
+                self._release_transport(transport)
+            return
+
+        finished = threading.Event()
+        attempts = [Attempt(
+            function, self._acquire_transport(), args, finished,
+            self._end_attempt)]
+
+        if Attempt.first(attempts, finished, delay) is None:
+            LOG.debug(
+                "No answer from %s after %.2f seconds, "
+                "sending request again.", self.name, delay)
+            METRICS.incr('hedged_requests')
+            attempts.append(Attempt(
+                function, self._acquire_transport(), args, finished,
+                self._end_attempt))
+
+        attempt = Attempt.first(attempts, finished)
+        for other in attempts:
+            if other is not attempt:
+                other.release()
 
-    def _execute(self, method, args=[]):
-        """ Decorates method of SubtitleServer. """
         try:
-            return method(*args)
+            if attempt.error is not None:
+                batches.record(count, attempt.latency, 0, error=True)
+                raise attempt.error
+            if attempt is not attempts[0]:
+                METRICS.incr('hedged_wins')
+
+            try:
+                yield attempt.result
+            except Exception:
+                batches.record(
+                    count, time.perf_counter() - attempt.started, 0,
+                    error=True)
+                raise
+
+            batches.record(
+                count, time.perf_counter() - attempt.started,
+                getattr(attempt.transport, 'bytes_received', 0) -
+                attempt.received)
+        finally:
+            attempt.release()
+
+    def _end_attempt(self, attempt):
+        """ Releases the transport of an attempt which ended. """
+        # A response left unread makes its connection unusable
+        close = getattr(attempt.result, 'close', None)
+        if close is not None:
+            close()
+
+        self._release_transport(attempt.transport)
+
+    def _execute(self, method, args=[], deadline=None):
+        """ Decorates method of SubtitleServer. Errors are logged and
+        None is returned, except when the deadline of the run is
+        exceeded. """
+        try:
+            with self._lock:
+                self._deadline = deadline
+                self._transport.timeout = self.timeout
+                self._transport.deadline = deadline
+                try:
+                    return method(*args)
+                finally:
+                    self._deadline = None
         except xmlrpc.client.Fault as error:
             LOG.error(
-                "A fault occurred.\nFault code: {}\nFault string: {}"
-                .format(error.faultCode, error.faultString))
+                "A fault occurred.\nFault code: %s\nFault string: %s",
+                error.faultCode, error.faultString)
         except SubtitleServerError as error:
             LOG.warning(error)
+        except DeadlineExceeded:
+            raise
+        except (OSError, http.client.HTTPException,
+                xmlrpc.client.ProtocolError) as error:
+            # Timed out, cancelled or lost connection: videos are left
+            # as they are for the next run
+            LOG.error("Request to %s failed: %s", self.name, error)
+            METRICS.incr('failed_requests')
 
     def _do_connect(self):
         """ Connect to a subtiles server. """
@@ -199,7 +649,8 @@ class XMLRPCServer(object):
         raise NotImplementedError("Please Implement this method")
 
     def _do_download_subtitles(self, subtitles):
-        """ Download a list of subtitles. """
+        """ Download a list of subtitles already selected
+        (one per video and language). """
         raise NotImplementedError("Please Implement this method")
 
     def __repr__(self):
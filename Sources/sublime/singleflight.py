@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : singleflight.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import logging
+import threading
+
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.singleflight")
+
+
+# -----------------------------------------------------------------------------
+#
+# _Call class
+#
+# -----------------------------------------------------------------------------
+class _Call(object):
+
+    """ Outstanding call of a SingleFlight. """
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# -----------------------------------------------------------------------------
+#
+# SingleFlight class
+#
+# -----------------------------------------------------------------------------
+class SingleFlight(object):
+
+    """ Coalesces concurrent calls with the same key.
+
+    The first caller of a key runs the function, callers which come while
+    it runs wait for it and get its result (or its error) instead of
+    running the function again. A call which comes after the first one
+    returned runs the function again: results are not cached. """
+
+    def __init__(self, name):
+        """ Initializes instance. """
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        """ Returns result of function called with args, or the result
+        of an outstanding call with the same key, and whether the result
+        comes from the call of another caller. """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            LOG.debug("Waiting for outstanding %s call.", self.name)
+            METRICS.incr('coalesced_{}'.format(self.name))
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function(*args)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
+
+    def __repr__(self):
+        return "<SingleFlight('{}', '{}')>".format(self.name, len(self))
+
+
+# EOF
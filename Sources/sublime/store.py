@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : store.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+
+from sublime.util import BUFFER_SIZE
+from sublime.util import iter_decompress
+from sublime.util import set_file_mode
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.store")
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitleStore class
+#
+# -----------------------------------------------------------------------------
+class SubtitleStore(object):
+
+    """ Local content-addressed store of downloaded subtitles.
+
+    Subtitles are addressed by provider code and subtitle file id,
+    and kept compressed (gzip) as sent by providers. When the store
+    exceeds its maximum size, least recently used subtitles are evicted. """
+
+    # Default maximum size of the store in bytes
+    DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+    EXTENSION = ".gz"
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        """ Initializes instance. """
+        self.directory = directory
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    def filepath(self, provider_code, subtitle_id):
+        """ Gets filepath of a subtitle in the store. """
+        key = hashlib.sha1(
+            "{}:{}".format(provider_code, subtitle_id).encode('utf-8')
+        ).hexdigest()
+
+        return os.path.join(self.directory, key[:2], key + self.EXTENSION)
+
+    def get(self, provider_code, subtitle_id):
+        """ Returns the filepath of a stored subtitle
+        or None if it is not in the store. """
+        filepath = self.filepath(provider_code, subtitle_id)
+
+        try:
+            # Modification time keeps track of the last use
+            os.utime(filepath)
+        except OSError:
+            filepath = None
+            METRICS.incr('store_misses')
+        else:
+            METRICS.incr('store_hits')
+
+        return filepath
+
+    def iter_data(self, provider_code, subtitle_id):
+        """ Yields decompressed data of a stored subtitle. """
+        filepath = self.filepath(provider_code, subtitle_id)
+
+        with open(filepath, 'rb') as store_file:
+            chunks = iter(lambda: store_file.read(BUFFER_SIZE), b"")
+            for data in iter_decompress(chunks):
+                yield data
+
+    def put(self, provider_code, subtitle_id, chunks):
+        """ Stores compressed chunks of a subtitle and returns its
+        filepath. Chunks are decompressed while they are written: raises
+        zlib.error and stores nothing if they are truncated or corrupt. """
+        filepath = self.filepath(provider_code, subtitle_id)
+        dir_name = os.path.dirname(filepath)
+        os.makedirs(dir_name, exist_ok=True)
+
+        out_file = tempfile.NamedTemporaryFile(
+            dir=dir_name, suffix=".part", delete=False)
+
+        def write_chunks():
+            for chunk in chunks:
+                out_file.write(chunk)
+                yield chunk
+
+        try:
+            with out_file:
+                for _ in iter_decompress(write_chunks()):
+                    pass
+            set_file_mode(out_file.name)
+
+            with self._lock:
+                replaced_size = self._stored_size(filepath)
+                os.replace(out_file.name, filepath)
+
+                if self._size is None:
+                    # Scanned with the new file
+                    self._get_size()
+                else:
+                    self._size += (
+                        self._stored_size(filepath) - replaced_size)
+        except BaseException:
+            if os.path.exists(out_file.name):
+                os.remove(out_file.name)
+            raise
+
+        with self._lock:
+            if self._size > self.max_size:
+                self._evict(keep=filepath)
+
+        return filepath
+
+    def remove(self, provider_code, subtitle_id):
+        """ Removes a subtitle from the store (a corrupt one...). """
+        filepath = self.filepath(provider_code, subtitle_id)
+
+        with self._lock:
+            size = self._stored_size(filepath)
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                return
+
+            if self._size is not None:
+                self._size -= size
+
+    @staticmethod
+    def _stored_size(filepath):
+        """ Gets size of a stored subtitle, 0 if it is not stored. """
+        try:
+            return os.stat(filepath).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _iter_entries(self):
+        """ Yields (filepath, stat) of every stored subtitle. """
+        if not os.path.isdir(self.directory):
+            return
+
+        for sub_dir in os.scandir(self.directory):
+            if sub_dir.is_dir():
+                for entry in os.scandir(sub_dir.path):
+                    if entry.name.endswith(self.EXTENSION):
+                        yield entry.path, entry.stat()
+
+    def _get_size(self):
+        """ Gets total size of the store. """
+        if self._size is None:
+            self._size = sum(
+                stat.st_size for _, stat in self._iter_entries())
+
+        return self._size
+
+    def _evict(self, keep=None):
+        """ Removes least recently used subtitles
+        until the store fits in its maximum size. """
+        entries = sorted(
+            self._iter_entries(), key=lambda entry: entry[1].st_mtime)
+        self._size = sum(stat.st_size for _, stat in entries)
+
+        for filepath, stat in entries:
+            if self._size <= self.max_size:
+                break
+
+            if filepath != keep:
+                try:
+                    os.remove(filepath)
+                except OSError as error:
+                    LOG.warning(
+                        "Cannot evict %s from subtitle store: %s",
+                        filepath, error)
+                else:
+                    self._size -= stat.st_size
+
+
+# EOF
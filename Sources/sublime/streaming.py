@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : streaming.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import gzip
+import time
+import base64
+import socket
+import logging
+import xmlrpc.client
+
+from xml.parsers import expat
+
+from sublime.util import BUFFER_SIZE
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.streaming")
+
+
+# -----------------------------------------------------------------------------
+#
+# CountingResponse class
+#
+# -----------------------------------------------------------------------------
+class CountingResponse(object):
+
+    """ Wraps a HTTP response to count bytes received
+    (in metrics and by its transport). """
+
+    def __init__(self, response, transport=None):
+        """ Initializes instance. """
+        self._response = response
+        self._transport = transport
+
+    def read(self, *args):
+        if self._transport is not None:
+            self._transport.apply_timeout()
+        data = self._response.read(*args)
+        METRICS.incr('bytes_received', len(data))
+        if self._transport is not None:
+            self._transport.bytes_received += len(data)
+        return data
+
+    def __getattr__(self, attr):
+        return getattr(self._response, attr)
+
+
+# -----------------------------------------------------------------------------
+#
+# StreamingTransportMixin class
+#
+# -----------------------------------------------------------------------------
+class StreamingTransportMixin(object):
+
+    """ Adds to XMLRPC transports a way to get the HTTP response
+    of a request without parsing it, and deadlines to requests.
+
+    A request must be answered within timeout seconds, and before
+    the deadline of the run (a Deadline) if there is one: each read
+    of the response only waits for the time left. """
+
+    # Bytes received by the transport (responses are read in one thread)
+    bytes_received = 0
+
+    # Seconds allowed to a request (None waits forever)
+    timeout = None
+    # Deadline of the run
+    deadline = None
+    # When the request in progress expires (time.monotonic)
+    _expires = None
+
+    def send_request(self, host, handler, request_body, debug):
+        if self.deadline is not None:
+            self.deadline.check()
+
+        self._expires = None
+        if self.timeout is not None:
+            self._expires = time.monotonic() + self.timeout
+        if self.deadline is not None and (
+                self._expires is None or
+                self.deadline.expires < self._expires):
+            self._expires = self.deadline.expires
+
+        return super().send_request(host, handler, request_body, debug)
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        self.apply_timeout(connection)
+
+        return connection
+
+    def apply_timeout(self, connection=None):
+        """ Sets the timeout of the connection to the time left
+        to the request in progress, raises socket.timeout if none. """
+        timeout = None
+        if self._expires is not None:
+            timeout = self._expires - time.monotonic()
+            if timeout <= 0:
+                raise socket.timeout("Request timed out.")
+
+        connection = connection or self._connection[1]
+        if connection is not None:
+            # Used when connecting, then by the socket once connected
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+
+    def cancel(self):
+        """ Makes the request in progress fail as soon as possible,
+        can be called from another thread. """
+        self._expires = time.monotonic()
+
+        connection = self._connection[1]
+        if connection is not None and connection.sock is not None:
+            try:
+                # Wakes up a read waiting for data
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def stream_request(self, host, handler, request_body):
+        """ Sends a request and returns a file-like object
+        on the body of the response. """
+        try:
+            connection = self.send_request(host, handler, request_body, False)
+            response = connection.getresponse()
+        except Exception:
+            self.close()
+            raise
+
+        if response.status != 200:
+            response.read()
+            raise xmlrpc.client.ProtocolError(
+                host + handler, response.status, response.reason,
+                dict(response.getheaders()))
+
+        response = CountingResponse(response, self)
+
+        if response.getheader("Content-Encoding", "") == "gzip":
+            return gzip.GzipFile(mode='rb', fileobj=response)
+
+        return response
+
+    def send_content(self, connection, request_body):
+        METRICS.incr('requests')
+        METRICS.incr('bytes_sent', len(request_body))
+
+        return super().send_content(connection, request_body)
+
+    def parse_response(self, response):
+        return super().parse_response(CountingResponse(response, self))
+
+
+class StreamingTransport(StreamingTransportMixin, xmlrpc.client.Transport):
+
+    """ HTTP XMLRPC transport with streamed responses. """
+
+
+class SafeStreamingTransport(
+        StreamingTransportMixin, xmlrpc.client.SafeTransport):
+
+    """ HTTPS XMLRPC transport with streamed responses. """
+
+
+# -----------------------------------------------------------------------------
+#
+# StreamedResponse class
+#
+# -----------------------------------------------------------------------------
+class StreamedResponse(object):
+
+    """ XMLRPC response parsed while it is read.
+
+    The response must be a struct. Items of the array stored in its
+    rows member are yielded one by one when iterating over the response
+    and are never kept; other members are available like in a dictionary
+    once they have been parsed. When fields are given, only these members
+    of rows are kept. """
+
+    # Converters of XMLRPC scalar types
+    CONVERTERS = {
+        'string': str,
+        'int': int,
+        'i4': int,
+        'i8': int,
+        'double': float,
+        'boolean': lambda text: text.strip() == "1",
+        'base64': lambda text: base64.decodebytes(text.encode('ascii')),
+        'dateTime.iso8601': xmlrpc.client.DateTime,
+        'nil': lambda text: None,
+    }
+
+    def __init__(self, stream, rows_member='data', fields=None,
+                 on_abort=None):
+        """ Initializes instance. """
+        self.members = {}
+        self.rows_member = rows_member
+        self.fields = frozenset(fields) if fields else None
+
+        self._stream = stream
+        self._on_abort = on_abort
+        self._finished = False
+        self._fault = False
+        self._rows = []
+        self._stack = []
+        self._text = []
+        self._value = None
+        self._has_value = False
+
+        self._parser = expat.ParserCreate("utf-8")
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._text.append
+
+    def get(self, key, default=None):
+        """ Gets a member of the response. """
+        return self.members.get(key, default)
+
+    def __getitem__(self, key):
+        return self.members[key]
+
+    def __contains__(self, key):
+        return key in self.members
+
+    def __iter__(self):
+        """ Yields rows while the response is read. """
+        try:
+            while not self._finished:
+                data = self._stream.read(BUFFER_SIZE)
+                self._parser.Parse(data, not data)
+
+                if not data:
+                    self._finished = True
+                    self._stream.close()
+
+                rows, self._rows = self._rows, []
+                for row in rows:
+                    yield row
+        finally:
+            if not self._finished:
+                self.close()
+
+        if self._fault:
+            raise xmlrpc.client.Fault(
+                self.members.get('faultCode'),
+                self.members.get('faultString'))
+
+    def read(self):
+        """ Reads the whole response without keeping any row. """
+        for _ in self:
+            pass
+
+        return self
+
+    def close(self):
+        """ Stops reading the response. """
+        if not self._finished:
+            self._finished = True
+            self._stream.close()
+
+            # The connection is left in an unknown state
+            if self._on_abort:
+                self._on_abort()
+
+    def _start(self, tag, attrs):
+        del self._text[:]
+
+        if tag == 'value':
+            self._has_value = False
+        elif tag == 'struct':
+            # A struct directly inside the rows array is a row
+            is_row = bool(
+                self._stack and self._stack[-1][0] == 'array' and
+                self._stack[-1][2])
+            members = {}
+            if not self._stack:
+                # Top level struct is the response itself
+                self.members = members
+            self._stack.append(['struct', members, None, is_row])
+        elif tag == 'array':
+            # Array of rows is a member of the response struct
+            is_rows = (
+                len(self._stack) == 1 and self._stack[0][0] == 'struct' and
+                self._stack[0][2] == self.rows_member)
+            self._stack.append(['array', [], is_rows])
+        elif tag == 'fault':
+            self._fault = True
+
+    def _end(self, tag):
+        text = "".join(self._text)
+        del self._text[:]
+
+        if tag in StreamedResponse.CONVERTERS:
+            self._value = StreamedResponse.CONVERTERS[tag](text)
+            self._has_value = True
+        elif tag == 'name':
+            self._stack[-1][2] = text
+        elif tag in ('struct', 'array'):
+            self._value = self._stack.pop()[1]
+            self._has_value = True
+        elif tag == 'value':
+            if not self._has_value:
+                # Value without type is a string
+                self._value = text
+            self._add_value(self._value)
+            self._value = None
+            self._has_value = True
+
+    def _add_value(self, value):
+        """ Adds a parsed value to its container. """
+        if not self._stack:
+            return
+
+        frame = self._stack[-1]
+        if frame[0] == 'struct':
+            name = frame[2]
+            if not frame[3] or self.fields is None or name in self.fields:
+                frame[1][name] = value
+        elif frame[2]:
+            self._rows.append(value)
+        else:
+            frame[1].append(value)
+
+
+# EOF
@@ -14,8 +14,27 @@
 import re
 import os
 import sys
+import zlib
+import base64
 import logging
-import logging.config
+
+# Size of chunks used when streaming data
+BUFFER_SIZE = 64 * 1024
+
+# Logging configuration files by profile
+LOG_PROFILES = {
+    'default': 'logging.conf',
+    'production': 'logging-production.conf',
+}
+
+# Listener thread serving logging handlers
+_LOG_LISTENER = None
+
+# Permissions of created files, before the umask
+FILE_MODE = 0o666
+
+# Umask of the process, read once
+_UMASK = None
 
 
 # -----------------------------------------------------------------------------
@@ -33,21 +52,80 @@ def get_exe_dir():
     return exe_dir
 
 
-def init_logging():
-    """ Loads logging configuration file and inits logging system. """
+def get_cache_dir():
+    """ Gets cache directory of the user ($XDG_CACHE_HOME/sublime). """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+
+    return os.path.join(cache_home, 'sublime')
+
+
+def init_logging(profile=None):
+    """ Loads logging configuration file and inits logging system.
+
+    Handlers defined by the configuration file are moved behind a queue
+    served by a background thread, so logging never blocks callers.
+    The profile selects the configuration file: 'default' or 'production'
+    (SUBLIME_LOG_PROFILE environment variable when not given). """
+    import queue
+    import atexit
+    import logging.config
+    import logging.handlers
+
+    global _LOG_LISTENER
+
     exe_dir = get_exe_dir()
 
-    # Log directory
-    log_dir = os.path.join(exe_dir, 'logs')
+    # Configuration files refer to the application directory
+    os.environ.setdefault('SUBLIME_HOME', exe_dir)
+
+    # Log directory, where configuration files write logs
+    log_dir = os.path.join(os.environ['SUBLIME_HOME'], 'logs')
     if not os.path.exists(log_dir):
         os.mkdir(log_dir)
 
+    if profile is None:
+        profile = os.environ.get('SUBLIME_LOG_PROFILE', 'default')
+
     # Configuration file for logger
-    log_file = os.path.join(exe_dir, 'Config', 'logging.conf')
+    log_file = os.path.join(exe_dir, 'Config', LOG_PROFILES[profile])
+
     # Load configuration file
+    if _LOG_LISTENER is not None:
+        stop_logging()
+    else:
+        atexit.register(stop_logging)
     logging.config.fileConfig(log_file)
 
-    return logging.getLogger("tact")
+    # Handlers are served by a listener thread through a queue
+    log_queue = queue.Queue()
+    queue_handler = QueueHandler(log_queue)
+    handlers = []
+
+    for logger in (logging.getLogger(), logging.getLogger("sublime")):
+        for handler in logger.handlers[:]:
+            if handler not in handlers:
+                handlers.append(handler)
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+    _LOG_LISTENER = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    _LOG_LISTENER.start()
+
+    return logging.getLogger("sublime")
+
+
+def stop_logging():
+    """ Stops the logging listener thread once all queued records
+    are handled, and closes its handlers. """
+    global _LOG_LISTENER
+
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        for handler in _LOG_LISTENER.handlers:
+            handler.close()
+        _LOG_LISTENER = None
 
 
 def init_metadata():
@@ -66,6 +144,109 @@ def init_metadata():
     return metadata
 
 
+def iter_entry_points(group):
+    """ Returns entry points of installed packages for a group
+    without loading them. """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(group))
+
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, 'select'):
+        return list(all_entry_points.select(group=group))
+
+    return list(all_entry_points.get(group, []))
+
+
+def get_umask():
+    """ Returns the umask of the process. """
+    global _UMASK
+
+    if _UMASK is None:
+        # Umask can only be read by setting it
+        _UMASK = os.umask(0o022)
+        os.umask(_UMASK)
+
+    return _UMASK
+
+
+def set_file_mode(filepath):
+    """ Gives a file the permissions of a file created by open():
+    temporary files are only readable by their owner. """
+    os.chmod(filepath, FILE_MODE & ~get_umask())
+
+
+def iter_b64decode(encoded, chunk_size=BUFFER_SIZE):
+    """ Decodes a base64 string chunk by chunk
+    without building the whole decoded buffer. """
+    if isinstance(encoded, str):
+        encoded = encoded.encode('ascii')
+
+    remainder = b""
+    for start in range(0, len(encoded), chunk_size):
+        # Whitespaces are ignored by base64 but would break 4-bytes alignment
+        chunk = remainder + b"".join(
+            encoded[start:start + chunk_size].split())
+        aligned_size = len(chunk) - len(chunk) % 4
+        remainder = chunk[aligned_size:]
+
+        if aligned_size:
+            yield base64.standard_b64decode(chunk[:aligned_size])
+
+    if remainder:
+        # Let base64 raise an error about incorrect padding
+        yield base64.standard_b64decode(remainder)
+
+
+def iter_decompress(chunks, wbits=47, chunk_size=BUFFER_SIZE):
+    """ Decompresses gzip or zlib chunks one after the other
+    and yields decompressed data with a bounded size, raises zlib.error
+    if the compressed data is truncated. """
+    decompressor = zlib.decompressobj(wbits)
+
+    for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk, chunk_size)
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+
+    data = decompressor.flush()
+    if data:
+        yield data
+
+    if not decompressor.eof:
+        raise zlib.error("Compressed data is truncated.")
+
+
+# -----------------------------------------------------------------------------
+#
+# QueueHandler class
+#
+# -----------------------------------------------------------------------------
+class QueueHandler(logging.Handler):
+
+    """ Logging handler which puts records into a queue.
+
+    Only the message is merged with its arguments before queuing,
+    formatting is left to the handlers of the listener thread. """
+
+    def __init__(self, queue):
+        """ Initializes instance. """
+        logging.Handler.__init__(self)
+        self.queue = queue
+
+    def emit(self, record):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
 # -----------------------------------------------------------------------------
 #
 # Metadata class
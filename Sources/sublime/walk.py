@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : walk.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import os
+import time
+import queue
+import logging
+import threading
+import collections
+
+from sublime.metrics import METRICS
+
+# Logger
+LOG = logging.getLogger("sublime.walk")
+
+# Marks the end of the walk
+_END = object()
+
+
+# -----------------------------------------------------------------------------
+#
+# ParallelWalker class
+#
+# -----------------------------------------------------------------------------
+class ParallelWalker(object):
+
+    """ Walks through directory trees with a pool of threads
+    and yields filepaths of their files as soon as they are found.
+
+    Each thread lists directories from its own deque, depth first, and
+    steals the oldest directories of other threads when it has nothing
+    left, so deep trees and several roots are listed concurrently.
+    A directory is listed once even if it is reached twice (overlapping
+    roots, symbolic links loops), as they are identified by their device
+    and inode. Files are yielded through a bounded queue, so the walk
+    waits when they are not consumed fast enough. """
+
+    DEFAULT_WORKERS = 8
+    DEFAULT_QUEUE_SIZE = 1024
+
+    def __init__(
+            self, roots, workers=DEFAULT_WORKERS,
+            queue_size=DEFAULT_QUEUE_SIZE, follow_symlinks=True):
+        """ Initializes instance. """
+        self.roots = roots
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.follow_symlinks = follow_symlinks
+
+    def __iter__(self):
+        walk = _Walk(self)
+
+        try:
+            for filepath in walk.start():
+                yield filepath
+        finally:
+            walk.stop()
+
+    def __repr__(self):
+        return "<ParallelWalker('{}', '{}')>".format(
+            self.roots, self.workers)
+
+
+# -----------------------------------------------------------------------------
+#
+# _Walk class
+#
+# -----------------------------------------------------------------------------
+class _Walk(object):
+
+    """ State of one walk of a ParallelWalker. """
+
+    # Seconds an idle thread waits before looking for work again
+    IDLE_WAIT = 0.05
+
+    def __init__(self, walker):
+        """ Initializes instance. """
+        self.walker = walker
+        self._deques = [
+            collections.deque() for _ in range(walker.workers)]
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._seen = set()
+        self._files = queue.Queue(walker.queue_size)
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """ Starts threads and yields found filepaths. """
+        for number, root in enumerate(self.walker.roots):
+            self._push(number % len(self._deques), root)
+
+        if self._pending == 0:
+            return
+
+        for number in range(len(self._deques)):
+            thread = threading.Thread(
+                target=self._work, args=(number,),
+                name="walk-{}".format(number))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+        while True:
+            filepath = self._files.get()
+            if filepath is _END:
+                break
+            yield filepath
+
+    def stop(self):
+        """ Stops threads, even if files were not all consumed. """
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+
+    def _push(self, number, directory, stat=None):
+        """ Adds a directory to a deque if it was not seen yet. """
+        try:
+            if stat is None:
+                stat = os.stat(directory)
+        except OSError as error:
+            LOG.warning("Cannot walk through %s: %s", directory, error)
+            return
+
+        with self._condition:
+            key = (stat.st_dev, stat.st_ino)
+            if key in self._seen:
+                LOG.debug("Directory already walked through: %s", directory)
+                return
+
+            self._seen.add(key)
+            self._pending += 1
+            self._deques[number].append(directory)
+            self._condition.notify()
+
+    def _pop(self, number):
+        """ Returns next directory of a thread, stolen from another
+        thread if needed, or None when there is nothing left. """
+        with self._condition:
+            while not self._stopped.is_set():
+                if self._deques[number]:
+                    return self._deques[number].pop()
+
+                for other in self._deques:
+                    if other:
+                        METRICS.incr('scan_steals')
+                        return other.popleft()
+
+                if self._pending == 0:
+                    return None
+
+                self._condition.wait(self.IDLE_WAIT)
+
+        return None
+
+    def _work(self, number):
+        """ Lists directories until all of them are listed. """
+        while True:
+            directory = self._pop(number)
+            if directory is None:
+                break
+
+            try:
+                self._list(number, directory)
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    finished = self._pending == 0
+                    if finished:
+                        self._condition.notify_all()
+
+                if finished:
+                    self._emit(_END)
+
+    def _list(self, number, directory):
+        """ Lists a directory, adds its subdirectories to the deque
+        of the thread and yields its files. """
+        follow_symlinks = self.walker.follow_symlinks
+        start = time.perf_counter()
+        files = []
+
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            self._push(
+                                number, entry.path,
+                                entry.stat(follow_symlinks=follow_symlinks))
+                        elif entry.is_file():
+                            files.append(entry.path)
+                    except OSError as error:
+                        LOG.warning(
+                            "Cannot walk through %s: %s", entry.path, error)
+        except OSError as error:
+            LOG.warning("Cannot walk through %s: %s", directory, error)
+
+        METRICS.add_time('scan', time.perf_counter() - start)
+        METRICS.incr('scanned_files', len(files))
+
+        for filepath in files:
+            if not self._emit(filepath):
+                break
+
+    def _emit(self, item):
+        """ Passes an item to the consumer, returns False if the walk
+        was stopped before. """
+        while not self._stopped.is_set():
+            try:
+                self._files.put(item, timeout=self.IDLE_WAIT)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+
+# EOF
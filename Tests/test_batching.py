@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_batching.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+
+from sublime.batching import AdaptiveBatchSizer
+from sublime.metrics import METRICS
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeTransport class
+#
+# -----------------------------------------------------------------------------
+class FakeTransport(object):
+    """ Transport counting bytes received. """
+
+    bytes_received = 0
+
+
+# -----------------------------------------------------------------------------
+#
+# AdaptiveBatchSizerTestCase class
+#
+# -----------------------------------------------------------------------------
+class AdaptiveBatchSizerTestCase(unittest.TestCase):
+    """ Tests AdaptiveBatchSizer class. """
+
+    def setUp(self):
+        self.sizer = AdaptiveBatchSizer(
+            'tests', 1, 10, 20, target_latency=1.0, max_payload=1000, step=5)
+
+    def test_invalid_sizes(self):
+        """ Tests that sizes must be ordered. """
+        with self.assertRaises(ValueError):
+            AdaptiveBatchSizer('tests', 10, 5, 20)
+        with self.assertRaises(ValueError):
+            AdaptiveBatchSizer('tests', 0, 5, 20)
+
+    def test_grow(self):
+        """ Tests that size grows after fast and small full batches,
+        up to maximum. """
+        self.sizer.record(10, 0.1, 100)
+        self.assertEqual(self.sizer.size, 15)
+
+        self.sizer.record(15, 0.1, 100)
+        self.sizer.record(20, 0.1, 100)
+        self.assertEqual(self.sizer.size, 20)
+
+    def test_keep(self):
+        """ Tests that size is kept after a partial batch
+        or a batch close to limits. """
+        self.sizer.record(5, 0.1, 100)
+        self.sizer.record(10, 0.8, 100)
+        self.sizer.record(10, 0.1, 800)
+
+        self.assertEqual(self.sizer.size, 10)
+
+    def test_shrink(self):
+        """ Tests that size is halved after a slow, large or failed
+        batch, down to minimum. """
+        self.sizer.record(10, 2.0, 100)
+        self.assertEqual(self.sizer.size, 5)
+
+        self.sizer.record(5, 0.1, 2000)
+        self.assertEqual(self.sizer.size, 2)
+
+        self.sizer.record(2, 0.1, 0, error=True)
+        self.sizer.record(1, 0.1, 0, error=True)
+        self.assertEqual(self.sizer.size, 1)
+
+    def test_batches(self):
+        """ Tests that each batch is sized after previous requests. """
+        sizes = []
+        for batch in self.sizer.batches(range(100)):
+            sizes.append(len(batch))
+            self.sizer.record(len(batch), 0.1, 100)
+
+        self.assertEqual(sizes, [10, 15, 20, 20, 20, 15])
+
+    def test_measure(self):
+        """ Tests that requests are measured with bytes received
+        by their transport. """
+        transport = FakeTransport()
+
+        with self.sizer.measure(10, transport):
+            transport.bytes_received += 2000
+        self.assertEqual(self.sizer.size, 5)
+
+        with self.assertRaises(OSError):
+            with self.sizer.measure(5, transport):
+                raise OSError("failed")
+        self.assertEqual(self.sizer.size, 2)
+
+        with self.sizer.measure(2):
+            pass
+        self.assertEqual(self.sizer.size, 7)
+
+    def test_percentile(self):
+        """ Tests percentiles of latencies of successful requests. """
+        for latency in range(self.sizer.MIN_LATENCIES - 1):
+            self.sizer.record(1, latency / 100, 0)
+        self.assertIsNone(self.sizer.percentile(0.95))
+
+        self.sizer.record(1, 0.19, 0)
+        self.sizer.record(1, 10.0, 0, error=True)
+        self.assertEqual(self.sizer.percentile(0.5), 0.1)
+        self.assertEqual(self.sizer.percentile(0.95), 0.19)
+
+    def test_metrics(self):
+        """ Tests that batches are counted in metrics. """
+        METRICS.reset()
+        self.sizer.record(10, 0.1, 100)
+        self.sizer.record(4, 0.1, 100)
+
+        report = METRICS.report()
+        self.assertEqual(report['counters']['tests_batches'], 2)
+        self.assertEqual(report['counters']['tests_batch_items'], 14)
+        self.assertEqual(report['values']['tests_batch_size'], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_benchmarks.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import random
+import tempfile
+
+import babelfish
+
+from sublime.core import Video
+from sublime.core import Subtitle
+from sublime.fileio import VideoFile
+from sublime.providers.opensubtitles import OpenSubtitlesServer
+
+from Benchmarks.library import load_video_signatures
+from Benchmarks.library import write_sparse_video
+from Benchmarks.library import make_library
+from Benchmarks.provider import LocalProvider
+from Benchmarks.provider import SUBTITLE_DATA
+
+
+# -----------------------------------------------------------------------------
+#
+# LibraryTestCase class
+#
+# -----------------------------------------------------------------------------
+class LibraryTestCase(unittest.TestCase):
+    """ Tests the synthetic library generator. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_signatures(self):
+        """ Tests that every generated header is recognized. """
+        signatures = load_video_signatures()
+        file_magic = Video.get_file_magic()
+
+        self.assertIn('.mkv', [extension for extension, _ in signatures])
+        for extension, header in signatures:
+            self.assertIn(
+                extension,
+                file_magic.get_video_signature(
+                    'video' + extension, header).extensions)
+
+    def test_mkv_tracks(self):
+        """ Tests that embedded subtitle tracks are found in a MKV. """
+        filepath = os.path.join(self.directory.name, 'video.mkv')
+        write_sparse_video(
+            filepath, None, 1024 * 1024, random.Random(0), ['eng', 'fre'])
+
+        video = Video(filepath)
+        with VideoFile(filepath) as video_file:
+            video.signature = Video.get_video_signature(filepath)
+            video.probe_embedded_languages(video_file)
+
+        self.assertTrue(Video.is_mkv(video.signature))
+        self.assertTrue(video.has_subtitle(babelfish.Language('fra')))
+        self.assertFalse(video.has_subtitle(babelfish.Language('spa')))
+
+    def test_make_library(self):
+        """ Tests that a library is made of sparse files
+        and is the same for a given seed. """
+        sizes = dict(min_size=1024 * 1024, max_size=2 * 1024 * 1024)
+        counts = make_library(self.directory.name, 20, seed=1, **sizes)
+
+        with tempfile.TemporaryDirectory() as other_directory:
+            self.assertEqual(
+                make_library(other_directory, 20, seed=1, **sizes), counts)
+
+        filepaths = [
+            os.path.join(root, name)
+            for root, _, files in os.walk(self.directory.name)
+            for name in files
+        ]
+        videos = [
+            filepath for filepath in filepaths
+            if Video.get_file_magic().is_video_extension(filepath)]
+
+        self.assertEqual(
+            len(videos), counts['videos'] + counts['links'])
+        for filepath in videos:
+            stat = os.stat(filepath)
+            self.assertLess(stat.st_blocks * 512, stat.st_size)
+
+
+# -----------------------------------------------------------------------------
+#
+# LocalProviderTestCase class
+#
+# -----------------------------------------------------------------------------
+class LocalProviderTestCase(unittest.TestCase):
+    """ Tests the local stand-in of OpenSubtitles. """
+
+    def test_download(self):
+        """ Tests searching and downloading subtitles
+        with OpenSubtitlesServer. """
+        with tempfile.TemporaryDirectory() as directory, \
+                LocalProvider(miss_ratio=0) as local_provider:
+            video = Video(os.path.join(directory, 'video.avi'), 1234)
+            video.inode = (0, 1)
+            video.hashes = {
+                OpenSubtitlesServer.HASH_ALGORITHM: '0123456789abcdef'}
+            video.languages_to_download = [babelfish.Language('eng')]
+
+            server = OpenSubtitlesServer()
+            server.xmlrpc_uri = local_provider.uri
+            server.connect()
+            try:
+                server.download_subtitles(
+                    [video], [babelfish.Language('eng')])
+            finally:
+                server.disconnect()
+
+            subtitle = Subtitle(
+                '', babelfish.Language('eng'), video, extension='srt')
+            with open(subtitle.filepath, 'rb') as subtitle_file:
+                self.assertEqual(subtitle_file.read(), SUBTITLE_DATA)
+
+            self.assertEqual(local_provider.calls['SearchSubtitles'], 1)
+            self.assertEqual(local_provider.calls['DownloadSubtitles'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -15,8 +15,15 @@ import unittest
 import os
 import shutil
 
+import babelfish
+
 from sublime.util import get_exe_dir
+from sublime.util import get_umask
+from sublime.core import Video
+from sublime.core import Movie
 from sublime.core import Episode
+from sublime.core import Subtitle
+from sublime.core import SubtitleSelector
 from sublime.core import NamePattern as pattern
 
 
@@ -65,6 +72,24 @@ class EpisodeTestCase(unittest.TestCase):
         self.assertTrue(os.path.exists(
             self.expected_renamed_video_filename_without_underscore))
 
+    def test_pattern_by_call(self):
+        """ Tests that a pattern given to rename is only used
+        by this call, so concurrent jobs can use their own. """
+        new_pattern = "{serie_name}_{season}x{episode:02d}_{episode_name}"
+        default_pattern = Episode.RENAME_PATTERN
+
+        episode = Episode(self.video_filename)
+        episode.name = "Twin Peaks"
+        episode.season = 1
+        episode.episode = 1
+        episode.episode_name = "Pilot"
+
+        episode.rename(new_pattern, underscore=True)
+        self.assertTrue(os.path.exists(
+            self.expected_renamed_new_pattern_video_filename))
+        self.assertEqual(Episode.RENAME_PATTERN, default_pattern)
+        self.assertTrue(Video.UNDERSCORE)
+
     def tearDown(self):
         """ Clean up """
         if os.path.exists(self.expected_renamed_video_filename):
@@ -83,6 +108,171 @@ class EpisodeTestCase(unittest.TestCase):
                 self.video_filename)
 
 
+# -----------------------------------------------------------------------------
+#
+# VideoTestCase class
+#
+# -----------------------------------------------------------------------------
+class VideoTestCase(unittest.TestCase):
+    """ Tests Video class functions. """
+
+    def setUp(self):
+        self.video_filename = os.path.join(
+            get_exe_dir(), 'Tests', 'Fixtures', 'movie.avi')
+        self.french = babelfish.Language('fra')
+        self.english = babelfish.Language('eng')
+
+    def test_compact_video(self):
+        """ Tests that videos have integer ids, numeric sizes
+        and no instance dictionary. """
+        video = Video(self.video_filename)
+        episode = Episode(self.video_filename, 1234)
+
+        self.assertIsInstance(video.id, int)
+        self.assertNotEqual(video.id, episode.id)
+        self.assertEqual(video.size, os.path.getsize(self.video_filename))
+        self.assertEqual(episode.size, 1234)
+        self.assertFalse(hasattr(video, '__dict__'))
+        self.assertFalse(hasattr(episode, '__dict__'))
+
+    def test_languages_to_download(self):
+        """ Tests that languages to download behave like a list. """
+        video = Video(self.video_filename)
+        self.assertEqual(len(video.languages_to_download), 0)
+
+        video.languages_to_download.append(self.french)
+        video.languages_to_download.extend([self.english, self.french])
+
+        self.assertIn(self.french, video.languages_to_download)
+        self.assertEqual(len(video.languages_to_download), 2)
+        self.assertEqual(
+            video.languages_to_download, [self.english, self.french])
+
+        video.languages_to_download.remove(self.english)
+        self.assertNotIn(self.english, video.languages_to_download)
+
+        video.languages_to_download = [self.english]
+        self.assertEqual(list(video.languages_to_download), [self.english])
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitleTestCase class
+#
+# -----------------------------------------------------------------------------
+class SubtitleTestCase(unittest.TestCase):
+    """ Tests Subtitle class functions. """
+
+    def setUp(self):
+        self.video = Episode(os.path.join(
+            get_exe_dir(), 'Tests', 'Fixtures', 'movie.avi'))
+        self.subtitle = Subtitle(
+            "1", babelfish.Language('fra'), self.video, 5.0, "srt")
+        self.fixtures_dir = os.path.dirname(self.video.filename)
+
+    def test_write_chunks(self):
+        """ Tests that a subtitle is written from chunks. """
+        filepath = self.subtitle.write(iter([b"Bon", b"jour"]))
+
+        self.assertEqual(filepath, self.subtitle.filepath)
+        with open(filepath, 'rb') as sub_file:
+            self.assertEqual(sub_file.read(), b"Bonjour")
+
+        # Readable by others like any file, not only by its owner
+        self.assertEqual(
+            os.stat(filepath).st_mode & 0o777, 0o666 & ~get_umask())
+
+    def test_write_is_atomic(self):
+        """ Tests that a failing write leaves no partial file. """
+        def failing_chunks():
+            yield b"Bon"
+            raise IOError("Connection lost")
+
+        with self.assertRaises(IOError):
+            self.subtitle.write(failing_chunks())
+
+        self.assertFalse(os.path.exists(self.subtitle.filepath))
+        self.assertFalse([
+            name for name in os.listdir(self.fixtures_dir)
+            if name.endswith(".part")])
+
+    def test_filepath(self):
+        """ Tests filepath language codes and that it follows
+        renamed videos. """
+        self.assertEqual(
+            self.subtitle.filepath,
+            os.path.join(self.fixtures_dir, "movie.fr.srt"))
+
+        # Asturian has no alpha2 code
+        subtitle = Subtitle("2", babelfish.Language('ast'), self.video)
+        subtitle.extension = "srt"
+        self.assertEqual(
+            os.path.basename(subtitle.filepath), "movie.ast.srt")
+
+        video = Episode(os.path.join(self.fixtures_dir, "renamed.avi"), 0)
+        self.subtitle.video = video
+        self.assertEqual(
+            os.path.basename(self.subtitle.filepath), "renamed.fr.srt")
+        video.filename = os.path.join(self.fixtures_dir, "other.avi")
+        self.assertEqual(
+            os.path.basename(self.subtitle.filepath), "other.fr.srt")
+        self.subtitle.video = self.video
+
+    def tearDown(self):
+        """ Clean up """
+        if os.path.exists(self.subtitle.filepath):
+            os.remove(self.subtitle.filepath)
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitleSelectorTestCase class
+#
+# -----------------------------------------------------------------------------
+class SubtitleSelectorTestCase(unittest.TestCase):
+    """ Tests SubtitleSelector class functions. """
+
+    def setUp(self):
+        video_filename = os.path.join(
+            get_exe_dir(), 'Tests', 'Fixtures', 'movie.avi')
+        self.video = Episode(video_filename)
+        self.other_video = Episode(video_filename)
+        self.french = babelfish.Language('fra')
+        self.english = babelfish.Language('eng')
+
+    def test_select_best_per_video_and_language(self):
+        """ Tests that the highest rated subtitle is kept
+        for each video and language. """
+        subtitles = [
+            Subtitle("1", self.french, self.video, 5.0, "srt"),
+            Subtitle("2", self.english, self.video, 8.0, "srt"),
+            Subtitle("3", self.french, self.video, 7.5, "sub"),
+            Subtitle("4", self.french, self.other_video, 1.0, "srt"),
+            Subtitle("5", self.english, self.video, 2.0, "srt"),
+        ]
+
+        selected = SubtitleSelector().select(subtitles)
+
+        self.assertEqual(
+            sorted(subtitle.id for subtitle in selected), ["2", "3", "4"])
+
+    def test_select_with_scorers(self):
+        """ Tests that scorers are used in order to break ties. """
+        subtitles = [
+            Subtitle("1", self.french, self.video, 5.0, "sub", 10),
+            Subtitle("2", self.french, self.video, 5.0, "srt", 5),
+            Subtitle("3", self.french, self.video, 5.0, "srt", 7),
+        ]
+
+        selector = SubtitleSelector()
+        self.assertEqual(selector.select(subtitles)[0].id, "1")
+
+        selector = SubtitleSelector([
+            SubtitleSelector.format_preference(("srt", "sub")),
+            SubtitleSelector.downloads])
+        self.assertEqual(selector.select(subtitles)[0].id, "3")
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_daemon.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import stat
+import tempfile
+import threading
+
+from unittest import mock
+
+import sublime
+
+from sublime import cli
+from sublime.client import DaemonClient
+from sublime.client import DaemonError
+from sublime.daemon import Daemon
+from sublime.daemon import DaemonRunningError
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeProvider class
+#
+# -----------------------------------------------------------------------------
+class FakeProvider(object):
+
+    """ Provider recording connections and videos it is asked for. """
+
+    code = "fake"
+    HASH_ALGORITHM = "md5"
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.connected = False
+        self.connections = 0
+        self.store = None
+        self.videos = []
+
+    def connect(self):
+        self.connected = True
+        self.connections += 1
+
+    def disconnect(self):
+        self.connected = False
+
+    def download_subtitles(
+            self, videos, languages,
+            rename=False, rename_pattern=None, underscore=True):
+        """ Records videos of a batch. """
+        self.videos.extend(
+            (os.path.basename(video.filename),
+             [language.alpha3 for language in video.languages_to_download])
+            for video in videos)
+
+
+# -----------------------------------------------------------------------------
+#
+# DaemonTestCase class
+#
+# -----------------------------------------------------------------------------
+class DaemonTestCase(unittest.TestCase):
+    """ Tests Daemon and DaemonClient classes. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        # Video files start with the AVI magic number
+        for name in ('a.avi', 'b.avi'):
+            with open(os.path.join(self.directory.name, name), 'w') as f:
+                f.write('RIFF' + name)
+
+        patcher = mock.patch(
+            'guessit.guess_movie_info', create=True,
+            return_value={'type': 'video'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.socket_path = os.path.join(self.directory.name, 'sublime.sock')
+        self.provider = FakeProvider()
+        self.daemon = Daemon([self.provider], self.socket_path)
+        self.thread = threading.Thread(target=self.daemon.serve)
+        self.thread.start()
+        self.addCleanup(self._stop)
+
+        self.client = DaemonClient(self.socket_path, timeout=10)
+
+    def _stop(self):
+        if self.thread.is_alive():
+            self.daemon.shutdown()
+            self.thread.join()
+
+    def test_ping(self):
+        """ Tests that the daemon answers with its version. """
+        response = self.client.ping()
+
+        self.assertEqual(response['version'], sublime.__version__)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+
+    def test_run(self):
+        """ Tests that jobs reuse connected providers. """
+        for _ in range(2):
+            response = self.client.run(
+                directories=[self.directory.name], languages=['eng'])
+            self.assertEqual(response['videos'], 2)
+
+        self.assertEqual(self.provider.connections, 1)
+        self.assertEqual(
+            sorted(self.provider.videos),
+            [('a.avi', ['eng'])] * 2 + [('b.avi', ['eng'])] * 2)
+
+    def test_errors(self):
+        """ Tests that errors are returned to the client. """
+        with self.assertRaises(DaemonError):
+            self.client.request('unknown')
+        with self.assertRaises(DaemonError):
+            self.client.run(directories=[self.directory.name], languages=[])
+
+        # The daemon still serves after errors
+        self.client.ping()
+
+    def test_forward(self):
+        """ Tests that the command line only sends jobs to the daemon
+        when asked to, and only if it can apply all their options. """
+        def forward(*argv):
+            return cli.forward(cli._make_parser().parse_args(
+                ['-d', self.directory.name, '-l', 'eng'] + list(argv)))
+
+        self.assertFalse(forward())
+        self.assertFalse(forward('--socket', self.socket_path, '--no-cache'))
+        self.assertFalse(forward(
+            '--socket', self.socket_path, '--workers', '2'))
+        self.assertEqual(self.provider.videos, [])
+
+        self.assertTrue(forward('--socket', self.socket_path))
+        self.assertEqual(len(self.provider.videos), 2)
+
+        self.assertEqual(
+            cli._local_options(cli._make_parser().parse_args(
+                ['-d', '.', '--no-cache', '--provider', 'os'])),
+            ['--provider', '--cache-dir'])
+
+    def test_stats(self):
+        """ Tests that metrics of the daemon are returned. """
+        self.client.run(
+            video_files=[os.path.join(self.directory.name, 'a.avi')],
+            languages=['eng'])
+
+        self.assertIn('batches', self.client.stats()['counters'])
+
+    def test_already_running(self):
+        """ Tests that a second daemon can't use the same socket. """
+        with self.assertRaises(DaemonRunningError):
+            Daemon([], self.socket_path)
+
+    def test_shutdown(self):
+        """ Tests that shutdown stops the daemon and cleans up. """
+        self.client.shutdown()
+        self.thread.join(10)
+
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertFalse(self.provider.connected)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
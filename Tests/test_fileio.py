@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_fileio.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import io
+
+from unittest import mock
+
+from sublime.util import get_exe_dir
+from sublime.fileio import VideoFile
+
+from sublime.providers.opensubtitles import OpenSubtitlesServer
+
+
+# -----------------------------------------------------------------------------
+#
+# VideoFileTestCase class
+#
+# -----------------------------------------------------------------------------
+class VideoFileTestCase(unittest.TestCase):
+    """ Tests VideoFile class. """
+
+    def setUp(self):
+        self.filepath = os.path.join(
+            get_exe_dir(), 'Tests', 'Fixtures', 'hashcode.txt')
+        with open(self.filepath, 'rb') as video_file:
+            self.content = video_file.read()
+
+    def test_pread(self):
+        """ Tests that reads don't depend on a file position. """
+        with VideoFile(self.filepath) as video_file:
+            self.assertEqual(video_file.size, len(self.content))
+            self.assertEqual(video_file.pread(10, 100), self.content[100:110])
+            self.assertEqual(video_file.pread(10, 0), self.content[:10])
+
+        self.assertIsNone(video_file.fd)
+
+    def test_open(self):
+        """ Tests the file object on a VideoFile. """
+        with VideoFile(self.filepath) as video_file:
+            file_object = video_file.open()
+
+            self.assertEqual(file_object.read(4), self.content[:4])
+            file_object.seek(-4, io.SEEK_END)
+            self.assertEqual(file_object.read(), self.content[-4:])
+            file_object.seek(10)
+            self.assertEqual(file_object.tell(), 10)
+
+    @unittest.skipUnless(
+        hasattr(os, 'posix_fadvise'), "posix_fadvise is not available")
+    def test_io_hints(self):
+        """ Tests that read ranges are announced and dropped on close. """
+        with mock.patch('os.posix_fadvise') as fadvise:
+            with VideoFile(self.filepath, io_hints=True) as video_file:
+                video_file.will_need((0, 10), (100, 20))
+                video_file.pread(10, 0)
+                video_file.pread(10, 10)
+                video_file.pread(20, 100)
+                fd = video_file.fd
+
+        self.assertEqual(fadvise.call_args_list, [
+            mock.call(fd, 0, 0, os.POSIX_FADV_RANDOM),
+            mock.call(fd, 0, 10, os.POSIX_FADV_WILLNEED),
+            mock.call(fd, 100, 20, os.POSIX_FADV_WILLNEED),
+            mock.call(fd, 0, 20, os.POSIX_FADV_DONTNEED),
+            mock.call(fd, 100, 20, os.POSIX_FADV_DONTNEED),
+        ])
+
+    def test_no_io_hints(self):
+        """ Tests that no hint is given when they are disabled. """
+        with mock.patch('os.posix_fadvise', create=True) as fadvise, \
+                mock.patch('os.open', wraps=os.open) as os_open:
+            with VideoFile(self.filepath, io_hints=False) as video_file:
+                video_file.will_need((0, 10))
+                video_file.pread(10, 0)
+
+        fadvise.assert_not_called()
+        self.assertEqual(os_open.call_count, 1)
+        self.assertFalse(
+            os_open.call_args[0][1] & getattr(os, 'O_NOATIME', 0))
+
+    @unittest.skipUnless(
+        hasattr(os, 'O_NOATIME'), "O_NOATIME is not available")
+    def test_noatime_not_permitted(self):
+        """ Tests that a file not owned is opened without O_NOATIME. """
+        os_open = os.open
+
+        def open_not_owned(filepath, flags, *args):
+            if flags & os.O_NOATIME:
+                raise PermissionError(filepath)
+            return os_open(filepath, flags, *args)
+
+        with mock.patch('os.open', side_effect=open_not_owned):
+            with VideoFile(self.filepath, io_hints=True) as video_file:
+                self.assertEqual(video_file.pread(4, 0), self.content[:4])
+
+    def test_hashcode_from_video_file(self):
+        """ Tests that a hash code is computed from an opened VideoFile. """
+        server = OpenSubtitlesServer()
+
+        with VideoFile(self.filepath) as video_file:
+            self.assertEqual(server.hashcode(video_file), "13fb1d63375cf197")
+            self.assertIsNotNone(video_file.fd)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_hashing.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import hashlib
+import tempfile
+
+from sublime.util import get_exe_dir
+from sublime.core import VideoSizeError
+from sublime.fileio import VideoFile
+from sublime.hashing import BLOCK_SIZE
+from sublime.hashing import HashingService
+from sublime.hashing import hash_video
+from sublime.metrics import METRICS
+
+from sublime.providers.opensubtitles import OpenSubtitlesServer
+
+
+# -----------------------------------------------------------------------------
+#
+# HashingServiceTestCase class
+#
+# -----------------------------------------------------------------------------
+class HashingServiceTestCase(unittest.TestCase):
+    """ Tests HashingService class. """
+
+    def setUp(self):
+        self.filepath = os.path.join(
+            get_exe_dir(), 'Tests', 'Fixtures', 'hashcode.txt')
+        with open(self.filepath, 'rb') as video_file:
+            self.content = video_file.read()
+
+        self.head = self.content[:BLOCK_SIZE]
+        self.tail = self.content[-BLOCK_SIZE:]
+
+        METRICS.reset()
+
+    def test_block_algorithms(self):
+        """ Tests that block algorithms share one read
+        of first and last blocks. """
+        service = HashingService(['opensubtitles', 'subdb'])
+
+        with VideoFile(self.filepath) as video_file:
+            digests = service.compute(video_file)
+
+        self.assertEqual(digests, {
+            'opensubtitles': "13fb1d63375cf197",
+            'subdb': hashlib.md5(self.head + self.tail).hexdigest(),
+        })
+        self.assertEqual(METRICS.counters['bytes_read'], 2 * BLOCK_SIZE)
+
+    def test_stream_algorithms(self):
+        """ Tests that the file is read once for all algorithms
+        when one of them needs the whole file. """
+        service = HashingService(['opensubtitles', 'subdb', 'md5', 'sha1'])
+
+        with VideoFile(self.filepath) as video_file:
+            digests = service.compute(video_file)
+
+        self.assertEqual(digests, {
+            'opensubtitles': "13fb1d63375cf197",
+            'subdb': hashlib.md5(self.head + self.tail).hexdigest(),
+            'md5': hashlib.md5(self.content).hexdigest(),
+            'sha1': hashlib.sha1(self.content).hexdigest(),
+        })
+        self.assertEqual(METRICS.counters['bytes_read'], len(self.content))
+
+    def test_small_file(self):
+        """ Tests that a hash code which can't be computed
+        doesn't prevent others. """
+        with tempfile.NamedTemporaryFile() as small_file:
+            small_file.write(b"small video")
+            small_file.flush()
+
+            service = HashingService(['opensubtitles', 'subdb', 'md5'])
+            with VideoFile(small_file.name) as video_file:
+                digests = service.compute(video_file)
+
+            self.assertEqual(digests, {
+                'opensubtitles': None,
+                'subdb': hashlib.md5(b"small video" * 2).hexdigest(),
+                'md5': hashlib.md5(b"small video").hexdigest(),
+            })
+
+            with self.assertRaises(VideoSizeError):
+                hash_video(small_file.name, 'opensubtitles')
+
+    def test_for_providers(self):
+        """ Tests that algorithms are those of providers. """
+        service = HashingService.for_providers([OpenSubtitlesServer()])
+
+        self.assertEqual(service.names, ['opensubtitles'])
+
+    def test_unknown_algorithm(self):
+        """ Tests that an unknown algorithm is refused. """
+        with self.assertRaises(ValueError):
+            HashingService(['unknown'])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_hedging.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import time
+import socket
+import threading
+
+from sublime.hedging import Attempt
+from sublime.hedging import Deadline
+from sublime.hedging import DeadlineExceeded
+
+
+# -----------------------------------------------------------------------------
+#
+# DeadlineTestCase class
+#
+# -----------------------------------------------------------------------------
+class DeadlineTestCase(unittest.TestCase):
+    """ Tests Deadline class. """
+
+    def test_deadline(self):
+        """ Tests that a deadline expires. """
+        deadline = Deadline(0.05)
+        self.assertFalse(deadline.expired)
+        self.assertGreater(deadline.remaining(), 0)
+        deadline.check()
+
+        time.sleep(0.1)
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check()
+
+    def test_timeout(self):
+        """ Tests that an exceeded deadline is a timeout. """
+        self.assertTrue(issubclass(DeadlineExceeded, socket.timeout))
+
+
+# -----------------------------------------------------------------------------
+#
+# AttemptTestCase class
+#
+# -----------------------------------------------------------------------------
+class AttemptTestCase(unittest.TestCase):
+    """ Tests Attempt class. """
+
+    def setUp(self):
+        self.finished = threading.Event()
+
+    def _attempt(self, delay, value):
+        def request(transport, value):
+            time.sleep(delay)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        return Attempt(
+            request, "transport", (value,), self.finished)
+
+    def test_first_success(self):
+        """ Tests that the first attempt which succeeds is used. """
+        attempts = [
+            self._attempt(0.2, "slow"), self._attempt(0.0, OSError()),
+            self._attempt(0.05, "fast")]
+
+        attempt = Attempt.first(attempts, self.finished)
+
+        self.assertEqual(attempt.result, "fast")
+        self.assertGreater(attempt.latency, 0)
+
+    def test_all_failed(self):
+        """ Tests that the first attempt is returned if all failed. """
+        errors = [OSError("first"), OSError("second")]
+        attempts = [
+            self._attempt(0.05, errors[0]), self._attempt(0.0, errors[1])]
+
+        attempt = Attempt.first(attempts, self.finished)
+
+        self.assertIs(attempt.error, errors[0])
+        self.assertTrue(all(attempt.done for attempt in attempts))
+
+    def test_timeout(self):
+        """ Tests that waiting for attempts stops after a timeout. """
+        attempts = [self._attempt(0.2, "slow")]
+
+        self.assertIsNone(Attempt.first(attempts, self.finished, 0.01))
+        self.assertEqual(
+            Attempt.first(attempts, self.finished).result, "slow")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_jobs.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import tempfile
+
+import babelfish
+
+from sublime.jobs import Shard
+from sublime.jobs import JobQueue
+
+
+# -----------------------------------------------------------------------------
+#
+# ShardTestCase class
+#
+# -----------------------------------------------------------------------------
+class ShardTestCase(unittest.TestCase):
+    """ Tests Shard class. """
+
+    def test_parse(self):
+        """ Tests parsing of i/N. """
+        shard = Shard.parse("2/3")
+
+        self.assertEqual((shard.number, shard.count), (2, 3))
+        self.assertEqual(str(shard), "2/3")
+
+        for text in ("0/3", "4/3", "1/0", "1", "a/b", "1/2/3"):
+            with self.assertRaises(ValueError):
+                Shard.parse(text)
+
+    def test_contains(self):
+        """ Tests that each key is in exactly one shard
+        and that shards are balanced. """
+        shards = [Shard(number, 4) for number in range(1, 5)]
+        keys = ["{:016x}".format(size) for size in range(1000)]
+
+        sizes = [0] * 4
+        for key in keys:
+            found = [shard.number for shard in shards if shard.contains(key)]
+            self.assertEqual(len(found), 1)
+            sizes[found[0] - 1] += 1
+
+        for size in sizes:
+            self.assertGreater(size, 200)
+
+        self.assertTrue(all(Shard(1, 1).contains(key) for key in keys))
+
+
+# -----------------------------------------------------------------------------
+#
+# JobQueueTestCase class
+#
+# -----------------------------------------------------------------------------
+class JobQueueTestCase(unittest.TestCase):
+    """ Tests JobQueue class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.db_path = os.path.join(self.directory.name, 'jobs.db')
+        self.video_path = os.path.join(self.directory.name, 'movie.avi')
+        with open(self.video_path, 'wb') as video_file:
+            video_file.write(b'RIFF')
+
+        self.english = babelfish.Language('eng')
+        self.french = babelfish.Language('fra')
+
+    def test_hashes(self):
+        """ Tests that hash codes are kept while the file is unchanged. """
+        stat = os.stat(self.video_path)
+
+        with JobQueue(self.db_path) as jobs:
+            self.assertIsNone(jobs.get_hashes(self.video_path, stat))
+            jobs.record_hashes(self.video_path, stat, {'md5': 'abc'})
+            self.assertEqual(
+                jobs.get_hashes(self.video_path, stat), {'md5': 'abc'})
+            self.assertEqual(jobs.counts(), {JobQueue.HASHED: 1})
+
+        os.utime(self.video_path, ns=(0, stat.st_mtime_ns + 1))
+        with JobQueue(self.db_path) as jobs:
+            self.assertIsNone(
+                jobs.get_hashes(self.video_path, os.stat(self.video_path)))
+
+    def test_done(self):
+        """ Tests that videos are done by language and that it persists. """
+        stat = os.stat(self.video_path)
+
+        with JobQueue(self.db_path) as jobs:
+            jobs.record_hashes(self.video_path, stat, {'md5': 'abc'})
+            self.assertFalse(
+                jobs.is_done(self.video_path, stat, [self.english]))
+
+            jobs.mark_done([self.video_path], [self.english])
+            jobs.mark_done(
+                [os.path.join(self.directory.name, 'unknown.avi')],
+                [self.english])
+
+        with JobQueue(self.db_path) as jobs:
+            self.assertTrue(
+                jobs.is_done(self.video_path, stat, [self.english]))
+            self.assertFalse(jobs.is_done(
+                self.video_path, stat, [self.english, self.french]))
+
+            jobs.mark_done([self.video_path], [self.french])
+            self.assertTrue(jobs.is_done(
+                self.video_path, stat, [self.english, self.french]))
+            self.assertEqual(jobs.counts(), {JobQueue.DONE: 1})
+
+            # Hashing again (file changed) starts over
+            jobs.record_hashes(self.video_path, stat, {'md5': 'def'})
+            self.assertFalse(
+                jobs.is_done(self.video_path, stat, [self.english]))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
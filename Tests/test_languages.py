@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_languages.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+
+import babelfish
+
+from sublime import languages
+
+
+# -----------------------------------------------------------------------------
+#
+# LanguagesTestCase class
+#
+# -----------------------------------------------------------------------------
+class LanguagesTestCase(unittest.TestCase):
+    """ Tests language lookup tables. """
+
+    def test_from_opensubtitles(self):
+        """ Tests OpenSubtitles codes against babelfish. """
+        for code in ("fre", "eng", "pob", "scc", "ell", "zht"):
+            self.assertEqual(
+                languages.from_opensubtitles(code),
+                babelfish.Language.fromopensubtitles(code))
+
+        self.assertIsNone(languages.from_opensubtitles("xxx"))
+
+    def test_to_opensubtitles(self):
+        """ Tests OpenSubtitles codes of languages. """
+        for language in (
+                babelfish.Language('fra'), babelfish.Language('por', 'BR')):
+            self.assertEqual(
+                languages.opensubtitles_code(language),
+                language.opensubtitles)
+
+    def test_from_alpha3b_and_name(self):
+        """ Tests codes and names of mkv tracks. """
+        french = babelfish.Language('fra')
+
+        self.assertEqual(languages.from_alpha3b("fre"), french)
+        self.assertEqual(languages.from_name("French"), french)
+        self.assertIsNone(languages.from_alpha3b("xxx"))
+        self.assertIsNone(languages.from_name("Subtitles"))
+
+        # Languages are interned
+        self.assertIs(
+            languages.from_alpha3b("fre"),
+            languages.from_opensubtitles("fre"))
+
+    def test_file_code(self):
+        """ Tests that alpha2 is preferred to alpha3. """
+        self.assertEqual(languages.file_code(babelfish.Language('fra')), "fr")
+        self.assertEqual(
+            languages.file_code(babelfish.Language('por', 'BR')), "pt")
+        self.assertEqual(
+            languages.file_code(babelfish.Language('ast')), "ast")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_metrics.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import json
+import tempfile
+
+from sublime.metrics import Metrics
+
+
+# -----------------------------------------------------------------------------
+#
+# MetricsTestCase class
+#
+# -----------------------------------------------------------------------------
+class MetricsTestCase(unittest.TestCase):
+    """ Tests Metrics class. """
+
+    def test_timers_and_counters(self):
+        """ Tests that timers and counters are reported. """
+        metrics = Metrics()
+
+        with metrics.timer('hash'):
+            pass
+        with metrics.timer('hash'):
+            pass
+        metrics.incr('bytes_read', 100)
+        metrics.incr('bytes_read', 28)
+        metrics.record('batch_size', 20)
+
+        self.assertEqual(
+            list(metrics.iter_timed('scan', range(3))), [0, 1, 2])
+
+        report = metrics.report()
+        self.assertEqual(report['timers']['hash']['count'], 2)
+        self.assertEqual(report['timers']['scan']['count'], 4)
+        self.assertEqual(report['counters'], {'bytes_read': 128})
+        self.assertEqual(report['values'], {'batch_size': 20})
+
+    def test_dump(self):
+        """ Tests that report is written as JSON. """
+        metrics = Metrics()
+        metrics.incr('files')
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, "metrics.json")
+            metrics.dump(filepath)
+
+            with open(filepath, encoding='utf-8') as metrics_file:
+                report = json.load(metrics_file)
+
+        self.assertEqual(report['counters'], {'files': 1})
+        self.assertIn('duration', report)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
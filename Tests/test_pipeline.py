@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_pipeline.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import time
+import tempfile
+import hashlib
+import threading
+
+from unittest import mock
+
+import babelfish
+
+from sublime.batching import AdaptiveBatchSizer
+from sublime.core import Subtitle
+from sublime.jobs import Shard
+from sublime.jobs import JobQueue
+from sublime.pipeline import Pipeline
+from sublime.pipeline import SubtitlesJob
+
+
+def md5(data):
+    """ Returns MD5 hash code of data. """
+    return hashlib.md5(data).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeProvider class
+#
+# -----------------------------------------------------------------------------
+class FakeProvider(object):
+
+    """ Provider recording batches of videos it is asked for. """
+
+    code = "fake"
+    HASH_ALGORITHM = "md5"
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.batches = []
+
+    def download_subtitles(
+            self, videos, languages,
+            rename=False, rename_pattern=None, underscore=True):
+        """ Records a batch. """
+        self.batches.append(
+            [(os.path.basename(video.filename),
+              video.hashes[self.HASH_ALGORITHM],
+              list(video.languages_to_download)) for video in videos])
+
+        return False
+
+
+# -----------------------------------------------------------------------------
+#
+# PipelineTestCase class
+#
+# -----------------------------------------------------------------------------
+class PipelineTestCase(unittest.TestCase):
+    """ Tests Pipeline class. """
+
+    def test_run(self):
+        """ Tests that all items go through all stages. """
+        results = []
+        pipeline = Pipeline(queue_size=2)
+        pipeline.add_stage('double', lambda item: [item, item], workers=3)
+        pipeline.add_stage('odd', lambda item: [item] if item % 2 else None)
+        pipeline.add_stage('collect', results.append)
+
+        pipeline.run(range(100))
+
+        self.assertEqual(
+            sorted(results), sorted(list(range(1, 100, 2)) * 2))
+
+    def test_batches(self):
+        """ Tests that a stage gets full batches and a last partial one. """
+        batches = []
+        pipeline = Pipeline()
+        pipeline.add_stage('batch', batches.append, batch_size=10)
+
+        pipeline.run(range(25))
+
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+
+    def test_variable_batches(self):
+        """ Tests that batch size can change while the pipeline runs. """
+        lengths = []
+
+        def record(batch):
+            lengths.append(len(batch))
+
+        pipeline = Pipeline()
+        pipeline.add_stage(
+            'batch', record, batch_size=lambda: 10 * 2 ** len(lengths))
+
+        pipeline.run(range(75))
+
+        self.assertEqual(lengths, [10, 20, 40, 5])
+
+    def test_batch_timeout(self):
+        """ Tests that a partial batch doesn't wait for the end. """
+        batches = []
+        pipeline = Pipeline()
+        pipeline.add_stage(
+            'batch', batches.append, batch_size=10, batch_timeout=0.01)
+
+        def items():
+            yield 1
+            time.sleep(0.2)
+            yield 2
+
+        pipeline.run(items())
+
+        self.assertEqual(batches, [[1], [2]])
+
+    def test_back_pressure(self):
+        """ Tests that a slow stage bounds items in flight. """
+        produced = []
+        consumed = []
+        in_flight = []
+        lock = threading.Lock()
+
+        def source():
+            for item in range(50):
+                produced.append(item)
+                yield item
+
+        def slow(item):
+            time.sleep(0.001)
+            with lock:
+                consumed.append(item)
+                in_flight.append(len(produced) - len(consumed))
+
+        pipeline = Pipeline(queue_size=4)
+        pipeline.add_stage('identity', lambda item: [item])
+        pipeline.add_stage('slow', slow)
+        pipeline.run(source())
+
+        self.assertEqual(len(consumed), 50)
+        # Two queues of 4 items, items held by workers and the source
+        self.assertLessEqual(max(in_flight), 4 * 2 + 3)
+
+    def test_error(self):
+        """ Tests that an error in a stage stops the pipeline
+        and is raised. """
+        produced = []
+
+        def source():
+            for item in range(10000):
+                produced.append(item)
+                yield item
+
+        def fail(item):
+            if item == 10:
+                raise ValueError(item)
+
+        pipeline = Pipeline(queue_size=2)
+        pipeline.add_stage('fail', fail)
+
+        with self.assertRaises(ValueError):
+            pipeline.run(source())
+
+        self.assertLess(len(produced), 10000)
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitlesJobTestCase class
+#
+# -----------------------------------------------------------------------------
+class SubtitlesJobTestCase(unittest.TestCase):
+    """ Tests SubtitlesJob class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        # Video files start with the AVI magic number
+        for name in ('a.avi', 'b.avi', 'c.avi', 'notes.txt'):
+            with open(os.path.join(self.directory.name, name), 'w') as f:
+                f.write('RIFF' + name)
+
+        # Video b already has an english subtitle
+        with open(os.path.join(self.directory.name, 'b.en.srt'), 'w'):
+            pass
+
+        self.patcher = mock.patch(
+            'guessit.guess_movie_info', create=True,
+            return_value={'type': 'video'})
+        self.patcher.start()
+        self.addCleanup(self.patcher.stop)
+
+    def test_run(self):
+        """ Tests a job on a directory. """
+        provider = FakeProvider()
+        job = SubtitlesJob(
+            [provider], [babelfish.Language('eng')], batch_size=2)
+
+        job.run(directories=[self.directory.name])
+
+        videos = sorted(
+            video for batch in provider.batches for video in batch)
+        self.assertEqual(
+            videos,
+            [('a.avi', md5(b'RIFFa.avi'), [babelfish.Language('eng')]),
+             ('c.avi', md5(b'RIFFc.avi'), [babelfish.Language('eng')])])
+
+    def test_fetch_batch_size(self):
+        """ Tests that fetch batches follow the size of search requests
+        of providers, unless a batch size is given. """
+        provider = FakeProvider()
+        other_provider = FakeProvider()
+        provider.search_batches = AdaptiveBatchSizer('search', 1, 50, 500)
+        other_provider.search_batches = AdaptiveBatchSizer(
+            'search', 1, 20, 100)
+        english = babelfish.Language('eng')
+
+        job = SubtitlesJob([provider, other_provider], [english])
+        self.assertEqual(job.get_fetch_batch_size(), 50)
+        provider.search_batches.size = 200
+        self.assertEqual(job.get_fetch_batch_size(), 200)
+
+        self.assertEqual(
+            SubtitlesJob([FakeProvider()], [english]).get_fetch_batch_size(),
+            SubtitlesJob.FETCH_BATCH_SIZE)
+        self.assertEqual(
+            SubtitlesJob([provider], [english], batch_size=2)
+            ._make_pipeline().stages[-1].get_batch_size(), 2)
+
+    def test_run_force(self):
+        """ Tests that existing subtitles are replaced with force. """
+        provider = FakeProvider()
+        job = SubtitlesJob(
+            [provider], [babelfish.Language('eng')], force=True)
+
+        job.run(video_files=[
+            os.path.join(self.directory.name, 'b.avi'),
+            os.path.join(self.directory.name, 'notes.txt')])
+
+        self.assertEqual(
+            provider.batches,
+            [[('b.avi', md5(b'RIFFb.avi'), [babelfish.Language('eng')])]])
+
+    def test_resume(self):
+        """ Tests that a job with a job queue skips videos done
+        by a previous job, even if it failed. """
+        english = babelfish.Language('eng')
+        db_path = os.path.join(self.directory.name, 'jobs.db')
+
+        class FailingProvider(FakeProvider):
+            def download_subtitles(self, videos, *args):
+                response = FakeProvider.download_subtitles(
+                    self, videos, *args)
+                if any(video.filename.endswith('c.avi') for video in videos):
+                    raise ConnectionError("Network is unreachable")
+                return response
+
+        provider = FailingProvider()
+        with JobQueue(db_path) as jobs:
+            job = SubtitlesJob(
+                [provider], [english], batch_size=1, workers=1, jobs=jobs)
+            with self.assertRaises(ConnectionError):
+                job.run(video_files=[
+                    os.path.join(self.directory.name, name)
+                    for name in ('a.avi', 'c.avi')])
+
+        provider = FakeProvider()
+        with JobQueue(db_path) as jobs:
+            SubtitlesJob([provider], [english], jobs=jobs).run(
+                directories=[self.directory.name])
+
+        self.assertEqual(
+            provider.batches,
+            [[('c.avi', md5(b'RIFFc.avi'), [english])]])
+
+    def test_provider_errors_are_retried(self):
+        """ Tests that videos of a batch for which a provider returned
+        an error are not done, unless they got their subtitles. """
+        english = babelfish.Language('eng')
+        db_path = os.path.join(self.directory.name, 'jobs.db')
+
+        class QuotaProvider(FakeProvider):
+            def download_subtitles(self, videos, *args):
+                FakeProvider.download_subtitles(self, videos, *args)
+                # Written before the server refused to go on
+                video = next(
+                    video for video in videos
+                    if video.filename.endswith('a.avi'))
+                Subtitle("1", english, video, 5.0, "srt").write(b"Hello")
+                return None
+
+        with JobQueue(db_path) as jobs:
+            SubtitlesJob(
+                [QuotaProvider()], [english], batch_size=2, workers=1,
+                jobs=jobs).run(video_files=[
+                    os.path.join(self.directory.name, name)
+                    for name in ('a.avi', 'c.avi')])
+
+            done = {
+                name: jobs.is_done(filepath, os.stat(filepath), [english])
+                for name, filepath in (
+                    (name, os.path.join(self.directory.name, name))
+                    for name in ('a.avi', 'c.avi'))}
+
+        self.assertEqual(done, {'a.avi': True, 'c.avi': False})
+
+    def test_unreadable_video(self):
+        """ Tests that a video which can't be opened is logged
+        with its error and left out. """
+        directory = os.path.join(self.directory.name, 'folder.avi')
+        os.mkdir(directory)
+        job = SubtitlesJob([FakeProvider()], [babelfish.Language('eng')])
+
+        with self.assertLogs("sublime.pipeline", "ERROR") as logs:
+            self.assertIsNone(job.classify(directory))
+
+        self.assertIn("Cannot open " + directory, logs.output[0])
+        self.assertIn("Is a directory", logs.output[0])
+
+    def test_shards(self):
+        """ Tests that shards split videos. """
+        english = babelfish.Language('eng')
+        videos = []
+
+        for number in (1, 2):
+            provider = FakeProvider()
+            SubtitlesJob(
+                [provider], [english], force=True,
+                shard=Shard(number, 2)).run(
+                    directories=[self.directory.name])
+            videos.extend(
+                video[0] for batch in provider.batches for video in batch)
+
+        self.assertEqual(sorted(videos), ['a.avi', 'b.avi', 'c.avi'])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_plan.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import json
+import tempfile
+import hashlib
+
+from unittest import mock
+
+import babelfish
+
+from sublime.core import Movie
+from sublime.plan import PlanError
+from sublime.plan import PlanReader
+from sublime.plan import PlanWriter
+from sublime.pipeline import SubtitlesJob
+
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeProvider class
+#
+# -----------------------------------------------------------------------------
+class FakeProvider(object):
+
+    """ Provider recording videos it is asked for. """
+
+    code = "fake"
+    HASH_ALGORITHM = "md5"
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.videos = []
+
+    def download_subtitles(
+            self, videos, languages,
+            rename=False, rename_pattern=None, underscore=True):
+        """ Records videos of a batch. """
+        self.videos.extend(
+            (os.path.basename(video.filename),
+             video.hashes[self.HASH_ALGORITHM],
+             list(video.languages_to_download)) for video in videos)
+
+
+# -----------------------------------------------------------------------------
+#
+# PlanTestCase class
+#
+# -----------------------------------------------------------------------------
+class PlanTestCase(unittest.TestCase):
+    """ Tests PlanWriter and PlanReader classes. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.english = babelfish.Language('eng')
+        self.french = babelfish.Language('fra')
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_write_and_read(self):
+        """ Tests that videos read from a plan are those written. """
+        movie = Movie(self._path('movie.avi'), 1234)
+        movie.inode = (1, 2)
+        movie.hashes = {'md5': 'abc'}
+        movie.languages_to_download = [self.french]
+
+        for name in ('plan.jsonl', 'plan.jsonl.gz'):
+            with PlanWriter(
+                    self._path(name), [self.english, self.french],
+                    ['md5']) as writer:
+                writer.write(movie)
+
+            with PlanReader(self._path(name)) as reader:
+                self.assertEqual(
+                    reader.languages, [self.english, self.french])
+                self.assertEqual(reader.hash_algorithms, ['md5'])
+                videos = list(reader)
+
+            self.assertEqual(len(videos), 1)
+            self.assertIsInstance(videos[0], Movie)
+            self.assertEqual(
+                (videos[0].filename, videos[0].size, videos[0].inode,
+                 videos[0].hashes, list(videos[0].languages_to_download)),
+                (movie.filename, 1234, (1, 2), {'md5': 'abc'},
+                 [self.french]))
+
+    def test_absolute_paths(self):
+        """ Tests that videos are written with their absolute path. """
+        movie = Movie(self._path('movie.avi'), 1234)
+        movie.filename = os.path.relpath(movie.filename)
+
+        with PlanWriter(self._path('plan.jsonl'), [], []) as writer:
+            writer.write(movie)
+
+        with open(self._path('plan.jsonl')) as plan_file:
+            entry = json.loads(plan_file.readlines()[1])
+
+        self.assertEqual(entry['path'], self._path('movie.avi'))
+
+    def test_video_subclass(self):
+        """ Tests that a video of a subclass is read as its base type. """
+        class CustomMovie(Movie):
+            __slots__ = ()
+
+        with PlanWriter(self._path('plan.jsonl'), [], []) as writer:
+            writer.write(CustomMovie(self._path('movie.avi'), 1234))
+
+        with PlanReader(self._path('plan.jsonl')) as reader:
+            videos = list(reader)
+
+        self.assertEqual([type(video) for video in videos], [Movie])
+
+    def test_incomplete_plan(self):
+        """ Tests that a plan only appears once complete. """
+        with self.assertRaises(RuntimeError):
+            with PlanWriter(self._path('plan.jsonl'), [], []):
+                raise RuntimeError()
+
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_invalid_plan(self):
+        """ Tests that invalid plans are rejected. """
+        with open(self._path('plan.jsonl'), 'w') as plan_file:
+            plan_file.write('{"format": "other"}\n')
+
+        with self.assertRaises(PlanError):
+            PlanReader(self._path('plan.jsonl'))
+
+    def test_plan_and_apply(self):
+        """ Tests that applying a plan queries providers like a run. """
+        for name in ('a.avi', 'b.avi'):
+            with open(self._path(name), 'w') as video_file:
+                video_file.write('RIFF' + name)
+        with open(self._path('b.en.srt'), 'w'):
+            pass
+
+        with mock.patch(
+                'guessit.guess_movie_info', create=True,
+                return_value={'type': 'video'}):
+            job = SubtitlesJob([FakeProvider()], [self.english])
+            with PlanWriter(
+                    self._path('plan.jsonl'), job.languages,
+                    job.hashing.names) as writer:
+                job.write_plan(writer, directories=[self.directory.name])
+
+        self.assertEqual(writer.count, 1)
+
+        provider = FakeProvider()
+        with PlanReader(self._path('plan.jsonl')) as reader:
+            SubtitlesJob([provider], reader.languages).apply_plan(reader)
+
+        self.assertEqual(
+            provider.videos,
+            [('a.avi', hashlib.md5(b'RIFFa.avi').hexdigest(),
+              [self.english])])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_profiling.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import time
+import pstats
+import tempfile
+
+from sublime.metrics import METRICS
+from sublime.pipeline import Pipeline
+from sublime.profiling import Profiler
+
+
+def busy_stage(duration):
+    """ Keeps the thread busy during a stage. """
+    with METRICS.timer('busy'):
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            pass
+
+
+# -----------------------------------------------------------------------------
+#
+# ProfilerTestCase class
+#
+# -----------------------------------------------------------------------------
+class ProfilerTestCase(unittest.TestCase):
+    """ Tests Profiler class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def test_profile_and_sample(self):
+        """ Tests that cProfile stats and collapsed stacks are written. """
+        profile_filepath = os.path.join(self.directory.name, "out.prof")
+        sample_filepath = os.path.join(self.directory.name, "out.folded")
+
+        with Profiler(profile_filepath, memory=True,
+                      sample_filepath=sample_filepath,
+                      sample_interval=0.001):
+            busy_stage(0.1)
+
+        stats = pstats.Stats(profile_filepath)
+        self.assertTrue(any(
+            function[2] == "busy_stage" for function in stats.stats))
+
+        with open(sample_filepath, encoding='utf-8') as sample_file:
+            lines = sample_file.read().splitlines()
+
+        self.assertTrue(lines)
+        self.assertTrue(any("busy_stage" in line for line in lines))
+        self.assertTrue(any(
+            line.startswith("MainThread;") for line in lines))
+        self.assertTrue(all(
+            line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+        self.assertIn('memory_peak', METRICS.report()['values'])
+
+    def test_profile_threads(self):
+        """ Tests that functions run by pipeline workers
+        are profiled. """
+        profile_filepath = os.path.join(self.directory.name, "out.prof")
+
+        def worker_stage(item):
+            busy_stage(0.01)
+
+        pipeline = Pipeline().add_stage('busy', worker_stage, workers=2)
+        with Profiler(profile_filepath):
+            pipeline.run(range(4))
+
+        stats = pstats.Stats(profile_filepath)
+        self.assertTrue(any(
+            function[2] == "worker_stage" for function in stats.stats))
+
+    def tearDown(self):
+        """ Clean up """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -13,19 +13,126 @@
 
 import unittest
 import os
+import io
+import gzip
+import base64
 import shutil
+import tempfile
+import xmlrpc.client
 
 import babelfish
 
 from sublime.util import get_exe_dir
 
 from sublime.core import Video
+from sublime.core import Subtitle
 from sublime.core import VideoSizeError
 from sublime.core import VideoHashCodeError
 
+from sublime.store import SubtitleStore
+
 from sublime.providers.opensubtitles import OpenSubtitlesServer
 
 
+# -----------------------------------------------------------------------------
+#
+# FakeProxy class
+#
+# -----------------------------------------------------------------------------
+class FakeProxy(object):
+
+    """ XMLRPC proxy returning canned OpenSubtitles responses. """
+
+    def __init__(self, subtitles_data=None, search_results=None):
+        """ Initializes instance. """
+        self.subtitles_data = subtitles_data or {}
+        self.search_results = search_results or []
+        self.downloaded_ids = []
+        self.queries = []
+
+    def LogIn(self, username, password, language, user_agent):
+        return {'status': "200 OK", 'token': "TOKEN"}
+
+    def SearchSubtitles(self, session_string, queries):
+        self.queries.append(queries)
+        hashcodes = [query['moviehash'] for query in queries]
+
+        return {
+            'status': "200 OK",
+            'data': [
+                result for result in self.search_results
+                if result['MovieHash'] in hashcodes and
+                result['SubLanguageID'] in queries[0]['sublanguageid']
+            ]
+        }
+
+    def DownloadSubtitles(self, session_string, subtitles_id):
+        self.downloaded_ids.extend(subtitles_id)
+
+        return {
+            'status': "200 OK",
+            'data': [
+                {
+                    'idsubtitlefile': subtitle_id,
+                    'data': base64.standard_b64encode(gzip.compress(
+                        self.subtitles_data[subtitle_id])).decode('ascii')
+                }
+                for subtitle_id in subtitles_id
+            ]
+        }
+
+
+# -----------------------------------------------------------------------------
+#
+# TruncatingProxy class
+#
+# -----------------------------------------------------------------------------
+class TruncatingProxy(FakeProxy):
+
+    """ FakeProxy whose downloaded subtitles are truncated. """
+
+    def DownloadSubtitles(self, session_string, subtitles_id):
+        response = FakeProxy.DownloadSubtitles(
+            self, session_string, subtitles_id)
+        for encoded_file in response['data']:
+            data = base64.standard_b64decode(encoded_file['data'])
+            encoded_file['data'] = base64.standard_b64encode(
+                data[:len(data) // 2]).decode('ascii')
+
+        return response
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeTransport class
+#
+# -----------------------------------------------------------------------------
+class FakeTransport(object):
+
+    """ XMLRPC transport which calls methods of a fake proxy. """
+
+    def __init__(self, proxy):
+        """ Initializes instance. """
+        self.proxy = proxy
+
+    def _call(self, request_body):
+        params, method_name = xmlrpc.client.loads(request_body)
+        response = getattr(self.proxy, method_name)(*params)
+
+        return xmlrpc.client.dumps(
+            (response,), methodresponse=True).encode('utf-8')
+
+    def request(self, host, handler, request_body, verbose=False):
+        params, _ = xmlrpc.client.loads(self._call(request_body))
+        return params
+
+    def stream_request(self, host, handler, request_body):
+        return io.BytesIO(self._call(request_body))
+
+    def close(self):
+        pass
+
+
 # -----------------------------------------------------------------------------
 #
 # OpenSubtitlesServerTestCase class
@@ -146,6 +253,95 @@ class OpenSubtitlesServerTestCase(unittest.TestCase):
         self.assertFalse(response)
         server.disconnect()
 
+    def test_search_grouped_by_languages(self):
+        """ Tests that videos are searched by groups of languages
+        and that only wanted languages are asked to the server. """
+        english, french = self.babel_languages
+        video = Video(self.video_filename)
+        video.languages_to_download = [english, french]
+        video2 = Video(self.video2_filename)
+        video2.languages_to_download = [french]
+        video3 = Video(self.video2_filename)
+        video3.languages_to_download = []
+
+        search_results = [
+            {
+                'MovieHash': hash_code, 'SubLanguageID': language,
+                'IDSubtitleFile': hash_code + language, 'SubRating': "5.0",
+                'SubFormat': "srt", 'SubDownloadsCnt': "10",
+                'MovieName': "Louie", 'MovieKind': "movie"
+            }
+            for hash_code in ("a", "b")
+            for language in ("eng", "fre")
+        ]
+
+        proxy = FakeProxy(search_results=search_results)
+        server = OpenSubtitlesServer()
+        server._transport = FakeTransport(proxy)
+        server.connect()
+        subtitles = server._do_search_subtitles(
+            {"a": video, "b": video2, "c": video3}, self.babel_languages)
+
+        self.assertEqual(
+            sorted(
+                [(query['moviehash'], query['sublanguageid'])
+                 for query in queries]
+                for queries in proxy.queries),
+            [[("a", "eng,fre")], [("b", "fre")]])
+        self.assertEqual(
+            sorted(subtitle.id for subtitle in subtitles),
+            ["aeng", "afre", "bfre"])
+
+    def test_download_from_store(self):
+        """ Tests that subtitles already in the local store
+        are not downloaded again. """
+        video = Video(self.video_filename)
+        subtitle = Subtitle(
+            "42", self.babel_languages[1], video, 5.0, "srt")
+
+        proxy = FakeProxy({"42": b"Bonjour"})
+        server = OpenSubtitlesServer()
+        server._transport = FakeTransport(proxy)
+        server.connect()
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            server.store = SubtitleStore(store_dir)
+
+            self.assertTrue(server._do_download_subtitles([subtitle]))
+            os.remove(self.expected_french_subtitle_filename)
+            self.assertTrue(server._do_download_subtitles([subtitle]))
+
+        self.assertEqual(proxy.downloaded_ids, ["42"])
+        with open(self.expected_french_subtitle_filename, 'rb') as sub_file:
+            self.assertEqual(sub_file.read(), b"Bonjour")
+
+    def test_download_corrupt_subtitle(self):
+        """ Tests that a subtitle which can't be decoded is neither
+        written nor stored, and is downloaded again later. """
+        video = Video(self.video_filename)
+        subtitle = Subtitle(
+            "42", self.babel_languages[1], video, 5.0, "srt")
+
+        server = OpenSubtitlesServer()
+        server._transport = FakeTransport(
+            TruncatingProxy({"42": b"Bonjour"}))
+        server.connect()
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            server.store = SubtitleStore(store_dir)
+
+            self.assertIsNone(server._do_download_subtitles([subtitle]))
+            self.assertFalse(
+                os.path.exists(self.expected_french_subtitle_filename))
+            self.assertIsNone(server.store.get(server.code, "42"))
+
+            proxy = FakeProxy({"42": b"Bonjour"})
+            server._transport = FakeTransport(proxy)
+            server.connect()
+            self.assertTrue(server._do_download_subtitles([subtitle]))
+
+        self.assertEqual(proxy.downloaded_ids, ["42"])
+
     def tearDown(self):
         """ Clean up """
         if os.path.exists(self.expected_renamed_video_filename):
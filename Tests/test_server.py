@@ -12,8 +12,183 @@
 ##
 
 import unittest
+import os
+import time
+import socket
+import tempfile
+import threading
 
+import babelfish
+
+from sublime.batching import AdaptiveBatchSizer
+from sublime.core import Video
+from sublime.core import Movie
+from sublime.core import VideoFactory
+from sublime.core import Subtitle
+from sublime.core import VideoSizeError
+from sublime.hedging import Deadline
+from sublime.hedging import DeadlineExceeded
+from sublime.metrics import METRICS
 from sublime.server import SubtitleProvider
+from sublime.server import XMLRPCServer
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeTransport class
+#
+# -----------------------------------------------------------------------------
+class FakeTransport(object):
+
+    """ Transport which records its cancellation. """
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def close(self):
+        pass
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeResponse class
+#
+# -----------------------------------------------------------------------------
+class FakeResponse(object):
+
+    """ Response which records whether it was closed. """
+
+    def __init__(self):
+        """ Initializes instance. """
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+# -----------------------------------------------------------------------------
+#
+# FakeServer class
+#
+# -----------------------------------------------------------------------------
+class FakeServer(XMLRPCServer):
+
+    """ XMLRPCServer which never reaches the network. """
+
+    name = "Fake"
+    HASH_ALGORITHM = "fake"
+
+    def __init__(self):
+        """ Initializes instance. """
+        XMLRPCServer.__init__(self, "http://localhost/xml-rpc")
+        self.searched_hashcodes = []
+
+    def _make_transport(self):
+        return FakeTransport()
+
+    def hashcode(self, video_filepath):
+        """ Hash code is the content of the file, which can't be empty. """
+        with open(video_filepath, 'rb') as video_file:
+            content = video_file.read().decode('ascii')
+
+        if not content:
+            raise VideoSizeError(video_filepath)
+
+        return content
+
+    def _do_search_subtitles(self, videos_hashcode, languages):
+        """ Returns one subtitle per video and wanted language. """
+        self.searched_hashcodes.extend(videos_hashcode.keys())
+
+        return [
+            Subtitle(hash_code + language.alpha3, language, video, 1, "srt")
+            for hash_code, video in videos_hashcode.items()
+            for language in video.languages_to_download
+        ]
+
+    def _do_download_subtitles(self, subtitles):
+        """ Writes subtitles with their id as content. """
+        for subtitle in subtitles:
+            subtitle.write(subtitle.id.encode('ascii'))
+
+        return True
+
+
+# -----------------------------------------------------------------------------
+#
+# FailingServer class
+#
+# -----------------------------------------------------------------------------
+class FailingServer(FakeServer):
+
+    """ FakeServer whose searches fail with an error. """
+
+    def __init__(self, error):
+        """ Initializes instance. """
+        FakeServer.__init__(self)
+        self.error = error
+
+    def _do_search_subtitles(self, videos_hashcode, languages):
+        raise self.error
+
+
+# -----------------------------------------------------------------------------
+#
+# RenamingServer class
+#
+# -----------------------------------------------------------------------------
+class RenamingServer(FakeServer):
+
+    """ FakeServer whose searches find that videos are movies. """
+
+    def _do_search_subtitles(self, videos_hashcode, languages):
+        for hash_code, video in videos_hashcode.items():
+            movie = VideoFactory.make_from_type(video, Movie)
+            movie.name = "Movie " + hash_code
+            videos_hashcode[hash_code] = movie
+
+        return FakeServer._do_search_subtitles(
+            self, videos_hashcode, languages)
+
+
+# -----------------------------------------------------------------------------
+#
+# SlowServer class
+#
+# -----------------------------------------------------------------------------
+class SlowServer(FakeServer):
+
+    """ FakeServer whose calls only return once another job waits
+    for them, and which counts its downloads. """
+
+    def __init__(self):
+        """ Initializes instance. """
+        FakeServer.__init__(self)
+        self.downloaded_ids = []
+
+    @staticmethod
+    def _wait_for_waiter(counter):
+        start = METRICS.counters.get(counter, 0)
+        for _ in range(500):
+            if METRICS.counters.get(counter, 0) > start:
+                return
+            time.sleep(0.01)
+
+    def _do_search_subtitles(self, videos_hashcode, languages):
+        self._wait_for_waiter('coalesced_searches')
+
+        return FakeServer._do_search_subtitles(
+            self, videos_hashcode, languages)
+
+    def _do_download_subtitles(self, subtitles):
+        self._wait_for_waiter('coalesced_downloads')
+        self.downloaded_ids.extend(subtitle.id for subtitle in subtitles)
+
+        return FakeServer._do_download_subtitles(self, subtitles)
 
 
 # -----------------------------------------------------------------------------
@@ -31,6 +206,294 @@ class SubtitleProviderTestCase(unittest.TestCase):
             "OpenSubtitles", "http://www.opensubtitles.org", "os")
         self.assertIn(open_subtitle_provider, all_providers)
 
+    def test_get_providers_by_code(self):
+        """ Tests getting Subtitle Providers by their code. """
+        providers = SubtitleProvider.get_providers(["os"])
+
+        self.assertEqual([provider.code for provider in providers], ["os"])
+        self.assertIs(providers[0], SubtitleProvider.get_providers(["os"])[0])
+        self.assertEqual(SubtitleProvider.get_providers(["unknown"]), [])
+
+
+# -----------------------------------------------------------------------------
+#
+# XMLRPCServerTestCase class
+#
+# -----------------------------------------------------------------------------
+class XMLRPCServerTestCase(unittest.TestCase):
+    """ Tests XMLRPCServer class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.french = babelfish.Language('fra')
+        self.english = babelfish.Language('eng')
+
+    def _make_video(self, name, content=None, link_to=None):
+        filepath = os.path.join(self.directory.name, name)
+        if link_to is not None:
+            os.link(link_to.filename, filepath)
+        else:
+            with open(filepath, 'wb') as video_file:
+                video_file.write(content)
+
+        return Video(filepath)
+
+    def test_identical_videos_are_queried_once(self):
+        """ Tests that hard links and copies of a video are searched once
+        and that subtitles are shared with every one of them. """
+        video = self._make_video("movie.avi", b"A")
+        linked_video = self._make_video("linked.avi", link_to=video)
+        copied_video = self._make_video("copied.avi", b"A")
+        other_video = self._make_video("other.avi", b"B")
+
+        video.languages_to_download = [self.french]
+        linked_video.languages_to_download = [self.french, self.english]
+        copied_video.languages_to_download = []
+        other_video.languages_to_download = [self.english]
+
+        server = FakeServer()
+        response = server.download_subtitles(
+            [video, linked_video, copied_video, other_video],
+            [self.french, self.english])
+
+        self.assertTrue(response)
+        self.assertEqual(sorted(server.searched_hashcodes), ["A", "B"])
+
+        expected_subtitles = [
+            "linked.en.srt", "linked.fr.srt", "movie.fr.srt", "other.en.srt"]
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.directory.name)
+                   if name.endswith(".srt")),
+            expected_subtitles)
+
+        # Languages to download are left untouched
+        self.assertEqual(video.languages_to_download, [self.french])
+
+    def test_videos_without_hash_code_are_skipped(self):
+        """ Tests that videos whose hash code can't be computed
+        are left out without stopping the others, and that missing
+        hash codes are computed. """
+        video = self._make_video("movie.avi", b"A")
+        small_video = self._make_video("small.avi", b"")
+        unhashed_video = self._make_video("unhashed.avi", b"C")
+        # Hash code couldn't be computed when the file was opened
+        unhashed_video.hashes = {'fake': None, 'other': "C"}
+        # Hashed when opened (planned...) with other algorithms only
+        other_video = self._make_video("other.avi", b"D")
+        other_video.hashes = {'other': "D"}
+        videos = [small_video, video, unhashed_video, other_video]
+        for each_video in videos:
+            each_video.languages_to_download = [self.french]
+
+        server = FakeServer()
+        response = server.download_subtitles(videos, [self.french])
+
+        self.assertTrue(response)
+        self.assertEqual(server.searched_hashcodes, ["A", "D"])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory.name, "movie.fr.srt")))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory.name, "small.fr.srt")))
+
+    def test_request_errors(self):
+        """ Tests that a request which times out or loses its connection
+        is an error of the provider, unless the run is past its
+        deadline. """
+        video = self._make_video("movie.avi", b"A")
+        video.languages_to_download = [self.french]
+
+        for error in (socket.timeout("timed out"),
+                      ConnectionResetError("reset")):
+            server = FailingServer(error)
+            self.assertIsNone(
+                server.download_subtitles([video], [self.french]))
+
+        server = FailingServer(DeadlineExceeded(1))
+        with self.assertRaises(DeadlineExceeded):
+            server.download_subtitles(
+                [video], [self.french], deadline=Deadline(1))
+
+    def test_identical_videos_are_renamed(self):
+        """ Tests that every identical video is renamed and gets
+        its subtitle, unless another file already has its new name. """
+        os.mkdir(os.path.join(self.directory.name, "copies"))
+        video = self._make_video("movie.avi", b"A")
+        linked_video = self._make_video("linked.avi", link_to=video)
+        copied_video = self._make_video(
+            os.path.join("copies", "copied.avi"), b"A")
+        videos = [video, linked_video, copied_video]
+        for each_video in videos:
+            each_video.languages_to_download = [self.french]
+
+        server = RenamingServer()
+        response = server.download_subtitles(
+            videos, [self.french], rename=True, underscore=True)
+
+        self.assertTrue(response)
+        self.assertEqual(
+            sorted(
+                os.path.relpath(os.path.join(dir_path, filename),
+                                self.directory.name)
+                for dir_path, _, filenames in os.walk(self.directory.name)
+                for filename in filenames),
+            sorted([
+                "Movie_A.avi", "Movie_A.fr.srt",
+                "linked.avi", "linked.fr.srt",
+                os.path.join("copies", "Movie_A.avi"),
+                os.path.join("copies", "Movie_A.fr.srt")]))
+        self.assertEqual(
+            [os.path.basename(each_video.filename) for each_video in videos],
+            ["Movie_A.avi", "linked.avi", "Movie_A.avi"])
+
+    def test_concurrent_jobs_are_coalesced(self):
+        """ Tests that concurrent jobs on the same video share
+        one search and one download. """
+        self._make_video("movie.avi", b"A")
+        server = SlowServer()
+        responses = []
+
+        def job():
+            video = Video(os.path.join(self.directory.name, "movie.avi"))
+            video.languages_to_download = [self.french]
+            responses.append(
+                server.download_subtitles([video], [self.french]))
+
+        threads = [threading.Thread(target=job) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(responses, [True, True])
+        self.assertEqual(server.searched_hashcodes, ["A"])
+        self.assertEqual(server.downloaded_ids, ["Afra"])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory.name, "movie.fr.srt")))
+
+    def _make_batches(self, latency):
+        """ Makes batches whose requests took latency seconds so far. """
+        batches = AdaptiveBatchSizer('tests', 1, 1, 1)
+        for _ in range(batches.MIN_LATENCIES):
+            batches.record(1, latency, 0)
+
+        return batches
+
+    def test_slow_request_is_hedged(self):
+        """ Tests that a request slower than previous ones is sent
+        again on another transport, and that the slow one is cancelled
+        and its transport used again once it ended. """
+        server = FakeServer()
+        main_transport = server._transport
+
+        def request(transport, value):
+            if transport is main_transport:
+                transport.cancelled.wait(10)
+                raise OSError("Cancelled")
+            return value
+
+        METRICS.reset()
+        with server._hedged_request(
+                self._make_batches(0.01), 1, request, "backup") as result:
+            self.assertEqual(result, "backup")
+
+        self.assertTrue(main_transport.cancelled.is_set())
+        self.assertEqual(METRICS.counters.get('hedged_requests'), 1)
+        self.assertEqual(METRICS.counters.get('hedged_wins'), 1)
+
+        for _ in range(500):
+            if main_transport not in server._busy_transports:
+                break
+            time.sleep(0.01)
+        self.assertIs(server._acquire_transport(), main_transport)
+        self.assertEqual(len(server._spare_transports), 1)
+
+    def test_late_result_is_closed(self):
+        """ Tests that the result of a request which lost against its
+        hedged request is closed before its transport is used again. """
+        server = FakeServer()
+        main_transport = server._transport
+        late_result = FakeResponse()
+
+        def request(transport):
+            if transport is main_transport:
+                transport.cancelled.wait(10)
+                return late_result
+            return FakeResponse()
+
+        with server._hedged_request(self._make_batches(0.01), 1, request):
+            pass
+
+        for _ in range(500):
+            if main_transport not in server._busy_transports:
+                break
+            time.sleep(0.01)
+        self.assertTrue(late_result.closed)
+
+    def test_fast_request_is_not_hedged(self):
+        """ Tests that a request as fast as previous ones
+        is sent once. """
+        server = FakeServer()
+        transports = []
+
+        def request(transport):
+            transports.append(transport)
+            return True
+
+        with server._hedged_request(
+                self._make_batches(5.0), 1, request) as result:
+            self.assertTrue(result)
+        self.assertEqual(transports, [server._transport])
+        self.assertFalse(server._spare_transports)
+
+    def test_requests_are_not_hedged(self):
+        """ Tests that a request which may change something
+        is sent once, however slow. """
+        server = FakeServer()
+        transports = []
+
+        def request(transport):
+            transports.append(transport)
+            time.sleep(0.05)
+            return True
+
+        METRICS.reset()
+        self.assertTrue(
+            server._request(self._make_batches(0.01), 1, request))
+        self.assertEqual(transports, [server._transport])
+        self.assertIsNone(METRICS.counters.get('hedged_requests'))
+
+    def test_hedged_result_is_read_in_context(self):
+        """ Tests that the transport giving a result is not used
+        by other requests while the result is read. """
+        server = FakeServer()
+
+        def request(transport):
+            return iter(["row"])
+
+        with server._hedged_request(
+                self._make_batches(0.01), 1, request) as rows:
+            self.assertIn(server._transport, server._busy_transports)
+            self.assertEqual(list(rows), ["row"])
+        self.assertNotIn(server._transport, server._busy_transports)
+
+    def test_failed_requests(self):
+        """ Tests that the error of a request is raised when its
+        hedged request fails too. """
+        server = FakeServer()
+
+        def request(transport):
+            time.sleep(0.05)
+            raise OSError("Network is unreachable")
+
+        with self.assertRaises(OSError):
+            with server._hedged_request(
+                    self._make_batches(0.01), 1, request):
+                pass
+
+    def tearDown(self):
+        """ Clean up """
+        self.directory.cleanup()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_singleflight.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import time
+import threading
+
+from sublime.singleflight import SingleFlight
+
+
+# -----------------------------------------------------------------------------
+#
+# SingleFlightTestCase class
+#
+# -----------------------------------------------------------------------------
+class SingleFlightTestCase(unittest.TestCase):
+    """ Tests SingleFlight class. """
+
+    def setUp(self):
+        self.flights = SingleFlight('tests')
+        self.calls = []
+        self.release = threading.Event()
+
+    def _call(self, value):
+        self.calls.append(value)
+        self.release.wait(10)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def _run_concurrently(self, key, value, count=3):
+        """ Runs concurrent calls, the first one runs until all others
+        wait for it. Returns results (or errors) of all calls. """
+        results = []
+
+        def caller():
+            try:
+                results.append(self.flights.do(key, self._call, value))
+            except Exception as error:
+                results.append(error)
+
+        threads = [threading.Thread(target=caller) for _ in range(count)]
+        threads[0].start()
+        while not self.calls:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+
+        # Followers can't be observed waiting: give them time to join
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def test_do(self):
+        """ Tests that concurrent calls with a key run once. """
+        results = self._run_concurrently('key', 42)
+
+        self.assertEqual(self.calls, [42])
+        self.assertEqual(
+            sorted(results), [(42, False), (42, True), (42, True)])
+        self.assertEqual(len(self.flights), 0)
+
+    def test_error(self):
+        """ Tests that an error is raised to every caller. """
+        error = ValueError("failed")
+        results = self._run_concurrently('key', error)
+
+        self.assertEqual(self.calls, [error])
+        self.assertEqual(results, [error] * 3)
+
+    def test_sequential_calls(self):
+        """ Tests that results are not cached. """
+        self.release.set()
+
+        self.assertEqual(self.flights.do('key', self._call, 1), (1, False))
+        self.assertEqual(self.flights.do('key', self._call, 2), (2, False))
+        self.assertEqual(self.calls, [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_startup.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import sys
+import subprocess
+
+# Maximum cumulative import time of the command-line module (milliseconds)
+STARTUP_BUDGET = float(os.environ.get("SUBLIME_STARTUP_BUDGET_MS", 50))
+
+# Modules which must only be imported when they are needed
+LAZY_MODULES = (
+    "babelfish", "guessit", "enzyme", "xmlrpc.client", "logging.config",
+    "sublime.server", "sublime.providers.opensubtitles"
+)
+
+
+# -----------------------------------------------------------------------------
+#
+# StartupTestCase class
+#
+# -----------------------------------------------------------------------------
+class StartupTestCase(unittest.TestCase):
+    """ Tests cold start of the command-line module. """
+
+    def _run_python(self, *args):
+        return subprocess.run(
+            [sys.executable] + list(args),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, check=True)
+
+    def _import_time(self):
+        """ Returns cumulative import time of sublime.cli
+        in milliseconds, using python -X importtime. """
+        result = self._run_python(
+            "-X", "importtime", "-c", "import sublime.cli")
+
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "sublime.cli":
+                return int(fields[1]) / 1000
+
+        self.fail("sublime.cli was not found in import times.")
+
+    def test_heavy_modules_are_lazy(self):
+        """ Tests that heavy modules are not imported at startup. """
+        result = self._run_python(
+            "-c",
+            "import sys, sublime.cli\n"
+            "print('\\n'.join(m for m in {!r} if m in sys.modules))".format(
+                LAZY_MODULES))
+
+        self.assertEqual(result.stdout.split(), [])
+
+    def test_startup_budget(self):
+        """ Tests that cold start stays within its budget.
+        Best of several runs is kept to absorb noise. """
+        import_time = min(self._import_time() for _ in range(3))
+
+        self.assertLess(
+            import_time, STARTUP_BUDGET,
+            "Importing sublime.cli took {:.1f} ms (budget: {:.1f} ms)".format(
+                import_time, STARTUP_BUDGET))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
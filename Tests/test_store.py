@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_store.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import gzip
+import zlib
+import tempfile
+
+from sublime.store import SubtitleStore
+
+
+# -----------------------------------------------------------------------------
+#
+# SubtitleStoreTestCase class
+#
+# -----------------------------------------------------------------------------
+class SubtitleStoreTestCase(unittest.TestCase):
+    """ Tests SubtitleStore class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def test_put_and_get(self):
+        """ Tests that a stored subtitle is found and decompressed. """
+        store = SubtitleStore(self.directory.name)
+        data = b"1\n00:00:01,000 --> 00:00:02,000\nHello\n"
+
+        self.assertIsNone(store.get("os", "1234"))
+
+        store.put("os", "1234", [gzip.compress(data)])
+
+        self.assertIsNotNone(store.get("os", "1234"))
+        self.assertIsNone(store.get("xx", "1234"))
+        self.assertEqual(b"".join(store.iter_data("os", "1234")), data)
+
+    def test_lru_eviction(self):
+        """ Tests that least recently used subtitles are evicted
+        when the store is full. """
+        compressed_data = gzip.compress(os.urandom(1000))
+        store = SubtitleStore(
+            self.directory.name, max_size=len(compressed_data) * 2)
+
+        store.put("os", "1", [compressed_data])
+        store.put("os", "2", [compressed_data])
+        os.utime(store.filepath("os", "1"), (1, 1))
+        os.utime(store.filepath("os", "2"), (2, 2))
+
+        # Using the first subtitle makes the second one the oldest
+        store.get("os", "1")
+        store.put("os", "3", [compressed_data])
+
+        self.assertIsNotNone(store.get("os", "1"))
+        self.assertIsNone(store.get("os", "2"))
+        self.assertIsNotNone(store.get("os", "3"))
+
+    def test_put_corrupt_data(self):
+        """ Tests that truncated data is never stored. """
+        store = SubtitleStore(self.directory.name)
+        compressed_data = gzip.compress(b"Hello" * 100)
+
+        with self.assertRaises(zlib.error):
+            store.put("os", "1234", [compressed_data[:-10]])
+
+        self.assertIsNone(store.get("os", "1234"))
+        self.assertEqual(
+            [files for _, _, files in os.walk(self.directory.name)
+             if files], [])
+
+    def test_size(self):
+        """ Tests that the size of the store counts each subtitle once,
+        when it is stored again too. """
+        store = SubtitleStore(self.directory.name)
+        compressed_data = gzip.compress(os.urandom(1000))
+
+        store.put("os", "1", [compressed_data])
+        self.assertEqual(store._size, len(compressed_data))
+        store.put("os", "1", [compressed_data])
+        store.put("os", "2", [compressed_data])
+        self.assertEqual(store._size, len(compressed_data) * 2)
+
+        store.remove("os", "1")
+        self.assertEqual(store._size, len(compressed_data))
+
+    def tearDown(self):
+        """ Clean up """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
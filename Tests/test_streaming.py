@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_streaming.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import io
+import time
+import socket
+import threading
+import xmlrpc.client
+
+from sublime.hedging import Deadline
+from sublime.hedging import DeadlineExceeded
+from sublime.streaming import StreamedResponse
+from sublime.streaming import StreamingTransport
+
+
+# -----------------------------------------------------------------------------
+#
+# SlowStream class
+#
+# -----------------------------------------------------------------------------
+class SlowStream(io.BytesIO):
+
+    """ Stream which never returns more than a few bytes at once. """
+
+    def read(self, size=-1):
+        return io.BytesIO.read(self, 64)
+
+
+# -----------------------------------------------------------------------------
+#
+# StreamedResponseTestCase class
+#
+# -----------------------------------------------------------------------------
+class StreamedResponseTestCase(unittest.TestCase):
+    """ Tests StreamedResponse class. """
+
+    def setUp(self):
+        self.response = {
+            'status': "200 OK",
+            'data': [
+                {
+                    'MovieHash': "8fcf0167e19c41be", 'SubRating': "5.0",
+                    'Unused': {'nested': [1, 2]}, 'SubAddDate': "2014"
+                }
+                for _ in range(100)
+            ],
+            'seconds': 0.5
+        }
+        self.body = xmlrpc.client.dumps(
+            (self.response,), methodresponse=True).encode('utf-8')
+
+    def test_rows_are_streamed(self):
+        """ Tests that rows are yielded while the response is read. """
+        stream = SlowStream(self.body)
+        response = StreamedResponse(
+            stream, fields=('MovieHash', 'SubRating'))
+
+        rows = iter(response)
+        first_row = next(rows)
+
+        self.assertLess(stream.tell(), len(self.body))
+        self.assertEqual(
+            first_row, {'MovieHash': "8fcf0167e19c41be", 'SubRating': "5.0"})
+        self.assertEqual(len(list(rows)), 99)
+
+        self.assertEqual(response.get('status'), "200 OK")
+        self.assertEqual(response['seconds'], 0.5)
+        self.assertTrue(stream.closed)
+
+    def test_without_rows(self):
+        """ Tests a response without any row. """
+        body = xmlrpc.client.dumps(
+            ({'status': "200 OK", 'data': False},), methodresponse=True)
+        response = StreamedResponse(io.BytesIO(body.encode('utf-8')))
+
+        self.assertEqual(list(response), [])
+        self.assertFalse(response['data'])
+
+    def test_fault(self):
+        """ Tests that a fault is raised after reading the response. """
+        body = xmlrpc.client.dumps(
+            xmlrpc.client.Fault(500, "Server error"), methodresponse=True)
+        response = StreamedResponse(io.BytesIO(body.encode('utf-8')))
+
+        with self.assertRaises(xmlrpc.client.Fault) as error:
+            response.read()
+
+        self.assertEqual(error.exception.faultCode, 500)
+
+    def test_close_aborts_connection(self):
+        """ Tests that stopping early notifies the transport. """
+        aborted = []
+        response = StreamedResponse(
+            SlowStream(self.body), on_abort=lambda: aborted.append(True))
+
+        for _ in response:
+            break
+
+        self.assertEqual(aborted, [True])
+
+
+# -----------------------------------------------------------------------------
+#
+# StreamingTransportTestCase class
+#
+# -----------------------------------------------------------------------------
+class StreamingTransportTestCase(unittest.TestCase):
+    """ Tests deadlines of StreamingTransport class. """
+
+    def setUp(self):
+        # Server which accepts connections and never answers
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(5)
+        self.host = "127.0.0.1:{}".format(self.server.getsockname()[1])
+        self.transport = StreamingTransport()
+
+    def _request(self):
+        body = xmlrpc.client.dumps((), 'LogIn').encode('utf-8')
+        start = time.monotonic()
+        try:
+            self.transport.stream_request(self.host, "/xml-rpc", body)
+        finally:
+            self.elapsed = time.monotonic() - start
+
+    def test_timeout(self):
+        """ Tests that a request without answer times out. """
+        self.transport.timeout = 0.2
+
+        with self.assertRaises(socket.timeout):
+            self._request()
+        self.assertLess(self.elapsed, 5)
+
+    def test_deadline(self):
+        """ Tests that a request times out at the deadline of the run
+        and that no request is sent after it. """
+        self.transport.timeout = 60
+        self.transport.deadline = Deadline(0.2)
+
+        with self.assertRaises(socket.timeout):
+            self._request()
+        self.assertLess(self.elapsed, 5)
+
+        with self.assertRaises(DeadlineExceeded):
+            self._request()
+
+    def test_cancel(self):
+        """ Tests that a request is cancelled from another thread. """
+        self.transport.timeout = 60
+        timer = threading.Timer(0.2, self.transport.cancel)
+        timer.start()
+
+        with self.assertRaises(OSError):
+            self._request()
+        self.assertLess(self.elapsed, 5)
+        timer.join()
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -13,14 +13,25 @@
 
 import unittest
 import os
+import gzip
+import zlib
+import logging
+import base64
+import tempfile
 
 from sublime.core import Video
 
 from sublime.util import get_exe_dir
-from sublime.util import Signature
-from sublime.util import FileMagic
-from sublime.util import FileExtensionMismatchError
-from sublime.util import FileUnknownError
+from sublime.util import get_cache_dir
+from sublime.util import init_logging
+from sublime.util import stop_logging
+from sublime.util import QueueHandler
+from sublime.util import iter_b64decode
+from sublime.util import iter_decompress
+from sublime.file import Signature
+from sublime.file import FileMagic
+from sublime.file import FileExtensionMismatchError
+from sublime.file import FileUnknownError
 
 
 # -----------------------------------------------------------------------------
@@ -79,6 +90,126 @@ class FileMagicTestCase(unittest.TestCase):
             error.exception.file_signature, expected_signature)
 
 
+# -----------------------------------------------------------------------------
+#
+# StreamingDecodeTestCase class
+#
+# -----------------------------------------------------------------------------
+class StreamingDecodeTestCase(unittest.TestCase):
+    """ Tests streaming decoding functions. """
+
+    def setUp(self):
+        self.data = b"1\n00:00:01,000 --> 00:00:02,000\nHello\n\n" * 5000
+        self.encoded = base64.standard_b64encode(
+            gzip.compress(self.data)).decode('ascii')
+
+    def test_iter_b64decode(self):
+        """ Tests that base64 data is decoded chunk by chunk. """
+        chunks = list(iter_b64decode(self.encoded, chunk_size=17))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            b"".join(chunks), base64.standard_b64decode(self.encoded))
+
+        # Whitespaces inside base64 data are ignored
+        with_newlines = "\n".join(
+            self.encoded[i:i + 76] for i in range(0, len(self.encoded), 76))
+        self.assertEqual(
+            b"".join(iter_b64decode(with_newlines, chunk_size=17)),
+            base64.standard_b64decode(self.encoded))
+
+    def test_iter_decompress(self):
+        """ Tests that gzip data is decompressed with bounded chunks. """
+        chunks = list(iter_decompress(
+            iter_b64decode(self.encoded, chunk_size=17), chunk_size=4096))
+
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        self.assertEqual(b"".join(chunks), self.data)
+
+    def test_iter_decompress_truncated(self):
+        """ Tests that truncated gzip data raises an error. """
+        compressed = gzip.compress(self.data)
+
+        with self.assertRaises(zlib.error):
+            for _ in iter_decompress([compressed[:len(compressed) // 2]]):
+                pass
+
+
+# -----------------------------------------------------------------------------
+#
+# CacheDirTestCase class
+#
+# -----------------------------------------------------------------------------
+class CacheDirTestCase(unittest.TestCase):
+    """ Tests cache directory of the user. """
+
+    def test_get_cache_dir(self):
+        """ Tests that cache directory follows XDG_CACHE_HOME
+        and never depends on the working directory. """
+        cache_home = os.environ.pop('XDG_CACHE_HOME', None)
+        try:
+            self.assertEqual(
+                get_cache_dir(),
+                os.path.join(os.path.expanduser('~'), '.cache', 'sublime'))
+
+            os.environ['XDG_CACHE_HOME'] = os.path.join(os.sep, 'xdg')
+            self.assertEqual(
+                get_cache_dir(), os.path.join(os.sep, 'xdg', 'sublime'))
+        finally:
+            os.environ.pop('XDG_CACHE_HOME', None)
+            if cache_home is not None:
+                os.environ['XDG_CACHE_HOME'] = cache_home
+
+
+# -----------------------------------------------------------------------------
+#
+# LoggingTestCase class
+#
+# -----------------------------------------------------------------------------
+class LoggingTestCase(unittest.TestCase):
+    """ Tests logging initialization. """
+
+    def setUp(self):
+        """ Logs are written in a temporary directory. """
+        self.directory = tempfile.TemporaryDirectory()
+        self.sublime_home = os.environ.get('SUBLIME_HOME')
+        os.environ['SUBLIME_HOME'] = self.directory.name
+
+    def test_production_profile(self):
+        """ Tests that handlers are behind a queue and that
+        debug messages are never formatted in production. """
+        formatted = []
+
+        class Expensive(object):
+            def __str__(self):
+                formatted.append(True)
+                return "expensive"
+
+        logger = init_logging('production')
+
+        self.assertEqual(
+            [type(handler) for handler in logger.handlers], [QueueHandler])
+        self.assertEqual(logger.getEffectiveLevel(), logging.INFO)
+
+        logging.getLogger("sublime.test").debug("Response: %s", Expensive())
+        self.assertEqual(formatted, [])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory.name, "logs", "sublime.log")))
+
+    def tearDown(self):
+        """ Clean up """
+        stop_logging()
+        for logger in (logging.getLogger(), logging.getLogger("sublime")):
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+
+        if self.sublime_home is None:
+            os.environ.pop('SUBLIME_HOME', None)
+        else:
+            os.environ['SUBLIME_HOME'] = self.sublime_home
+        self.directory.cleanup()
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# _*_ coding: utf-8 _*_
+
+###
+# Project          : SubLime
+# FileName         : test_walk.py
+# -----------------------------------------------------------------------------
+# Author           : sham
+# E-Mail           : mauricesham@gmail.com
+# -----------------------------------------------------------------------------
+# Creation date    : 19/10/2026
+##
+
+import unittest
+import os
+import tempfile
+import threading
+
+from sublime.walk import ParallelWalker
+
+
+# -----------------------------------------------------------------------------
+#
+# ParallelWalkerTestCase class
+#
+# -----------------------------------------------------------------------------
+class ParallelWalkerTestCase(unittest.TestCase):
+    """ Tests ParallelWalker class. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = os.path.realpath(self.directory.name)
+
+        # Tree of 3 levels with 3 directories and 2 files by directory
+        self.files = set()
+        for first in range(3):
+            for second in range(3):
+                directory = os.path.join(
+                    self.root, "d{}".format(first), "d{}".format(second))
+                os.makedirs(directory)
+                for number in range(2):
+                    filepath = os.path.join(
+                        directory, "video{}.avi".format(number))
+                    open(filepath, 'w').close()
+                    self.files.add(filepath)
+
+    def walk(self, roots, workers=4):
+        """ Returns list of walked files. """
+        return list(ParallelWalker(roots, workers))
+
+    def test_walk(self):
+        """ Tests that each file is found once. """
+        for workers in (1, 4):
+            files = self.walk([self.root], workers)
+
+            self.assertEqual(len(files), len(self.files))
+            self.assertEqual(set(files), self.files)
+
+    def test_overlapping_roots(self):
+        """ Tests that files of overlapping roots are found once. """
+        files = self.walk([
+            os.path.join(self.root, "d1"), self.root,
+            os.path.join(self.root, "d1", "d2"), self.root])
+
+        self.assertEqual(len(files), len(self.files))
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "symlinks not available")
+    def test_symlink_loop(self):
+        """ Tests that a symbolic link loop is walked through once. """
+        os.symlink(self.root, os.path.join(self.root, "d0", "loop"))
+
+        files = self.walk([self.root])
+
+        self.assertEqual(len(files), len(self.files))
+
+    def test_missing_root(self):
+        """ Tests that a missing root is skipped. """
+        files = self.walk([os.path.join(self.root, "missing"), self.root])
+
+        self.assertEqual(set(files), self.files)
+        self.assertEqual(self.walk([os.path.join(self.root, "missing")]), [])
+
+    def test_stop(self):
+        """ Tests that threads stop when files are not all consumed. """
+        walker = ParallelWalker([self.root], workers=4, queue_size=1)
+
+        for filepath in walker:
+            break
+
+        self.assertFalse([
+            thread for thread in threading.enumerate()
+            if thread.name.startswith("walk-")])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
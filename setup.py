@@ -59,6 +59,9 @@ setup(
         'console_scripts': [
             'sublime = sublime:main',
         ],
+        'sublime.providers': [
+            'os = sublime.providers.opensubtitles:OpenSubtitlesServer',
+        ],
     },
     license="License :: OSI Approved :: BSD License",
     classifiers=[
@@ -82,7 +85,8 @@ setup(
         "stevedore==1.3.0"
     ],
     data_files=[
-        ('Config', ['Config/logging.conf']),
+        ('Config', [
+            'Config/logging.conf', 'Config/logging-production.conf']),
     ],
     test_suite='nose.collector',
     tests_require=['nose>=1.3.0'],